@@ -0,0 +1 @@
+# Benchmarks for the mod evaluator backend (run from the backend directory)
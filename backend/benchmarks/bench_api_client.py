@@ -0,0 +1,52 @@
+"""
+Throughput of SWGOHAPIClient against a local fake Comlink server
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api_client --requests 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_comlink import FakeComlinkServer
+from services.api_client import SWGOHAPIClient
+
+async def run_level(url: str, concurrency: int, total_requests: int) -> float:
+    """Fire total_requests fetches with at most `concurrency` in flight, return req/s"""
+    client = SWGOHAPIClient(
+        url,
+        max_connections=concurrency,
+        max_concurrent_requests=concurrency
+    )
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            client.fetch_player_data(f"{i:09d}") for i in range(total_requests)
+        ])
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+
+    failures = sum(1 for r in results if r is None)
+    if failures:
+        print(f"  warning: {failures} failed requests")
+    return total_requests / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Comlink latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 5, 10, 20, 50])
+    args = parser.parse_args()
+
+    with FakeComlinkServer(latency=args.latency) as server:
+        print(f"Fake Comlink at {server.url}, latency {args.latency * 1000:.0f} ms")
+        print(f"{'concurrency':>12} {'req/s':>10} {'speedup':>8}")
+        baseline = None
+        for level in args.concurrency:
+            rate = asyncio.run(run_level(server.url, level, args.requests))
+            baseline = baseline or rate
+            print(f"{level:>12} {rate:>10.1f} {rate / baseline:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Response compression: ratio and CPU time per encoding and level
+
+Compresses evaluated synthetic player bodies (row JSON and columnar) with
+every installed encoding at a few levels, reporting the ratio, the CPU time
+to compress (paid once per cached body) and to decompress (paid by the
+client), against what compressing on every cache hit would cost.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_compression --units 250 500 --output results/compression.json
+"""
+import argparse
+import gzip
+import time
+from typing import Any, Dict
+
+from benchmarks.bench_formats import build_body
+from benchmarks.bench_mod_processor import StaticNames
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+from services.response_compression import ResponseCompressor, available_encodings, brotli, zstandard
+from services.response_formats import encode_columnar
+from services.roster_evaluator import RosterEvaluator
+
+LEVELS = {"gzip": (1, 6, 9), "br": (4, 5, 9, 11), "zstd": (1, 3, 9, 19)}
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+def best_cpu_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.thread_time()
+        fn()
+        best = min(best, time.thread_time() - start)
+    return round(best * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[250, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH))
+    encodings = available_encodings()
+    print(f"Installed encodings: {', '.join(encodings)}")
+
+    results: Dict[str, Any] = {}
+    for units in args.units:
+        _, body = build_body(evaluator, processor, units)
+        for body_format, data in (("json", body), ("columnar", encode_columnar(body))):
+            name = f"units_{units}_{body_format}"
+            results[name] = {"bytes": len(data)}
+            print(f"{name}: {len(data)} bytes")
+            print(f"  {'encoding':<10} {'level':>5} {'bytes':>9} {'ratio':>7} {'compress ms':>12} {'decompress ms':>14}")
+            for encoding in encodings:
+                for level in LEVELS[encoding]:
+                    compressor = ResponseCompressor([encoding], levels={encoding: level}, min_bytes=0)
+                    compressed = compressor.compress(data)[encoding]
+                    assert decompress(encoding, compressed) == data
+                    compress_ms = best_cpu_ms(lambda: compressor.compress(data), args.repeat)
+                    decompress_ms = best_cpu_ms(lambda: decompress(encoding, compressed), args.repeat)
+                    results[name][f"{encoding}_{level}"] = {
+                        "bytes": len(compressed), "ratio": round(len(compressed) / len(data), 4),
+                        "compress_ms": compress_ms, "decompress_ms": decompress_ms
+                    }
+                    print(f"  {encoding:<10} {level:>5} {len(compressed):>9} {len(compressed) / len(data):>7.3f} "
+                          f"{compress_ms:>12} {decompress_ms:>14}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "compression", params, results)
+
+if __name__ == "__main__":
+    main()
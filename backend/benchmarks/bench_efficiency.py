@@ -0,0 +1,121 @@
+"""
+Per-mod EvaluationEngine.calculate_roll_efficiency loop vs the vectorized batch API
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_efficiency --sizes 500 5000 100000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from models.mod import ModRecord, PrimaryStatRecord, SecondaryStatRecord
+from services.evaluation_engine import EvaluationEngine
+
+# unitStatId -> (min, max) unscaled roller bounds for 5-dot mods
+ROLLER_BOUNDS = {
+    5: (30000, 60000),      # Speed
+    1: (2142000, 4284000),  # Health
+    28: (4200000, 8400000), # Protection
+    41: (228000, 456000),   # Offense
+    42: (49000, 98000),     # Defense
+    53: (11250, 22500),     # Crit Chance
+    17: (11250, 22500),     # Potency
+    18: (11250, 22500),     # Tenacity
+    48: (2810, 5630),       # Offense %
+    55: (5000, 10000),      # Health %
+    56: (9900, 19800),      # Protection %
+    49: (8500, 17000),      # Defense %
+}
+SECONDARY_IDS = list(ROLLER_BOUNDS)
+
+def random_mods(count: int, seed: int = 1) -> List[ModRecord]:
+    """Random but well-formed mods with 0-4 secondaries and 1-5 rolls each"""
+    rng = random.Random(seed)
+    mods = []
+    for n in range(count):
+        secondaries = []
+        for stat_id in rng.sample(SECONDARY_IDS, rng.randint(0, 4)):
+            low, high = ROLLER_BOUNDS[stat_id]
+            rolls = [str(rng.randint(low, high)) for _ in range(rng.randint(1, 5))]
+            secondaries.append(SecondaryStatRecord(
+                unitStatId=stat_id,
+                value=sum(int(r) for r in rolls) / 10000,
+                rolls=len(rolls),
+                unscaledRollValue=rolls,
+                statRollerBoundsMin=str(low),
+                statRollerBoundsMax=str(high)
+            ))
+        dots = rng.choice([5, 5, 5, 6])
+        mods.append(ModRecord(
+            id=f"mod-{n}", definitionId=f"{rng.randint(1, 8)}{dots}{rng.randint(1, 6)}",
+            level=15, tier=rng.randint(1, 5), locked=False,
+            characterId="HERMITYODA:SEVEN_STAR", characterDisplayName="Hermit Yoda",
+            primaryStat=PrimaryStatRecord(unitStatId=5, value=30.0), secondaryStats=secondaries,
+            dots=dots, set_type="Speed", slot_type="Arrow", tier_name="Gold"
+        ))
+    return mods
+
+def edge_case_mods() -> List[ModRecord]:
+    """Mods hitting every fallback branch of the per-mod path"""
+    def stat(rolls, low="30000", high="60000"):
+        return SecondaryStatRecord(unitStatId=5, value=1.0, rolls=len(rolls) or 1, unscaledRollValue=rolls,
+                             statRollerBoundsMin=low, statRollerBoundsMax=high)
+    cases = [
+        [],
+        [stat([])],
+        [stat(["30000"], low="")],
+        [stat(["30000"], high="")],
+        [stat(["abc"])],
+        [stat(["30000", "oops"]), stat(["60000"])],
+        [stat(["29000"]), stat(["45000"])],
+        [stat(["1"], low="x")],
+    ]
+    return [
+        ModRecord(
+            id=f"edge-{n}", definitionId="451", level=1, tier=1, locked=False,
+            characterId="X", characterDisplayName="X", primaryStat=PrimaryStatRecord(unitStatId=5, value=1.0),
+            secondaryStats=secondaries, dots=5, set_type="Speed", slot_type="Square", tier_name="Grey"
+        )
+        for n, secondaries in enumerate(cases)
+    ]
+
+def check_parity(engine: EvaluationEngine, mods: List[ModRecord]) -> None:
+    expected = [engine.calculate_roll_efficiency(mod) for mod in mods]
+    actual = engine.calculate_roll_efficiency_batch(mods).to_mod_results()
+    if expected != actual:
+        for index, (e, a) in enumerate(zip(expected, actual)):
+            if e != a:
+                raise AssertionError(f"Mismatch for mod {mods[index].id}: {e} != {a}")
+    print(f"  parity OK for {len(mods)} mods")
+
+def time_call(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = EvaluationEngine()
+    check_parity(engine, edge_case_mods())
+
+    print(f"{'mods':>8} {'loop ms':>10} {'batch ms':>10} {'kernel ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        mods = random_mods(size)
+        check_parity(engine, mods)
+        columns = engine.calculate_roll_efficiency_batch(mods).columns
+
+        loop = time_call(lambda: [engine.calculate_roll_efficiency(mod) for mod in mods], args.repeat)
+        batch = time_call(lambda: engine.calculate_roll_efficiency_batch(mods), args.repeat)
+        kernel = time_call(lambda: engine.calculate_columns_efficiency(columns), args.repeat)
+        print(f"{size:>8} {loop * 1000:>10.2f} {batch * 1000:>10.2f} {kernel * 1000:>10.2f} {loop / batch:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Size and encode / decode time of the player response formats
+
+Builds real /api/player bodies from synthetic rosters (the mods go through
+RosterEvaluator, as in main.produce_player_response) and compares the row
+JSON body with its columnar encoding: raw and gzip size, encode time (row:
+joining the cached per-mod bytes; columnar: encode_columnar from the row
+body) and client-side decode time: parsing, and for columnar also turning
+the columns back into row mods (a client reading columns directly skips
+that). MessagePack is measured too when the msgpack package is installed.
+Every columnar body is checked to decode back to exactly the row body's mods.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_formats --units 50 250 500 --output results/formats.json
+"""
+import argparse
+import gzip
+import sys
+import time
+from typing import Any, Callable, Dict
+
+import orjson
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import generate_player
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+from services.response_formats import encode_columnar, row_mods
+from services.roster_evaluator import RosterEvaluator
+from services.upgrade_simulator import UpgradeSimulator
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+def build_body(evaluator: RosterEvaluator, processor: ModProcessor, units: int) -> tuple:
+    raw = generate_player(units=units, seed=units)
+    items = list(processor.iter_roster_mods(raw))
+    encoded = [evaluation[3] for evaluation in evaluator.evaluate(items) if evaluation is not None]
+    workflows = evaluator.workflow_engine.workflow_info if evaluator.workflow_engine is not None else []
+    head = orjson.dumps({"success": True, "playerName": raw["name"], "allyCode": raw["allyCode"],
+                         "lastUpdated": "2024-01-01T00:00:00", "workflows": workflows})
+    tail = b'],"snapshot":"0123456789abcdef","collectionStats":{},"dataSource":"cache","cached":true}'
+
+    def encode_row() -> bytes:
+        return head[:-1] + b',"mods":[' + b",".join(encoded) + tail
+
+    return encode_row, encode_row()
+
+def format_result(body: bytes, encode_ms: float, decode_ms: float, to_rows_ms: float = 0.0) -> Dict[str, Any]:
+    return {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, 6)),
+        "encode_ms": encode_ms,
+        "decode_ms": decode_ms,
+        "to_rows_ms": to_rows_ms
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[50, 250, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH),
+                                UpgradeSimulator() if settings.UPGRADE_PROJECTIONS else None)
+    if msgpack is None:
+        print("msgpack not installed, skipping it")
+
+    results: Dict[str, Any] = {}
+    mismatches = 0
+    print(f"{'roster':<10} {'format':<9} {'KiB':>8} {'gzip KiB':>9} {'encode ms':>10} {'decode ms':>10} {'to rows ms':>11}")
+    for units in args.units:
+        encode_row, row_body = build_body(evaluator, processor, units)
+        columnar_body = encode_columnar(row_body)
+        row = orjson.loads(row_body)
+        if row_mods(orjson.loads(columnar_body)["mods"]) != row["mods"]:
+            mismatches += 1
+            print(f"  MISMATCH: columnar mods of {units} units differ from the row body")
+
+        formats = {
+            "json": format_result(row_body, best_ms(encode_row, args.repeat),
+                                  best_ms(lambda: orjson.loads(row_body)["mods"], args.repeat)),
+            "columnar": format_result(columnar_body, best_ms(lambda: encode_columnar(row_body), args.repeat),
+                                      best_ms(lambda: orjson.loads(columnar_body)["mods"], args.repeat),
+                                      best_ms(lambda: row_mods(orjson.loads(columnar_body)["mods"]), args.repeat))
+        }
+        if msgpack is not None:
+            packed = msgpack.packb(row)
+            formats["msgpack"] = format_result(packed, best_ms(lambda: msgpack.packb(row), args.repeat),
+                                               best_ms(lambda: msgpack.unpackb(packed)["mods"], args.repeat))
+
+        name = f"units_{units}"
+        results[name] = {"mods": len(row["mods"]), **formats}
+        for label, result in formats.items():
+            print(f"{name:<10} {label:<9} {result['bytes'] / 1024:>8.1f} {result['gzip_bytes'] / 1024:>9.1f} "
+                  f"{result['encode_ms']:>10.3f} {result['decode_ms']:>10.3f} {result['to_rows_ms']:>11.3f}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        params["msgpack"] = msgpack is not None
+        save_results(args.output, "formats", params, results)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Roster history: write cost, storage growth and query time
+
+Records an evaluated synthetic roster into a fresh RosterHistory many times,
+changing a share of its mods between snapshots (level ups, moves to
+another character, lock changes), and reports the
+time per write, the file size against storing every snapshot in full, and
+the time of a trend query over the whole range and of rebuilding the roster
+as it was at the middle snapshot. The rebuilt roster is checked against what
+was recorded then.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_history --units 250 --snapshots 200 --output results/history.json
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import orjson
+
+from benchmarks.bench_formats import build_body
+from benchmarks.bench_mod_processor import StaticNames
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+from services.roster_evaluator import RosterEvaluator
+from services.roster_history import RosterHistory
+
+ALLY_CODE = "123456789"
+
+def best_ms(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+def history_mods(mods: List[Dict[str, Any]]) -> list:
+    # The signature only has to change when the mod does; level stands in for a level up
+    return [(mod["id"], (mod["d"], mod["l"], mod["t"], mod["k"], mod["c"], mod["cn"], repr(mod["s"])), orjson.dumps(mod))
+            for mod in mods]
+
+def file_bytes(path: str) -> int:
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, default=250)
+    parser.add_argument("--snapshots", type=int, default=200)
+    parser.add_argument("--change-ratio", type=float, default=0.02, help="share of mods changed per snapshot")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH))
+    _, body = build_body(evaluator, processor, args.units)
+    mods = orjson.loads(body)["mods"]
+    rng = random.Random(args.units)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        history = RosterHistory(path)
+        write_seconds = []
+        full_bytes = 0
+        middle = None
+        for snapshot in range(args.snapshots):
+            if snapshot:
+                for mod in rng.sample(mods, max(1, int(len(mods) * args.change_ratio))):
+                    mod["l"] += 1
+                # Moving or locking a mod changes no rolls but must show in the rebuilt roster
+                for mod in rng.sample(mods, max(1, int(len(mods) * args.change_ratio / 2))):
+                    wearer = rng.choice(mods)
+                    mod["c"], mod["cn"], mod["k"] = wearer["c"], wearer["cn"], not mod["k"]
+            recorded = history_mods(mods)
+            full_bytes += sum(len(encoded) for _, _, encoded in recorded)
+            start = time.perf_counter()
+            history.record(ALLY_CODE, f"v{snapshot}", "Benchmark", recorded)
+            history.flush()
+            write_seconds.append(time.perf_counter() - start)
+            if snapshot == args.snapshots // 2:
+                middle = (time.time(), sorted(encoded for _, _, encoded in recorded))
+
+        unchanged = history_mods(mods)
+        def record_unchanged():
+            history.record(ALLY_CODE, f"v{args.snapshots - 1}", "Benchmark", unchanged)
+            history.flush()
+        unchanged_ms = best_ms(record_unchanged, args.repeat)
+
+        at, expected = middle
+        _, rebuilt = history.roster_at(ALLY_CODE, at)
+        mismatch = sorted(rebuilt) != expected
+        trend_ms = best_ms(lambda: history.trend(ALLY_CODE, 0, time.time()), args.repeat)
+        roster_ms = best_ms(lambda: history.roster_at(ALLY_CODE, at), args.repeat)
+        history.close()
+        stored = file_bytes(path)
+
+    first_write, write_seconds = write_seconds[0], sorted(write_seconds[1:] or write_seconds)
+    results = {
+        "mods": len(mods),
+        "first_write_ms": round(first_write * 1000, 2),
+        "write_median_ms": round(write_seconds[len(write_seconds) // 2] * 1000, 2),
+        "write_max_ms": round(write_seconds[-1] * 1000, 2),
+        "unchanged_write_ms": unchanged_ms,
+        "file_kib": stored // 1024,
+        "full_snapshots_kib": full_bytes // 1024,
+        "trend_ms": trend_ms,
+        "roster_at_ms": roster_ms
+    }
+    print(f"{len(mods)} mods x {args.snapshots} snapshots, {args.change_ratio:.0%} changed per snapshot")
+    print(f"  write: first (whole roster) {results['first_write_ms']} ms, median {results['write_median_ms']} ms, "
+          f"max {results['write_max_ms']} ms, unchanged {results['unchanged_write_ms']} ms")
+    print(f"  storage: {results['file_kib']} KiB on disk vs {results['full_snapshots_kib']} KiB of full snapshots")
+    print(f"  trend over {args.snapshots} snapshots: {trend_ms} ms, roster at a point in time: {roster_ms} ms")
+    if mismatch:
+        print("  MISMATCH: rebuilt roster differs from the one recorded")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "history", params, results)
+    if mismatch:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
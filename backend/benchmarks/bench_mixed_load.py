@@ -0,0 +1,130 @@
+"""
+p99 latency of small requests while large rosters are being evaluated, per CPU executor mode
+
+A few clients keep requesting never-seen large rosters while others request
+small rosters (cold) and cached players (warm). With the evaluation inline,
+every large roster blocks the event loop and the small requests queue behind
+it; the thread and process executors move that work off the loop.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_mixed_load --modes inline thread process --output results/mixed.json
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_player_endpoint import AsgiClient, free_port, prime_comlink, start_fake_comlink, summarize
+
+async def timed_get(client: AsgiClient, ally_code: str, latencies: List[float], sizes: List[int]) -> bool:
+    start = time.perf_counter()
+    status, _, body = await client.request("GET", f"/api/player/{ally_code}")
+    latencies.append(time.perf_counter() - start)
+    sizes.append(len(body))
+    return status == 200
+
+async def run_mode(main_module, client: AsgiClient, comlink_url: str, mode: str, mode_index: int,
+                   args) -> Dict[str, Any]:
+    from services.cpu_executor import CPUExecutor
+    from services.roster_evaluator import init_worker
+
+    executor = CPUExecutor(mode, max_workers=args.workers, initializer=init_worker,
+                           initargs=(main_module.settings.WORKFLOWS_CONFIG_PATH,))
+    await executor.warm_up()
+    main_module.cpu_executor = executor
+
+    # Ally codes starting with 9 are served as large rosters
+    base = 100000 * (mode_index + 1)
+    large_codes = [f"{900000000 + base + n}" for n in range(args.large)]
+    small_codes = (f"{100000000 + base + n}" for n in itertools.count())
+    warm_codes = [f"{500000000 + base + n}" for n in range(20)]
+    # Small rosters are quick to build, so only the large ones are generated up front
+    await prime_comlink(comlink_url, large_codes)
+    for ally_code in warm_codes:
+        await client.request("GET", f"/api/player/{ally_code}")
+
+    classes = {name: ([], [], [0]) for name in ("large", "small_cold", "warm")}
+    done = asyncio.Event()
+
+    async def large_client(queue: List[str]):
+        latencies, sizes, errors = classes["large"]
+        while queue:
+            if not await timed_get(client, queue.pop(), latencies, sizes):
+                errors[0] += 1
+
+    async def small_client(worker: int):
+        for n in itertools.count():
+            if done.is_set():
+                return
+            name = "warm" if (n + worker) % 2 else "small_cold"
+            ally_code = warm_codes[n % len(warm_codes)] if name == "warm" else next(small_codes)
+            latencies, sizes, errors = classes[name]
+            if not await timed_get(client, ally_code, latencies, sizes):
+                errors[0] += 1
+            await asyncio.sleep(args.think_time)
+
+    start = time.perf_counter()
+    small_tasks = [asyncio.create_task(small_client(n)) for n in range(args.small_concurrency)]
+    await asyncio.gather(*[large_client(large_codes) for _ in range(args.large_concurrency)])
+    elapsed = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*small_tasks)
+
+    await asyncio.to_thread(executor.shutdown)
+    return {name: summarize(latencies, elapsed, sizes, errors[0]) for name, (latencies, sizes, errors) in classes.items()}
+
+async def run(args, comlink_url: str) -> Dict[str, Any]:
+    os.environ["SWGOH_API_URL"] = comlink_url
+    os.environ["CPU_EXECUTOR"] = "inline"
+    os.environ.setdefault("PREWARM_ENABLED", "false")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    import main
+    from benchmarks.bench_mod_processor import StaticNames
+    main.character_names.db = StaticNames()
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        client = AsgiClient(main.app)
+        for index, mode in enumerate(args.modes):
+            results[mode] = await run_mode(main, client, comlink_url, mode, index, args)
+            print(f"{mode}")
+            print(f"  {'class':<11} {'requests':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+            for name, result in results[mode].items():
+                print(f"  {name:<11} {result['requests']:>8} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                      f"{result['p99_ms']:>9.2f} {result['errors']:>6}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--workers", type=int, default=2, help="thread / process pool size")
+    parser.add_argument("--large", type=int, default=40, help="large rosters requested per mode")
+    parser.add_argument("--large-units", type=int, default=500)
+    parser.add_argument("--large-concurrency", type=int, default=4)
+    parser.add_argument("--small-units", type=int, default=20)
+    parser.add_argument("--small-concurrency", type=int, default=8)
+    parser.add_argument("--think-time", type=float, default=0.005, help="pause between small requests, seconds")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake Comlink latency in seconds")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    port = free_port()
+    comlink = start_fake_comlink(port, args.latency, args.small_units, "--large-units", str(args.large_units))
+    try:
+        results = asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        comlink.terminate()
+        comlink.wait()
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "mixed_load", params, results)
+
+if __name__ == "__main__":
+    main()
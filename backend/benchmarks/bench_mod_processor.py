@@ -0,0 +1,63 @@
+"""
+Per-roster ModProcessor + EvaluationEngine time and peak memory
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_mod_processor --units 50 250 500
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_player
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine
+from services.mod_processor import ModProcessor
+
+class StaticNames:
+    """Stands in for the name lookup so only processing is measured"""
+
+    def get_all_localized_character_names(self):
+        return []
+
+    def get_all_character_names(self, character_ids, language='Loc_ENG_US'):
+        return {char_id: char_id.title() for char_id in character_ids}
+
+    async def get_all_character_names_async(self, character_ids, language='Loc_ENG_US'):
+        return self.get_all_character_names(character_ids, language)
+
+def process_roster(processor: ModProcessor, engine: EvaluationEngine, raw: dict) -> int:
+    processed = processor.process_player_data(raw, raw["allyCode"])
+    engine.calculate_roll_efficiency_batch(processed.mods)
+    return len(processed.mods)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[50, 250, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    engine = EvaluationEngine()
+
+    print(f"{'units':>6} {'mods':>6} {'best ms':>9} {'peak KiB':>9}")
+    for units in args.units:
+        raw = generate_player(units=units, seed=units)
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            mod_count = process_roster(processor, engine, raw)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        process_roster(processor, engine, raw)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{units:>6} {mod_count:>6} {best * 1000:>9.2f} {peak / 1024:>9.0f}")
+
+if __name__ == "__main__":
+    main()
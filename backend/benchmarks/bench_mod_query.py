@@ -0,0 +1,110 @@
+"""
+Mod query API: indexed queries against a linear scan of the roster
+
+Builds a RosterIndex over evaluated synthetic rosters and runs a set of
+typical filter / sort queries through it and through a plain scan over the
+decoded mods (what a client filtering the full response does). Every
+indexed result is checked against the scan. Reports the index build time
+and size, and the best time per query both ways.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_mod_query --units 250 500 --output results/mod_query.json
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import orjson
+
+from benchmarks.bench_formats import build_body
+from benchmarks.bench_mod_processor import StaticNames
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_index import RosterIndex
+from services.mod_processor import ModProcessor
+from services.roster_evaluator import RosterEvaluator
+
+SPEED = 5
+
+# name -> (RosterIndex.query kwargs, scan predicate, sort key for the scan, descending)
+QUERIES = {
+    "all_by_efficiency": ({}, lambda mod: True, lambda mod: mod["e"], True),
+    "speed_set_arrows": ({"equals": {"set": [4], "slot": [2]}},
+                         lambda mod: mod["d"][0] == "4" and mod["d"][2] == "2", lambda mod: mod["e"], True),
+    "speed_15_plus": ({"secondaries": [(SPEED, 15.0)], "sort": f"secondary:{SPEED}"},
+                      lambda mod: any(s["i"] == SPEED and s["v"] >= 15 for s in mod["s"]),
+                      lambda mod: next(s["v"] for s in mod["s"] if s["i"] == SPEED), True),
+    "six_dot_gold_80_plus": ({"equals": {"dots": [6], "tier": [5]}, "min_efficiency": 80.0},
+                             lambda mod: mod["d"][1] == "6" and mod["t"] == 5 and mod["e"] >= 80,
+                             lambda mod: mod["e"], True),
+    "crosses_offense_primary_by_level": ({"equals": {"slot": [6], "primary": [48]}, "sort": "level", "descending": False},
+                                         lambda mod: mod["d"][2] == "6" and mod["p"]["i"] == 48,
+                                         lambda mod: mod["l"], False)
+}
+
+def best_us(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1e6, 1)
+
+def scan(mods: List[Dict[str, Any]], predicate, sort_key, descending: bool) -> List[int]:
+    matching = [position for position, mod in enumerate(mods) if predicate(mod)]
+    # Stable, ties in roster order, like RosterIndex.query
+    return sorted(matching, key=lambda position: -sort_key(mods[position]) if descending else sort_key(mods[position]))
+
+def index_bytes(index: RosterIndex) -> int:
+    arrays = list(index.columns.values()) + list(index._secondaries.values())
+    arrays += [array for postings in index._postings.values() for array in postings.values()]
+    arrays += [array for pair in index._ranges.values() for array in pair]
+    return sum(array.nbytes for array in arrays)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[250, 500])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH))
+
+    results: Dict[str, Any] = {}
+    mismatches = 0
+    for units in args.units:
+        _, body = build_body(evaluator, processor, units)
+        mods = orjson.loads(body)["mods"]
+        encoded = [orjson.dumps(mod) for mod in mods]
+        build_ms = best_us(lambda: RosterIndex.from_encoded("v", encoded), 5) / 1000
+        index = RosterIndex.from_encoded("v", encoded)
+
+        name = f"units_{units}"
+        results[name] = {"mods": len(mods), "build_ms": round(build_ms, 2), "index_kib": index_bytes(index) // 1024}
+        print(f"{name}: {len(mods)} mods, index built in {build_ms:.2f} ms, {index_bytes(index) // 1024} KiB of arrays")
+        print(f"  {'query':<34} {'matches':>7} {'index us':>9} {'scan us':>9}")
+        for query_name, (kwargs, predicate, sort_key, descending) in QUERIES.items():
+            if list(index.query(**kwargs)) != scan(mods, predicate, sort_key, descending):
+                mismatches += 1
+                print(f"  MISMATCH: {query_name}")
+            matches = len(index.query(**kwargs))
+            indexed = best_us(lambda: index.page(index.query(**kwargs), 0, 50), args.repeat)
+            scanned = best_us(lambda: scan(mods, predicate, sort_key, descending)[:50], args.repeat)
+            results[name][query_name] = {"matches": matches, "index_us": indexed, "scan_us": scanned}
+            print(f"  {query_name:<34} {matches:>7} {indexed:>9.1f} {scanned:>9.1f}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "mod_query", params, results)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Loadout optimizer: search time on full rosters, optimality on small ones
+
+Runs LoadoutOptimizer over evaluated synthetic rosters for a few typical
+requests (a speed team with set and primary requirements, an offense build
+with minimum speed, a long priority list) and reports time, searched nodes
+and whether each search finished within the budget. Then checks every
+answer against an exhaustive search on random small rosters (a few mods
+per slot), which must find the same best score.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_optimizer --units 300 500 --output results/optimizer.json
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from benchmarks.bench_formats import build_body
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import CHARACTER_IDS
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.loadout_optimizer import SET_PIECES, SLOTS, LoadoutGoal, LoadoutOptimizer
+from services.mod_processor import ModProcessor
+from services.roster_evaluator import RosterEvaluator
+
+SPEED, OFFENSE, CRIT_CHANCE, HEALTH_PERCENT = 5, 41, 53, 55
+SPEED_SET, HEALTH_SET, OFFENSE_SET, CRIT_DAMAGE_SET = 4, 1, 2, 6
+
+def scenarios() -> Dict[str, List[LoadoutGoal]]:
+    speed_team = [LoadoutGoal(character, {SPEED: 1.0}, {SPEED_SET: 4, HEALTH_SET: 2}, {2: SPEED})
+                  for character in CHARACTER_IDS[:5]]
+    return {
+        "speed_team_5": speed_team,
+        "offense_min_speed": [LoadoutGoal(CHARACTER_IDS[0], {OFFENSE: 1.0}, {OFFENSE_SET: 4},
+                                          minimums={SPEED: 60, CRIT_CHANCE: 10})],
+        "mixed_weights_min_3": [LoadoutGoal(CHARACTER_IDS[1], {SPEED: 1.0, OFFENSE: 0.05, HEALTH_PERCENT: 2.0},
+                                            {CRIT_DAMAGE_SET: 4}, {4: 16}, {SPEED: 50, OFFENSE: 150, CRIT_CHANCE: 8})],
+        "priority_list_15": [LoadoutGoal(character, {SPEED: 1.0, OFFENSE: 0.02}, {SPEED_SET: 4})
+                             for character in CHARACTER_IDS[:15]]
+    }
+
+def exhaustive_score(optimizer: LoadoutOptimizer, goal: LoadoutGoal, available: List[int]) -> Optional[float]:
+    """Best score over every combination of one mod per slot (slots without mods stay empty)"""
+    per_slot = [[p for p in available if optimizer.slots[p] == slot and
+                 (slot not in goal.primaries or optimizer.mods[p]["p"]["i"] == goal.primaries[slot])] for slot in SLOTS]
+    if any(not per_slot[slot - 1] for slot in goal.primaries):
+        return None
+    per_slot = [positions for positions in per_slot if positions]
+    best = None
+    for combination in itertools.product(*per_slot):
+        set_counts: Dict[int, int] = {}
+        for p in combination:
+            set_counts[optimizer.set_ids[p]] = set_counts.get(optimizer.set_ids[p], 0) + 1
+        if any(set_counts.get(set_id, 0) < pieces for set_id, pieces in goal.sets.items()):
+            continue
+        if any(sum(optimizer.totals[p].get(stat_id, 0.0) for p in combination) < minimum
+               for stat_id, minimum in goal.minimums.items()):
+            continue
+        score = sum(optimizer._score(p, goal) for p in combination)
+        if best is None or score > best:
+            best = score
+    return best
+
+def check_optimality(mods: List[Dict[str, Any]], checks: int, per_slot: int, seed: int) -> int:
+    rng = random.Random(seed)
+    by_slot: Dict[int, List[Dict[str, Any]]] = {}
+    for mod in mods:
+        by_slot.setdefault(int(mod["d"][2]), []).append(mod)
+    mismatches = 0
+    for _ in range(checks):
+        sample = [mod for slot in SLOTS for mod in rng.sample(by_slot[slot], min(per_slot, len(by_slot[slot])))]
+        optimizer = LoadoutOptimizer(sample)
+        sets = rng.choice([{}, {SPEED_SET: 4}, {HEALTH_SET: 2}, {SPEED_SET: 4, HEALTH_SET: 2}, {OFFENSE_SET: 4}])
+        minimums = rng.choice([{}, {SPEED: rng.uniform(10, 60)}, {OFFENSE: rng.uniform(50, 300), SPEED: rng.uniform(5, 40)}])
+        # {1: SPEED}: squares only roll offense primaries, so no loadout can meet it
+        primaries = rng.choice([{}, {2: SPEED}, {4: 16}, {4: 49}, {1: SPEED}])
+        goal = LoadoutGoal("X", {SPEED: 1.0, OFFENSE: rng.choice([0.0, 0.05])}, sets, primaries, minimums)
+        result = optimizer.optimize([goal], time_budget=60.0)["loadouts"][0]
+        expected = exhaustive_score(optimizer, goal, list(range(len(sample))))
+        found = result["score"] if result["feasible"] else None
+        if (expected is None) != (found is None) or (expected is not None and abs(expected - found) > 1e-3):
+            mismatches += 1
+            print(f"  MISMATCH: optimizer {found}, exhaustive {expected} for {goal.to_dict()}")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[300, 500])
+    parser.add_argument("--budget", type=float, default=5.0, help="time budget per request, seconds")
+    parser.add_argument("--checks", type=int, default=30, help="small rosters checked against exhaustive search")
+    parser.add_argument("--per-slot", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH))
+
+    results: Dict[str, Any] = {}
+    mods = []
+    for units in args.units:
+        _, body = build_body(evaluator, processor, units)
+        mods = orjson.loads(body)["mods"]
+        name = f"units_{units}"
+        results[name] = {"mods": len(mods)}
+        print(f"{name}: {len(mods)} mods")
+        print(f"  {'request':<22} {'ms':>8} {'nodes':>9} {'candidates':>11} {'complete':>9} {'feasible':>9}")
+        for scenario, goals in scenarios().items():
+            start = time.perf_counter()
+            optimizer = LoadoutOptimizer.from_body(body)
+            result = optimizer.optimize(goals, time_budget=args.budget)
+            elapsed = (time.perf_counter() - start) * 1000
+            candidates = sum(loadout["candidates"] for loadout in result["loadouts"])
+            feasible = sum(loadout["feasible"] for loadout in result["loadouts"])
+            results[name][scenario] = {"ms": round(elapsed, 1), "nodes": result["nodes"], "candidates": candidates,
+                                       "complete": result["complete"], "feasible": feasible}
+            print(f"  {scenario:<22} {elapsed:>8.1f} {result['nodes']:>9} {candidates:>11} "
+                  f"{str(result['complete']):>9} {feasible:>5}/{len(goals)}")
+
+    mismatches = check_optimality(mods, args.checks, args.per_slot, seed=1)
+    print(f"{args.checks} small rosters ({args.per_slot} mods per slot) checked against exhaustive search, "
+          f"{mismatches} mismatches")
+    results["optimality_mismatches"] = mismatches
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "optimizer", params, results)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+End-to-end /api/player throughput and latency against a fake Comlink server
+
+Starts benchmarks.fake_comlink in its own process (serving synthetic rosters)
+and drives the app in-process through its ASGI interface, so every request
+goes through routing, the Comlink client, processing, caching and
+streaming. With --url an already running server is benchmarked over HTTP
+instead; it must be pointed at the same fake Comlink (--comlink-port).
+
+Each concurrency level runs four scenarios on its own set of ally codes:
+    cold          never seen: Comlink fetch and full evaluation
+    refresh       cache cleared, snapshot kept: Comlink fetch, unchanged mods reused
+    warm          cache hits
+    not_modified  cache hits with a matching If-None-Match (304)
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_player_endpoint --concurrency 1 10 50 --output results/player.json
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+class AsgiClient:
+    """Calls an ASGI app directly; no HTTP server or socket in between"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+            "client": ("127.0.0.1", 0), "server": ("benchmark", 80)
+        }
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Never disconnects; the app cancels this wait once the response is done
+            await asyncio.Event().wait()
+
+        status = 0
+        response_headers: Dict[str, str] = {}
+        body: List[bytes] = []
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, response_headers, b"".join(body)
+
+class HttpClient:
+    """Benchmarks a server that is already running"""
+
+    def __init__(self, url: str, concurrency: int):
+        import aiohttp
+        self.url = url.rstrip("/")
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency))
+
+    async def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        async with self.session.request(method, self.url + path, headers=headers) as response:
+            return response.status, {k.lower(): v for k, v in response.headers.items()}, await response.read()
+
+    async def close(self) -> None:
+        await self.session.close()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_fake_comlink(port: int, latency: float, units: int, *extra_args: str) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_comlink", "--port", str(port),
+         "--latency", str(latency), "--units", str(units), *extra_args],
+        cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Fake Comlink server did not start")
+
+async def prime_comlink(comlink_url: str, ally_codes: List[str]) -> None:
+    """Have the fake server build every roster up front, so cold requests don't time roster generation"""
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        for ally_code in ally_codes:
+            async with session.post(f"{comlink_url}/player", json={"payload": {"allyCode": ally_code}}) as response:
+                await response.read()
+
+def summarize(latencies: List[float], elapsed: float, sizes: List[int], errors: int) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "mean_kib": round(statistics.mean(sizes) / 1024, 1) if sizes else 0.0
+    }
+
+async def run_scenario(client, ally_codes: List[str], requests: int, concurrency: int,
+                       etags: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    expected_status = 304 if etags else 200
+
+    async def one(n: int):
+        nonlocal errors
+        ally_code = ally_codes[n % len(ally_codes)]
+        headers = {"If-None-Match": etags[ally_code]} if etags else None
+        async with semaphore:
+            start = time.perf_counter()
+            status, response_headers, body = await client.request("GET", f"/api/player/{ally_code}", headers)
+            latencies.append(time.perf_counter() - start)
+        if status != expected_status:
+            errors += 1
+        sizes.append(len(body))
+        if etags is None and "etag" in response_headers:
+            collected_etags[ally_code] = response_headers["etag"]
+
+    collected_etags: Dict[str, str] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*[one(n) for n in range(requests)])
+    result = summarize(latencies, time.perf_counter() - start, sizes, errors)
+    result["_etags"] = collected_etags
+    return result
+
+async def run_level(client, comlink_url: str, level_index: int, concurrency: int, players: int,
+                    requests: int) -> Dict[str, Any]:
+    ally_codes = [f"{200000000 + level_index * 100000 + n}" for n in range(players)]
+    await prime_comlink(comlink_url, ally_codes)
+    scenarios = {}
+    scenarios["cold"] = await run_scenario(client, ally_codes, players, concurrency)
+    await client.request("DELETE", "/api/cache")
+    scenarios["refresh"] = await run_scenario(client, ally_codes, players, concurrency)
+    scenarios["warm"] = await run_scenario(client, ally_codes, requests, concurrency)
+    etags = scenarios["warm"]["_etags"]
+    scenarios["not_modified"] = await run_scenario(client, ally_codes, requests, concurrency, etags=etags)
+    for result in scenarios.values():
+        result.pop("_etags")
+    return scenarios
+
+async def run_in_process(args, comlink_url: str) -> Dict[str, Any]:
+    # Configure the app before main reads its settings
+    os.environ["SWGOH_API_URL"] = comlink_url
+    os.environ.setdefault("PREWARM_ENABLED", "false")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    import main
+    from benchmarks.bench_mod_processor import StaticNames
+    main.character_names.db = StaticNames()
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        client = AsgiClient(main.app)
+        for index, concurrency in enumerate(args.concurrency):
+            results[f"concurrency_{concurrency}"] = await run_level(
+                client, comlink_url, index, concurrency, args.players, args.requests)
+            print_level(concurrency, results[f"concurrency_{concurrency}"])
+        cache_stats = main.cache_manager.get_cache_stats()
+
+    results["memory"] = {
+        "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "cache_resident_mib": round(cache_stats["resident_bytes"] / 1048576, 1),
+        "cache_entries": cache_stats["total_items"]
+    }
+    return results
+
+async def run_over_http(args, comlink_url: str) -> Dict[str, Any]:
+    results = {}
+    for index, concurrency in enumerate(args.concurrency):
+        client = HttpClient(args.url, concurrency)
+        try:
+            results[f"concurrency_{concurrency}"] = await run_level(
+                client, comlink_url, index, concurrency, args.players, args.requests)
+        finally:
+            await client.close()
+        print_level(concurrency, results[f"concurrency_{concurrency}"])
+    return results
+
+def print_level(concurrency: int, scenarios: Dict[str, Any]) -> None:
+    print(f"concurrency {concurrency}")
+    print(f"  {'scenario':<13} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'KiB':>7} {'errors':>6}")
+    for name, result in scenarios.items():
+        print(f"  {name:<13} {result['req_per_s']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f} {result['mean_kib']:>7.1f} {result['errors']:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--players", type=int, default=50, help="distinct ally codes per concurrency level")
+    parser.add_argument("--requests", type=int, default=500, help="requests per warm / not_modified scenario")
+    parser.add_argument("--units", type=int, default=250, help="units per synthetic roster")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Comlink latency in seconds")
+    parser.add_argument("--url", help="benchmark this running server instead of the app in-process")
+    parser.add_argument("--comlink-port", type=int, default=0, help="fake Comlink port (default: any free port)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    port = args.comlink_port or free_port()
+    comlink = start_fake_comlink(port, args.latency, args.units)
+    print(f"Fake Comlink on port {port}: {args.units} units per roster, latency {args.latency * 1000:.0f} ms")
+    comlink_url = f"http://127.0.0.1:{port}"
+    try:
+        if args.url:
+            results = asyncio.run(run_over_http(args, comlink_url))
+        else:
+            results = asyncio.run(run_in_process(args, comlink_url))
+            print(f"max RSS {results['memory']['max_rss_mib']} MiB, "
+                  f"cache {results['memory']['cache_resident_mib']} MiB in {results['memory']['cache_entries']} entries")
+    finally:
+        comlink.terminate()
+        comlink.wait()
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key not in ("output", "comlink_port")}
+        params["mode"] = "http" if args.url else "in-process"
+        save_results(args.output, "player_endpoint", params, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Per-stage time and memory of building one /api/player response
+
+Runs the stages of main.produce_player_response one by one on synthetic
+rosters: JSON decode of the Comlink body, the snapshot diff (full and
+against an unchanged snapshot), mod processing, efficiency, upgrade
+projections, workflow verdicts, collectionStats and serialization. Each stage reports its best and median time and its
+tracemalloc peak; the retained size of the roster snapshot is reported too.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_stages --units 50 250 500 --output results/stages.json
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+import orjson
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import generate_player
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+from services.roster_evaluator import RosterEvaluator, build_minimal_mod
+from services.upgrade_simulator import UpgradeSimulator
+from services.roster_snapshots import RosterSnapshot, apply_evaluations, diff_roster, patched_collection_stats
+
+def time_stage(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(samples) * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+def bench_roster(units: int, repeat: int) -> Dict[str, Any]:
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    engine = EvaluationEngine()
+    workflows = load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH)
+    workflow_keys = workflows.workflow_keys if workflows is not None else []
+    result_codes = workflows.result_codes if workflows is not None else []
+
+    body = json.dumps(generate_player(units=units, seed=units)).encode()
+    raw = json.loads(body)
+
+    simulator = UpgradeSimulator()
+    evaluator = RosterEvaluator(processor, engine, workflows, simulator)
+
+    # Inputs for each stage come from running the previous stage once
+    diff = diff_roster(processor, raw, None)
+    items = diff.changed_items
+    records = [processor.process_single_mod(*item) for item in items]
+    batch = engine.calculate_roll_efficiency_batch(records)
+    efficiency = batch.to_mod_results()
+    projections = simulator.project(records, batch).to_mod_results()
+    verdicts = [workflows.evaluate(record) if workflows is not None else None for record in records]
+    apply_evaluations(diff, evaluator.evaluate(items))
+
+    def serialize():
+        return b",".join(
+            orjson.dumps(build_minimal_mod(record, efficiency_data, mod_verdicts, projection))
+            for record, efficiency_data, mod_verdicts, projection in zip(records, efficiency, verdicts, projections)
+        )
+
+    snapshot = RosterSnapshot("0" * 16, None, raw.get("name", ""), "", diff.mods,
+                              patched_collection_stats(diff, workflow_keys, result_codes),
+                              diff.changed_ids, [])
+
+    stages = OrderedDict()
+    stages["comlink_decode"] = time_stage(lambda: json.loads(body), repeat)
+    stages["snapshot_diff"] = time_stage(lambda: diff_roster(processor, raw, None), repeat)
+    stages["snapshot_diff_unchanged"] = time_stage(lambda: diff_roster(processor, raw, snapshot), repeat)
+    stages["mod_processing"] = time_stage(lambda: [processor.process_single_mod(*item) for item in items], repeat)
+    stages["efficiency"] = time_stage(
+        lambda: engine.calculate_roll_efficiency_batch(records).to_mod_results(), repeat)
+    stages["upgrade_projection"] = time_stage(lambda: simulator.project(records, batch).to_mod_results(), repeat)
+    if workflows is not None:
+        # Verdicts are memoized per feature tuple, so this is the steady state of a warm server
+        stages["workflow_verdicts"] = time_stage(lambda: [workflows.evaluate(record) for record in records], repeat)
+    stages["collection_stats"] = time_stage(lambda: patched_collection_stats(diff, workflow_keys, result_codes), repeat)
+    stages["serialization"] = time_stage(serialize, repeat)
+    stages["roster_evaluator"] = time_stage(lambda: evaluator.evaluate(items), repeat)
+
+    # What one player's snapshot keeps alive between refreshes
+    tracemalloc.start()
+    retained = diff_roster(processor, raw, None)
+    apply_evaluations(retained, evaluator.evaluate(retained.changed_items))
+    snapshot_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mods": len(records),
+        "comlink_body_kib": round(len(body) / 1024, 1),
+        "response_mods_kib": round(len(serialize()) / 1024, 1),
+        "snapshot_kib": round(snapshot_bytes / 1024, 1),
+        "stages": stages
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[50, 250, 500])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    results = {}
+    for units in args.units:
+        result = results[f"units_{units}"] = bench_roster(units, args.repeat)
+        print(f"{units} units, {result['mods']} mods, Comlink body {result['comlink_body_kib']} KiB, "
+              f"snapshot {result['snapshot_kib']} KiB")
+        print(f"  {'stage':<26} {'best ms':>9} {'median ms':>10} {'peak KiB':>9}")
+        for stage, timing in result["stages"].items():
+            print(f"  {stage:<26} {timing['best_ms']:>9.2f} {timing['median_ms']:>10.2f} {timing['peak_kib']:>9.0f}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        save_results(args.output, "stages", {"units": args.units, "repeat": args.repeat}, results)
+
+if __name__ == "__main__":
+    main()
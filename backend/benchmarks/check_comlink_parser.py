@@ -0,0 +1,143 @@
+"""
+Parity and cost of the streaming Comlink player parser against a full json parse
+
+Every synthetic player body is parsed both ways (the stream fed in chunks of
+several sizes, down to a few bytes) and the processed mods, signatures and
+player fields are compared. Then both paths are timed and their peak memory
+measured with tracemalloc, along with the longest single feed() call: the
+longest the event loop is blocked when the body arrives in 64 KiB reads.
+
+Usage (from the backend directory):
+    python -m benchmarks.check_comlink_parser --units 250 500 --output results/comlink_parser.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import generate_player
+from services.character_names import CharacterNameIndex
+from services.comlink_stream import PlayerModParser
+from services.mod_processor import ModProcessor
+
+CHUNK_BYTES = 65536
+
+def fields(record: Any) -> Any:
+    """A record and the records it holds as nested tuples, for comparison"""
+    if isinstance(record, list):
+        return tuple(fields(item) for item in record)
+    if hasattr(record, "__slots__"):
+        return tuple(fields(getattr(record, name)) for name in record.__slots__)
+    return record
+
+def digest(processor: ModProcessor, raw: Dict[str, Any]) -> tuple:
+    """Everything the app derives from a player response"""
+    mods = []
+    for item in processor.iter_roster_mods(raw):
+        record = processor.process_single_mod(*item)
+        mods.append((processor.mod_signature(*item), fields(record)))
+    return raw.get("name"), raw.get("allyCode"), raw.get("playerId"), mods
+
+def feed_chunks(body: bytes, sizes: Callable[[], int]) -> Dict[str, Any]:
+    parser = PlayerModParser()
+    offset = 0
+    while offset < len(body):
+        size = sizes()
+        parser.feed(body[offset:offset + size])
+        offset += size
+    return parser.close()
+
+def edge_cases() -> List[Dict[str, Any]]:
+    player = generate_player(units=3, seed=7)
+    player["name"] = "Dark Étoile ★ \"quoted\""
+    player["rosterUnit"].append({"definitionId": "NO_MODS:SEVEN_STAR", "equippedStatMod": []})
+    player["rosterUnit"].append({"definitionId": "MISSING_MODS:SEVEN_STAR"})
+    return [player, {"name": "Empty", "allyCode": "123456789", "rosterUnit": []}, {"allyCode": "123456789"}]
+
+def check_parity(processor: ModProcessor, bodies: List[bytes]) -> int:
+    mismatches = 0
+    for index, body in enumerate(bodies):
+        expected = digest(processor, json.loads(body))
+        rng = random.Random(index)
+        for label, sizes in (("whole", lambda: len(body)), ("64k", lambda: CHUNK_BYTES),
+                             ("1000", lambda: 1000), ("1-50", lambda: rng.randint(1, 50))):
+            if digest(processor, feed_chunks(body, sizes)) != expected:
+                mismatches += 1
+                print(f"  MISMATCH body {index} with {label} byte chunks")
+    return mismatches
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"best_ms": round(min(times) * 1000, 2), "peak_kib": peak // 1024, "retained_kib": retained // 1024}
+
+def longest_feed(body: bytes) -> float:
+    parser = PlayerModParser()
+    longest = 0.0
+    for offset in range(0, len(body), CHUNK_BYTES):
+        start = time.perf_counter()
+        parser.feed(body[offset:offset + CHUNK_BYTES])
+        longest = max(longest, time.perf_counter() - start)
+    start = time.perf_counter()
+    parser.close()
+    return max(longest, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--units", type=int, nargs="+", default=[250, 500])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+
+    bodies = [json.dumps(player).encode() for player in edge_cases()]
+    for units in args.units:
+        for full_fields in (False, True):
+            player = generate_player(units=units, seed=units, full_fields=full_fields)
+            bodies.append(json.dumps(player).encode())
+            bodies.append(json.dumps(player, separators=(",", ":"), ensure_ascii=False).encode())
+    mismatches = check_parity(processor, bodies)
+    print(f"parity: {len(bodies)} bodies, {mismatches} mismatches")
+
+    results: Dict[str, Any] = {"parity": {"bodies": len(bodies), "mismatches": mismatches}}
+    print(f"{'payload':<22} {'KiB':>6} {'parser':<7} {'best ms':>8} {'peak KiB':>9} {'kept KiB':>9} {'max block ms':>13}")
+    for units in args.units:
+        for full_fields in (False, True):
+            player = generate_player(units=units, seed=units, full_fields=full_fields)
+            body = json.dumps(player, separators=(",", ":")).encode()
+            del player
+            name = f"units_{units}" + ("_full" if full_fields else "")
+            full_parse = measure(lambda: json.loads(body), args.repeat)
+            full_parse["max_block_ms"] = full_parse["best_ms"]
+            stream = measure(lambda: feed_chunks(body, lambda: CHUNK_BYTES), args.repeat)
+            stream["max_block_ms"] = round(min(longest_feed(body) for _ in range(args.repeat)) * 1000, 2)
+            results[name] = {"body_kib": len(body) // 1024, "json": full_parse, "stream": stream}
+            for label, result in (("json", full_parse), ("stream", stream)):
+                print(f"{name:<22} {len(body) // 1024:>6} {label:<7} {result['best_ms']:>8.2f} {result['peak_kib']:>9} "
+                      f"{result['retained_kib']:>9} {result['max_block_ms']:>13.2f}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "comlink_parser", params, results)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
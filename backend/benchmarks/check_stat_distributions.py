@@ -0,0 +1,155 @@
+"""
+StatDistributions against exact percentiles, with sketches merged across workers
+
+Evaluates many synthetic players and feeds each roster to one of several
+StatDistributions sharing a SQLite file (as uvicorn workers would), each
+persisting a few times along the way. A fresh instance on the same file
+then answers for every sketch key; its quantiles and ranks must be within
+the tolerance of the exact ones computed from all values. Also reports the
+time to sample a roster, persist and query, and the memory kept.
+
+Usage (from the backend directory):
+    python -m benchmarks.check_stat_distributions --players 200 --workers 3 --output results/stat_distributions.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import generate_player
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+from services.roster_evaluator import RosterEvaluator
+from services.stat_distributions import StatDistributions, samples_from_encoded
+
+# Allowed rank error, as a share of the values (the sketch's is around 1 / k)
+TOLERANCE = 0.02
+FRACTIONS = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+def exact_rank(values: np.ndarray, value: float) -> float:
+    return float(np.searchsorted(values, value, side="right")) / len(values)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--units", type=int, default=80, help="characters per synthetic player")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--persists", type=int, default=4, help="persists per worker over the run")
+    parser.add_argument("--k", type=int, default=200)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    evaluator = RosterEvaluator(processor, EvaluationEngine(), load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH))
+    rosters = []
+    for player in range(args.players):
+        raw = generate_player(f"{100000000 + player}", units=args.units, seed=player)
+        items = list(processor.iter_roster_mods(raw))
+        rosters.append([evaluation[3] for evaluation in evaluator.evaluate(items) if evaluation is not None])
+
+    exact: Dict[Any, List[float]] = defaultdict(list)
+    sample_seconds, add_seconds, persist_seconds = [], [], []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stat_sketches.sqlite3")
+        workers = [StatDistributions(path, k=args.k) for _ in range(args.workers)]
+        persist_every = max(1, args.players // (args.workers * args.persists))
+        for player, encoded in enumerate(rosters):
+            worker = workers[player % args.workers]
+            start = time.perf_counter()
+            samples = samples_from_encoded(encoded)
+            sample_seconds.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            worker.add(f"{100000000 + player}", samples)
+            add_seconds.append(time.perf_counter() - start)
+            for key, values in samples.items():
+                exact[key].extend(values)
+            if (player // args.workers) % persist_every == persist_every - 1:
+                start = time.perf_counter()
+                worker.persist()
+                persist_seconds.append(time.perf_counter() - start)
+        # A roster already sampled by one worker isn't sampled again by another after a persist
+        for worker in workers:
+            worker.close()
+        reader = StatDistributions(path, k=args.k)
+        reader.persist()
+        resampled = StatDistributions(path, k=args.k)
+        resampled.persist()
+        duplicate_skipped = not resampled.add("100000000", samples_from_encoded(rosters[0]))
+        stats = reader.get_stats()
+        file_kib = os.path.getsize(path) // 1024
+
+        worst = 0.0
+        failures = 0
+        count_mismatches = 0
+        for key, values in exact.items():
+            values = np.sort(np.asarray(values, dtype=np.float64))
+            sketch = reader.sketch(key[0], key[1], [key[2]], [key[3]])
+            if sketch.count != len(values):
+                count_mismatches += 1
+            for fraction, estimate in zip(FRACTIONS, sketch.quantiles(list(FRACTIONS))):
+                # Ties make a value's rank a range; the estimate is right if the fraction falls in it
+                low = float(np.searchsorted(values, estimate, side="left")) / len(values)
+                high = exact_rank(values, estimate)
+                error = max(0.0, low - fraction, fraction - high)
+                worst = max(worst, error)
+                failures += error > TOLERANCE
+            for probe in np.quantile(values, FRACTIONS):
+                error = abs(sketch.rank(probe) - exact_rank(values, probe))
+                worst = max(worst, error)
+                failures += error > TOLERANCE
+
+        start = time.perf_counter()
+        for _ in range(20):
+            reader.percentiles("mod", 5, None, [5, 6], value=15.0)
+        query_ms = (time.perf_counter() - start) / 20 * 1000
+        start = time.perf_counter()
+        reader.rank_roster(samples_from_encoded(rosters[0]))
+        rank_ms = (time.perf_counter() - start) * 1000
+        reader.close()
+        resampled.close()
+
+    mods = sum(len(encoded) for encoded in rosters)
+    results = {
+        "mods": mods,
+        "values": sum(len(values) for values in exact.values()),
+        "sketches": stats["sketches"],
+        "retained_values": stats["retained_values"],
+        "file_kib": file_kib,
+        "sample_ms": round(np.median(sample_seconds) * 1000, 2),
+        "add_ms": round(np.median(add_seconds) * 1000, 2),
+        "persist_ms": round(np.median(persist_seconds) * 1000, 1) if persist_seconds else None,
+        "query_ms": round(query_ms, 2),
+        "rank_roster_ms": round(rank_ms, 1),
+        "worst_rank_error": round(worst, 4),
+        "failures": failures,
+        "count_mismatches": count_mismatches,
+        "duplicate_skipped": duplicate_skipped
+    }
+    print(f"{args.players} players ({mods} mods, {results['values']} values) over {args.workers} workers, k={args.k}")
+    print(f"  {results['sketches']} sketches keep {results['retained_values']} values, {file_kib} KiB on disk")
+    print(f"  per roster: samples {results['sample_ms']} ms, sketch {results['add_ms']} ms; "
+          f"persist {results['persist_ms']} ms; percentiles query {results['query_ms']} ms; "
+          f"rank a roster {results['rank_roster_ms']} ms")
+    print(f"  worst rank error {worst:.2%}, {failures} over {TOLERANCE:.0%}, {count_mismatches} count mismatches, "
+          f"roster sampled by another worker skipped: {duplicate_skipped}")
+
+    if args.output:
+        from benchmarks.results import save_results
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        save_results(args.output, "stat_distributions", params, results)
+    if failures or count_mismatches or not duplicate_skipped:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+UpgradeSimulator against a brute-force Monte Carlo of levelling and slicing
+
+Generates synthetic mods, hides the secondaries a mod of that tier and level
+wouldn't have revealed yet (so new stats get added, not only increased), and
+plays every plan out many times with the game rules, one roll at a time. The
+exact expected speed and efficiency must fall within the Monte Carlo's
+sampling error. Also times UpgradeSimulator.project on a whole roster.
+
+Usage (from the backend directory):
+    python -m benchmarks.check_upgrade_simulator --mods 300 --trials 2000
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import SECONDARY_BOUNDS, generate_mod, generate_player
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine
+from services.mod_processor import ModProcessor
+from services.upgrade_simulator import (MAX_LEVEL, MAX_SECONDARIES, MAX_STAT_ROLLS, MAX_TIER, ROLL_LEVELS,
+                                        SPEED_ROLL_SCALE, SPEED_STAT_ID, UpgradeSimulator)
+
+# The synthetic mods use 5-dot bounds throughout; a speed stat added to a 4-dot mod rolls 2-5
+NEW_SPEED_BOUNDS = {4: (200000, 500000)}
+# Allowed distance between the exact and simulated means, in standard errors
+TOLERANCE = 4.5
+
+def hide_unrevealed(mod: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the secondaries a mod of this tier and level shows: tier - 1, plus one per roll level reached"""
+    revealed = min(MAX_SECONDARIES, mod["tier"] - 1 + sum(mod["level"] >= level for level in ROLL_LEVELS))
+    mod["secondaryStat"] = mod["secondaryStat"][:revealed]
+    return mod
+
+def roll_efficiency(value: int, low: int, high: int) -> float:
+    return (value - low + 1) / (high - low + 1) * 100
+
+def play(record, events: int, rng: random.Random) -> Tuple[float, float]:
+    """One playthrough: final secondary speed and efficiency"""
+    stats = []
+    for stat in record.secondaryStats:
+        low, high = int(stat.statRollerBoundsMin), int(stat.statRollerBoundsMax)
+        stats.append([stat.unitStatId, low, high, [roll_efficiency(int(v), low, high) for v in stat.unscaledRollValue],
+                      stat.rolls, stat.value if stat.unitStatId == SPEED_STAT_ID else 0.0])
+    for _ in range(events):
+        if len(stats) < MAX_SECONDARIES:
+            present = {stat[0] for stat in stats} | {record.primaryStat.unitStatId}
+            stat_id = rng.choice([s for s in SECONDARY_BOUNDS if s not in present])
+            low, high = SECONDARY_BOUNDS[stat_id]
+            if stat_id == SPEED_STAT_ID:
+                low, high = NEW_SPEED_BOUNDS.get(record.dots, (low, high))
+            stats.append([stat_id, low, high, [], 0, 0.0])
+            target = stats[-1]
+        else:
+            eligible = [stat for stat in stats if stat[4] < MAX_STAT_ROLLS]
+            if not eligible:
+                continue
+            target = rng.choice(eligible)
+        value = rng.randint(target[1], target[2])
+        target[3].append(roll_efficiency(value, target[1], target[2]))
+        target[4] += 1
+        if target[0] == SPEED_STAT_ID:
+            target[5] += value * SPEED_ROLL_SCALE
+    efficiency = sum(sum(stat[3]) / len(stat[3]) if stat[3] else 0.0 for stat in stats) / len(stats) if stats else 0.0
+    return sum(stat[5] for stat in stats), efficiency
+
+def mean_and_error(values: List[float]) -> Tuple[float, float]:
+    mean = sum(values) / len(values)
+    variance = sum((v - mean) ** 2 for v in values) / max(1, len(values) - 1)
+    return mean, (variance / len(values)) ** 0.5
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mods", type=int, default=300)
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--units", type=int, default=500, help="roster size for the timing")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    engine = EvaluationEngine()
+    simulator = UpgradeSimulator()
+
+    # Mostly mods that still have something to gain
+    records = []
+    while len(records) < args.mods:
+        raw = generate_mod(rng, f"mod-{len(records)}", rng.randint(1, 6), tier_weights=(0.25, 0.2, 0.2, 0.2, 0.15))
+        if rng.random() < 0.7 and raw["level"] == MAX_LEVEL:
+            raw["level"] = rng.randint(1, MAX_LEVEL - 1)
+        record = processor.process_single_mod(hide_unrevealed(raw), "HERMITYODA", "Hermit Yoda")
+        if record is not None:
+            records.append(record)
+
+    projection = simulator.project(records, engine.calculate_roll_efficiency_batch(records))
+    plans = {"lv": (projection.level_speed, projection.level_efficiency),
+             "sl": (projection.slice_speed, projection.slice_efficiency)}
+    checked = failures = 0
+    worst = 0.0
+    for index, record in enumerate(records):
+        level_events = sum(record.level < level for level in ROLL_LEVELS)
+        slice_events = MAX_TIER - record.tier if record.dots >= 5 else 0
+        for plan, events in (("lv", level_events), ("sl", level_events + slice_events)):
+            speed, efficiency = plans[plan][0][index], plans[plan][1][index]
+            if speed != speed:
+                continue
+            outcomes = [play(record, events, rng) for _ in range(args.trials)]
+            for label, exact, values in (("speed", speed, [o[0] for o in outcomes]),
+                                         ("efficiency", efficiency, [o[1] for o in outcomes])):
+                simulated, error = mean_and_error(values)
+                distance = abs(exact - simulated) / max(error, 1e-9) if abs(exact - simulated) > 1e-9 else 0.0
+                worst = max(worst, distance)
+                checked += 1
+                if distance > TOLERANCE:
+                    failures += 1
+                    print(f"  MISMATCH {record.id} {plan} {label}: exact {exact:.3f}, simulated {simulated:.3f} +- {error:.3f}")
+    print(f"{checked} expectations checked against {args.trials} playthroughs each, "
+          f"worst {worst:.2f} standard errors, {failures} outside {TOLERANCE}")
+
+    raw = generate_player(units=args.units, seed=args.seed)
+    roster = [r for r in (processor.process_single_mod(*item) for item in processor.iter_roster_mods(raw)) if r]
+    batch = engine.calculate_roll_efficiency_batch(roster)
+    best = float("inf")
+    for _ in range(10):
+        start = time.perf_counter()
+        simulator.project(roster, batch).to_mod_results()
+        best = min(best, time.perf_counter() - start)
+    print(f"Projected a {len(roster)} mod roster in {best * 1000:.1f} ms")
+
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Parity of the server-side WorkflowEngine with src/utils/workflowEvaluator.js
+
+Runs the same mods through the real JS evaluator (needs `node` on PATH) and
+through WorkflowEngine, and compares verdict and display text for every
+workflow. Also times both evaluators. With --record, the mods and the JS
+verdicts are written as the fixture tests/test_workflow_parity.py checks
+against without node; re-record whenever either side of the JS changes.
+
+Usage (from the backend directory):
+    python -m benchmarks.check_workflow_parity --mods 20000
+    python -m benchmarks.check_workflow_parity --mods 600 --record tests/fixtures/workflow_parity.json
+"""
+import hashlib
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_mod_processor import StaticNames
+from benchmarks.synthetic import generate_mod
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import WorkflowEngine
+from services.mod_processor import ModProcessor
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src")
+
+# Reads mods JSON from argv[2], prints {workflow: [[verdict, text], ...]} and the elapsed ms
+JS_RUNNER = """
+import { readFileSync } from 'fs';
+import { evaluateModWithWorkflow, getAvailableWorkflows } from './workflowEvaluator.mjs';
+const mods = JSON.parse(readFileSync(process.argv[2], 'utf8'));
+const out = {};
+const start = performance.now();
+for (const { key } of getAvailableWorkflows()) {
+  out[key] = mods.map(mod => { const r = evaluateModWithWorkflow(mod, key); return [r.verdict, r.text]; });
+}
+console.log(JSON.stringify({ results: out, ms: performance.now() - start }));
+"""
+
+def parity_mods(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Comlink mods spread over every dot/tier/level and around the speed thresholds"""
+    rng = random.Random(seed)
+    mods = []
+    for n in range(count):
+        mod = generate_mod(rng, f"mod-{n}", rng.randint(1, 6), six_dot_ratio=0.2, tier_weights=(1, 1, 1, 1, 1))
+        mod["definitionId"] = mod["definitionId"][0] + str(rng.randint(1, 6)) + mod["definitionId"][2]
+        mod["level"] = rng.choice([1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 15, 15])
+        mod["locked"] = rng.random() < 0.05
+        for stat in mod["secondaryStat"]:
+            if stat["stat"]["unitStatId"] == 5:
+                # Whole speeds and one-below values hit every `min` boundary
+                speed = rng.randint(0, 30) * 10000 - rng.choice([0, 0, 1])
+                stat["stat"]["statValueDecimal"] = str(max(speed, 0))
+        if mod["definitionId"][2] == "2" and rng.random() < 0.5:
+            mod["primaryStat"]["stat"]["unitStatId"] = 5
+        mods.append(mod)
+    return mods
+
+def source_digest(config_path: str) -> str:
+    """Hash of the JS config and evaluator the verdicts come from"""
+    digest = hashlib.sha256()
+    for path in (config_path, os.path.join(SRC_DIR, "utils", "workflowEvaluator.js")):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def run_js(mods: List[Dict[str, Any]], config_path: str) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(config_path, os.path.join(tmp, "evaluationWorkflows.mjs"))
+        with open(os.path.join(SRC_DIR, "utils", "workflowEvaluator.js"), encoding="utf-8") as f:
+            evaluator = f.read().replace("'../config/evaluationWorkflows'", "'./evaluationWorkflows.mjs'")
+        with open(os.path.join(tmp, "workflowEvaluator.mjs"), "w", encoding="utf-8") as f:
+            f.write(evaluator)
+        with open(os.path.join(tmp, "runner.mjs"), "w", encoding="utf-8") as f:
+            f.write(JS_RUNNER)
+        mods_path = os.path.join(tmp, "mods.json")
+        with open(mods_path, "w", encoding="utf-8") as f:
+            json.dump(mods, f)
+        completed = subprocess.run(["node", os.path.join(tmp, "runner.mjs"), mods_path],
+                                   capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mods", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--config", default=os.path.join(SRC_DIR, "config", "evaluationWorkflows.js"),
+                        help="workflow config to compare with (defaults to the frontend's)")
+    parser.add_argument("--record", help="also write the mods and JS verdicts to this fixture file")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    raw_mods = parity_mods(args.mods, args.seed)
+    processor = ModProcessor(name_index=CharacterNameIndex(StaticNames()))
+    records = [processor.process_single_mod(mod, "HERMITYODA:SEVEN_STAR", "Hermit Yoda") for mod in raw_mods]
+
+    start = time.perf_counter()
+    engine = WorkflowEngine.from_js_config(args.config)
+    compile_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    verdicts, counts = engine.evaluate_mods(records)
+    python_ms = (time.perf_counter() - start) * 1000
+
+    js = run_js(raw_mods, args.config)
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump({"source_sha256": source_digest(args.config), "mods": raw_mods, "verdicts": js["results"]},
+                      f, separators=(",", ":"))
+        print(f"Recorded {len(raw_mods)} mods and their JS verdicts to {args.record}")
+    mismatches = 0
+    for workflow_index, key in enumerate(engine.workflow_keys):
+        for mod, record, mod_verdicts, expected in zip(raw_mods, records, verdicts, js["results"][key]):
+            actual = engine.describe(mod_verdicts[workflow_index])
+            # Locked mods show "Locked" in the browser; the code is a plain keep
+            if actual["verdict"] != expected[0] or (not record.locked and actual["text"] != expected[1]):
+                mismatches += 1
+                if mismatches <= 10:
+                    print(f"MISMATCH {key} {mod['definitionId']} t{mod['tier']} l{mod['level']}: "
+                          f"js={expected} py={mod_verdicts[workflow_index]}")
+
+    print(f"{len(raw_mods)} mods x {len(engine.workflow_keys)} workflows: {mismatches} mismatches")
+    print(f"compile {compile_ms:.1f} ms, python {python_ms:.1f} ms, js {js['ms']:.1f} ms")
+    print(json.dumps(counts))
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+def default_player_payload(ally_code: str) -> Dict[str, Any]:
+    """Small but well-formed Comlink player response"""
+    return {
+        "name": f"Player {ally_code}",
+        "allyCode": ally_code,
+        "rosterUnit": [
+            {
+                "definitionId": "HERMITYODA:SEVEN_STAR",
+                "equippedStatMod": [
+                    {
+                        "id": f"{ally_code}-mod-1",
+                        "definitionId": "452",
+                        "level": 15,
+                        "tier": 5,
+                        "locked": False,
+                        "primaryStat": {"stat": {"unitStatId": 5, "statValueDecimal": "300000"}},
+                        "secondaryStat": [
+                            {
+                                "stat": {"unitStatId": 5, "statValueDecimal": "150000"},
+                                "statRolls": 4,
+                                "unscaledRollValue": ["30000", "50000", "40000", "30000"],
+                                "statRollerBoundsMin": "30000",
+                                "statRollerBoundsMax": "60000"
+                            }
+                        ]
+                    }
+                ]
+            }
+        ]
+    }
+
+def default_guild_payload(guild_id: str, members: int = 50) -> Dict[str, Any]:
+    """Comlink guild response whose members map to ally codes 100000001, 100000002, ..."""
+    return {
+        "guild": {
+            "profile": {"id": guild_id, "name": f"Guild {guild_id}", "memberCount": members},
+            "member": [
+                {"playerId": f"player-{100000001 + n}", "playerName": f"Player {100000001 + n}"}
+                for n in range(members)
+            ]
+        }
+    }
+
+class FakeComlinkServer:
+    """
+    Minimal stand-in for SWGOH Comlink's POST /player and /guild endpoints
+
+    Speaks just enough HTTP/1.1 (keep-alive, Content-Length bodies) for
+    SWGOHAPIClient. Each response is delayed by `latency` seconds without
+    blocking other connections, so throughput is bounded by the client.
+    With cache_payloads, each player is built and encoded once, so the server
+    costs next to nothing when it shares a machine with the benchmark.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        payload_factory: Optional[Callable[[str], Dict[str, Any]]] = None,
+        guild_factory: Optional[Callable[[str], Dict[str, Any]]] = None,
+        cache_payloads: bool = False
+    ):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.payload_factory = payload_factory or default_player_payload
+        self.guild_factory = guild_factory or default_guild_payload
+        self.cache_payloads = cache_payloads
+        self._encoded_players: Dict[str, bytes] = {}
+        self.request_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1] if " " in lines[0] else "/"
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                payload = json.loads(await reader.readexactly(length) or b"{}").get("payload", {})
+                self.request_count += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                if path.rstrip("/").endswith("/guild"):
+                    data = json.dumps(self.guild_factory(str(payload.get("guildId", "")))).encode()
+                else:
+                    ally_code = str(payload.get("allyCode") or payload.get("playerId", "").replace("player-", ""))
+                    data = self._encoded_players.get(ally_code)
+                    if data is None:
+                        player = self.payload_factory(ally_code)
+                        player.setdefault("playerId", f"player-{ally_code}")
+                        data = json.dumps(player).encode()
+                        if self.cache_payloads:
+                            self._encoded_players[ally_code] = data
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(data)}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Run the server on the current event loop until cancelled"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=512)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "FakeComlinkServer":
+        """Start the server on a background thread with its own event loop"""
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.serve())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                # Drop keep-alive connections the client never closed
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeComlinkServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a fake SWGOH Comlink server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2500)
+    parser.add_argument("--latency", type=float, default=0.05, help="response delay in seconds")
+    parser.add_argument("--units", type=int, default=0,
+                        help="serve synthetic rosters of this many units (seeded by ally code) instead of one mod")
+    parser.add_argument("--mods-per-unit", type=int, default=6)
+    parser.add_argument("--large-units", type=int, default=0,
+                        help="ally codes starting with 9 get rosters of this many units instead")
+    args = parser.parse_args()
+
+    payload_factory = None
+    if args.units:
+        from benchmarks.synthetic import generate_player
+
+        def payload_factory(ally_code: str) -> Dict[str, Any]:
+            units = args.large_units if args.large_units and ally_code.startswith("9") else args.units
+            return generate_player(ally_code, units=units, mods_per_unit=args.mods_per_unit)
+    server = FakeComlinkServer(latency=args.latency, host=args.host, port=args.port,
+                               payload_factory=payload_factory, cache_payloads=True)
+    print(f"Fake Comlink listening on {server.url}", flush=True)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
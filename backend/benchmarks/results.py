@@ -0,0 +1,101 @@
+"""
+Benchmark results as JSON, and a comparison of two result files
+
+Every benchmark that takes --output writes one file with the parameters it
+ran with, the machine/commit it ran on and its results, so runs before and
+after a change can be compared.
+
+Usage (from the backend directory):
+    python -m benchmarks.results before.json after.json
+"""
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+def git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if completed.returncode != 0:
+        return None
+    dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                           cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    return completed.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+def environment() -> Dict[str, Any]:
+    """Where a run happened, so results from different machines aren't compared blindly"""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def save_results(path: str, benchmark: str, params: Dict[str, Any], results: Dict[str, Any]) -> None:
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "params": params,
+        "results": results
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    print(f"Results written to {path}")
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def flatten(value: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Numeric leaves as ("a.b.c", value) pairs"""
+    if isinstance(value, dict):
+        for key in value:
+            yield from flatten(value[key], f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.0,
+                        help="only show metrics that changed by more than this many percent")
+    args = parser.parse_args()
+
+    before, after = load_results(args.before), load_results(args.after)
+    if before.get("benchmark") != after.get("benchmark"):
+        print(f"warning: comparing {before.get('benchmark')} with {after.get('benchmark')}")
+    if before.get("params") != after.get("params"):
+        print("warning: the runs used different parameters")
+    for label, document in (("before", before), ("after", after)):
+        env = document.get("environment", {})
+        print(f"{label:>6}: {env.get('commit')} on {env.get('platform')}, {env.get('timestamp')}")
+
+    old_values = dict(flatten(before.get("results", {})))
+    new_values = dict(flatten(after.get("results", {})))
+    print(f"{'metric':<56} {'before':>12} {'after':>12} {'change':>8}")
+    for name, new in new_values.items():
+        old = old_values.get(name)
+        if old is None:
+            print(f"{name:<56} {'-':>12} {new:>12.4g} {'new':>8}")
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        if abs(change) >= args.threshold:
+            print(f"{name:<56} {old:>12.4g} {new:>12.4g} {change:>+7.1f}%")
+    for name in old_values.keys() - new_values.keys():
+        print(f"{name:<56} {old_values[name]:>12.4g} {'-':>12} {'gone':>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import random
+from typing import Any, Dict, List, Optional, Sequence
+
+# unitStatId -> (statRollerBoundsMin, statRollerBoundsMax) for 5-dot secondaries
+SECONDARY_BOUNDS = {
+    1: (2142000, 4284000),   # Health
+    5: (300000, 600000),     # Speed
+    17: (1125, 2250),        # Potency %
+    18: (1125, 2250),        # Tenacity %
+    28: (4200000, 8400000),  # Protection
+    41: (2280000, 4560000),  # Offense
+    42: (800000, 1600000),   # Defense
+    48: (281, 563),          # Offense %
+    49: (850, 1700),         # Defense %
+    53: (1175, 2350),        # Critical Chance %
+    55: (563, 1125),         # Health %
+    56: (1125, 2250),        # Protection %
+}
+
+# slot -> possible primary stat ids
+SLOT_PRIMARIES = {
+    1: [48],                              # Square
+    2: [5, 1, 28, 41, 42, 55, 56, 53],    # Arrow
+    3: [49],                              # Diamond
+    4: [16, 53, 55, 56, 48, 49],          # Triangle
+    5: [55, 56],                          # Circle
+    6: [17, 18, 55, 56, 48, 49],          # Cross
+}
+
+CHARACTER_IDS = [
+    "HERMITYODA", "GRANDMASTERYODA", "DARTHVADER", "COMMANDERLUKESKYWALKER", "JEDIKNIGHTREVAN",
+    "DARTHREVAN", "SITHPALPATINE", "JEDIMASTERKENOBI", "SUPREMELEADERKYLOREN", "REYJEDITRAINING",
+    "GENERALSKYWALKER", "PADMEAMIDALA", "BOSSK", "MOFFGIDEONS3", "MAULS7", "GLREY", "LORDVADER",
+]
+
+def _roll_value(rng: random.Random, low: int, high: int, roll_skew: float) -> int:
+    # roll_skew > 1 biases rolls toward the low end, < 1 toward the high end
+    return low + int((high - low) * rng.random() ** roll_skew)
+
+def generate_mod(
+    rng: random.Random,
+    mod_id: str,
+    slot: int,
+    six_dot_ratio: float = 0.3,
+    tier_weights: Sequence[float] = (0.05, 0.1, 0.15, 0.2, 0.5),
+    roll_skew: float = 1.0,
+    full_fields: bool = False
+) -> Dict[str, Any]:
+    """One Comlink equippedStatMod entry (with full_fields, also the fields the evaluator ignores)"""
+    dots = 6 if rng.random() < six_dot_ratio else rng.choice([5, 5, 5, 4])
+    tier = rng.choices([1, 2, 3, 4, 5], weights=tier_weights)[0]
+    level = 15 if rng.random() < 0.9 else rng.randint(1, 14)
+    set_id = rng.randint(1, 8)
+    primary_id = rng.choice(SLOT_PRIMARIES[slot])
+
+    # Higher tiers start with more revealed secondaries; levelled mods carry more rolls
+    stat_ids = rng.sample([s for s in SECONDARY_BOUNDS if s != primary_id], 4)
+    extra_rolls = 4 if level == 15 else level // 3
+    rolls_per_stat = [1, 1, 1, 1]
+    for _ in range(extra_rolls):
+        rolls_per_stat[rng.randrange(4)] += 1
+
+    secondaries = []
+    for stat_id, roll_count in zip(stat_ids, rolls_per_stat):
+        low, high = SECONDARY_BOUNDS[stat_id]
+        rolls = [_roll_value(rng, low, high, roll_skew) for _ in range(roll_count)]
+        secondary = {
+            "stat": {"unitStatId": stat_id, "statValueDecimal": str(sum(rolls) // 10)},
+            "statRolls": roll_count,
+            "unscaledRollValue": [str(r) for r in rolls],
+            "statRollerBoundsMin": str(low),
+            "statRollerBoundsMax": str(high)
+        }
+        if full_fields:
+            secondary["stat"]["unscaledDecimalValue"] = str(sum(rolls) * 10000)
+            secondary["stat"]["statId"] = f"{mod_id}-{stat_id}"
+            secondary["roll"] = [f"{mod_id}-roll-{k}" for k in range(roll_count)]
+        secondaries.append(secondary)
+
+    mod = {
+        "id": mod_id,
+        "definitionId": f"{set_id}{dots}{slot}",
+        "level": level,
+        "tier": tier,
+        "locked": rng.random() < 0.1,
+        "primaryStat": {"stat": {"unitStatId": primary_id, "statValueDecimal": str(rng.randint(10000, 600000))}},
+        "secondaryStat": secondaries
+    }
+    if full_fields:
+        primary = mod["primaryStat"]
+        primary["stat"]["unscaledDecimalValue"] = primary["stat"]["statValueDecimal"] + "0000"
+        primary["stat"]["statId"] = f"{mod_id}-primary"
+        primary.update({"statRolls": 0, "unscaledRollValue": [], "statRollerBoundsMin": "0", "statRollerBoundsMax": "0"})
+        mod.update({
+            "xp": rng.randint(0, 500000),
+            "bonusQuantity": 0,
+            "rerolledCount": rng.randint(0, 5),
+            "convertedItem": None,
+            "levelCost": {"currency": "GRIND", "quantity": rng.randint(0, 250000), "bonusQuantity": 0},
+            "sellValue": {"currency": "GRIND", "quantity": rng.randint(100, 20000), "bonusQuantity": 0},
+            "removeCost": {"currency": "GRIND", "quantity": 550 * dots, "bonusQuantity": 0}
+        })
+    return mod
+
+def _filler_unit_fields(rng: random.Random, unit_id: str) -> Dict[str, Any]:
+    """Unit fields the evaluator never reads"""
+    return {
+        "currentXp": rng.randint(0, 10 ** 7),
+        "promotionRecipeReference": "recipe_promotion_7",
+        "unitStat": None,
+        "purchasedAbilityId": [f"uniqueskill_{unit_id}_{k}" for k in range(rng.randint(0, 2))],
+        "unitReference": None
+    }
+
+def _filler_player_fields(rng: random.Random, ally_code: str) -> Dict[str, Any]:
+    """Top-level player fields the evaluator never reads"""
+    return {
+        "guildId": f"guild-{ally_code[:4]}",
+        "guildName": "Synthetic Guild",
+        "lastActivityTime": str(1700000000000 + rng.randint(0, 10 ** 9)),
+        "localTimeZoneOffsetMinutes": -300,
+        "profileStat": [
+            {"nameKey": f"STAT_{k}_NAME", "versionStat": k, "value": str(rng.randint(0, 10 ** 9)), "index": k}
+            for k in range(40)
+        ],
+        "pvpProfile": [
+            {"tab": tab, "rank": rng.randint(1, 500), "squad": {"cell": [
+                {"unitDefId": f"{CHARACTER_IDS[k % len(CHARACTER_IDS)]}:SEVEN_STAR", "cellIndex": k}
+                for k in range(5)
+            ]}}
+            for tab in (1, 2)
+        ],
+        "unlockedPlayerTitle": [{"id": f"PLAYERTITLE_{k}", "expirationTime": "0"} for k in range(120)],
+        "unlockedPlayerPortrait": [{"id": f"PLAYERPORTRAIT_{k}", "expirationTime": "0"} for k in range(250)],
+        "seasonStatus": [
+            {"id": f"SEASON_{k}", "seasonPoints": rng.randint(0, 10000), "league": "KYBER"} for k in range(60)
+        ],
+        "datacron": [
+            {"id": f"datacron-{k}", "templateId": f"datacron_set_{k % 12}", "tier": [
+                {"id": t, "targetRule": f"target_{t}", "scopeIcon": "icon", "affix": [
+                    {"statType": rng.randint(1, 60), "statValue": str(rng.randint(0, 10 ** 8))}
+                ]}
+                for t in range(9)
+            ]}
+            for k in range(30)
+        ]
+    }
+
+def generate_player(
+    ally_code: str = "123456789",
+    units: int = 250,
+    modded_ratio: float = 0.8,
+    seed: Optional[int] = None,
+    mods_per_unit: int = 6,
+    full_fields: bool = False,
+    **mod_options: Any
+) -> Dict[str, Any]:
+    """
+    Realistic Comlink `player` payload
+
+    About `modded_ratio` of the units carry `mods_per_unit` mods in random
+    slots (a full set by default). With full_fields, units, mods and the
+    player carry the rest of what Comlink sends (profile stats, datacrons,
+    costs, ...), which the evaluator ignores. Extra keyword arguments
+    (six_dot_ratio, tier_weights, roll_skew) go to generate_mod. The same
+    seed always produces the same payload.
+    """
+    rng = random.Random(seed if seed is not None else ally_code)
+    roster: List[Dict[str, Any]] = []
+    mod_counter = 0
+
+    for n in range(units):
+        base_id = CHARACTER_IDS[n % len(CHARACTER_IDS)]
+        if n >= len(CHARACTER_IDS):
+            base_id = f"{base_id}{n // len(CHARACTER_IDS)}"
+
+        unit: Dict[str, Any] = {
+            "id": f"{ally_code}-unit-{n}",
+            "definitionId": f"{base_id}:SEVEN_STAR",
+            "currentRarity": 7,
+            "currentLevel": 85,
+            "currentTier": rng.randint(1, 13),
+            "relic": {"currentTier": rng.randint(1, 11)},
+            "skill": [{"id": f"skill{k}", "tier": rng.randint(1, 8)} for k in range(4)],
+            "equipment": [],
+            "equippedStatMod": []
+        }
+        if rng.random() < modded_ratio:
+            slots = range(1, 7) if mods_per_unit >= 6 else sorted(rng.sample(range(1, 7), mods_per_unit))
+            for slot in slots:
+                mod_counter += 1
+                unit["equippedStatMod"].append(
+                    generate_mod(rng, f"{ally_code}-mod-{mod_counter}", slot, full_fields=full_fields, **mod_options)
+                )
+        if full_fields:
+            unit.update(_filler_unit_fields(rng, base_id))
+        roster.append(unit)
+
+    player = {
+        "name": f"Player {ally_code}",
+        "allyCode": ally_code,
+        "level": 85,
+        "rosterUnit": roster
+    }
+    if full_fields:
+        player.update(_filler_player_fields(rng, ally_code))
+    return player
+
+def main():
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Write a synthetic Comlink player payload as JSON")
+    parser.add_argument("output", help="file to write, - for stdout")
+    parser.add_argument("--ally-code", default="123456789")
+    parser.add_argument("--units", type=int, default=250)
+    parser.add_argument("--modded-ratio", type=float, default=0.8)
+    parser.add_argument("--mods-per-unit", type=int, default=6)
+    parser.add_argument("--six-dot-ratio", type=float, default=0.3)
+    parser.add_argument("--tier-weights", type=float, nargs=5, default=[0.05, 0.1, 0.15, 0.2, 0.5],
+                        help="relative weights of tiers 1-5")
+    parser.add_argument("--roll-skew", type=float, default=1.0, help="> 1 favours low rolls, < 1 high rolls")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--full-fields", action="store_true", help="include the fields the evaluator ignores")
+    args = parser.parse_args()
+
+    payload = generate_player(
+        args.ally_code, units=args.units, modded_ratio=args.modded_ratio, seed=args.seed,
+        mods_per_unit=args.mods_per_unit, six_dot_ratio=args.six_dot_ratio,
+        tier_weights=args.tier_weights, roll_skew=args.roll_skew, full_fields=args.full_fields
+    )
+    data = json.dumps(payload)
+    if args.output == "-":
+        print(data)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+
+if __name__ == "__main__":
+    main()
@@ -17,8 +17,111 @@ class Settings:
     
     # External API
     SWGOH_API_URL: str = os.getenv("SWGOH_API_URL", "http://swgoh_comlink:2500")
+    COMLINK_MAX_CONNECTIONS: int = int(os.getenv("COMLINK_MAX_CONNECTIONS", "20"))
+    COMLINK_MAX_CONCURRENT_REQUESTS: int = int(os.getenv("COMLINK_MAX_CONCURRENT_REQUESTS", "10"))
+    COMLINK_CONNECT_TIMEOUT: float = float(os.getenv("COMLINK_CONNECT_TIMEOUT", "5"))
+    COMLINK_READ_TIMEOUT: float = float(os.getenv("COMLINK_READ_TIMEOUT", "30"))
+    COMLINK_KEEPALIVE_TIMEOUT: float = float(os.getenv("COMLINK_KEEPALIVE_TIMEOUT", "30"))
+    # Opt-in: parse player responses as they arrive, keeping only mod data. Halves peak memory per fetch
+    # and blocks the event loop ~3 ms at a time instead of once for the whole body, but costs 1.1-1.6x the
+    # CPU of one json.loads (benchmarks/check_comlink_parser.py); worth it when memory, not CPU, is short
+    COMLINK_STREAM_PARSE: bool = os.getenv("COMLINK_STREAM_PARSE", "false").lower() == "true"
+    
+    # Character name index refresh (names almost never change)
+    CHARACTER_NAMES_REFRESH_SECONDS: int = int(os.getenv("CHARACTER_NAMES_REFRESH_SECONDS", str(6 * 3600)))
+    
+    # Player responses are streamed as mods are encoded, STREAM_CHUNK_MODS per chunk
+    STREAM_PLAYER_RESPONSES: bool = os.getenv("STREAM_PLAYER_RESPONSES", "true").lower() == "true"
+    STREAM_CHUNK_MODS: int = int(os.getenv("STREAM_CHUNK_MODS", "100"))
+    
+    # Keep/Sell/Slice/Level workflows shared with the frontend (src/config/evaluationWorkflows.js)
+    WORKFLOWS_CONFIG_PATH: str = os.getenv(
+        "WORKFLOWS_CONFIG_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "config", "evaluationWorkflows.js")
+    )
+    # Refuse to start without verdicts when the path was set explicitly (otherwise they are only logged missing)
+    WORKFLOWS_CONFIG_REQUIRED: bool = os.getenv(
+        "WORKFLOWS_CONFIG_REQUIRED", str("WORKFLOWS_CONFIG_PATH" in os.environ)
+    ).lower() == "true"
+    # Expected speed / efficiency after levelling and slicing ("x" on each mod that can still improve)
+    UPGRADE_PROJECTIONS: bool = os.getenv("UPGRADE_PROJECTIONS", "true").lower() == "true"
+    
+    # Last evaluated roster per ally code, diffed against on refresh so only changed mods are re-evaluated
+    SNAPSHOT_MAX_PLAYERS: int = int(os.getenv("SNAPSHOT_MAX_PLAYERS", "500"))
+    
+    # Per-roster indexes behind /api/player/{ally_code}/mods, built in the background when a roster is cached
+    MOD_INDEX_MAX_PLAYERS: int = int(os.getenv("MOD_INDEX_MAX_PLAYERS", "500"))
+    MOD_INDEX_ON_CACHE: bool = os.getenv("MOD_INDEX_ON_CACHE", "true").lower() == "true"
+    MOD_QUERY_MAX_LIMIT: int = int(os.getenv("MOD_QUERY_MAX_LIMIT", "500"))
+    
+    # On-disk history of every evaluated roster (trends over weeks); /app/history-data is a volume in docker-compose
+    HISTORY_ENABLED: bool = os.getenv("HISTORY_ENABLED", "false").lower() == "true"
+    HISTORY_SQLITE_PATH: str = os.getenv("HISTORY_SQLITE_PATH", "/app/history-data/roster_history.sqlite3")
+    # Rosters waiting for the history writer; more are dropped rather than slowing requests down
+    HISTORY_MAX_PENDING: int = int(os.getenv("HISTORY_MAX_PENDING", "100"))
+    HISTORY_DEFAULT_DAYS: int = int(os.getenv("HISTORY_DEFAULT_DAYS", "90"))
+    
+    # Cross-player percentiles of mod secondaries and efficiency, one quantile sketch per stat, slot and dots
+    STAT_DISTRIBUTIONS_ENABLED: bool = os.getenv("STAT_DISTRIBUTIONS_ENABLED", "true").lower() == "true"
+    # Shared by every worker, merged on each persist; empty keeps the sketches in memory, per process.
+    # /app/stats-data is a volume in docker-compose; mount one wherever else the path should survive restarts
+    STAT_SKETCH_SQLITE_PATH: str = os.getenv("STAT_SKETCH_SQLITE_PATH", "/app/stats-data/stat_sketches.sqlite3")
+    STAT_SKETCH_PERSIST_SECONDS: int = int(os.getenv("STAT_SKETCH_PERSIST_SECONDS", "300"))
+    # Sketch accuracy: rank error around 1/K, about 3 * K values kept per sketch
+    STAT_SKETCH_K: int = int(os.getenv("STAT_SKETCH_K", "200"))
+    # A player's roster counts once per this period, however often it is refreshed
+    STAT_SKETCH_RESAMPLE_SECONDS: int = int(os.getenv("STAT_SKETCH_RESAMPLE_SECONDS", str(7 * 86400)))
+    
+    # Loadout optimizer (/api/player/{ally_code}/optimize): search time per request, default and cap
+    OPTIMIZER_TIME_BUDGET_MS: int = int(os.getenv("OPTIMIZER_TIME_BUDGET_MS", "2000"))
+    OPTIMIZER_MAX_TIME_BUDGET_MS: int = int(os.getenv("OPTIMIZER_MAX_TIME_BUDGET_MS", "10000"))
+    OPTIMIZER_MAX_CHARACTERS: int = int(os.getenv("OPTIMIZER_MAX_CHARACTERS", "24"))
+    
+    # Where CPU-bound roster evaluation runs: "inline" (event loop), "thread" or "process" pool
+    CPU_EXECUTOR: str = os.getenv("CPU_EXECUTOR", "thread")
+    CPU_EXECUTOR_WORKERS: int = int(os.getenv("CPU_EXECUTOR_WORKERS", "2"))
+    # Fewer changed mods than this are evaluated inline; handing them to a pool costs more than it saves
+    CPU_EXECUTOR_MIN_MODS: int = int(os.getenv("CPU_EXECUTOR_MIN_MODS", "200"))
+    
+    # Per-stage timings and counters on /metrics (Prometheus text format)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Guild batch evaluation
+    GUILD_MAX_PLAYERS: int = int(os.getenv("GUILD_MAX_PLAYERS", "50"))
+    GUILD_FETCH_CONCURRENCY: int = int(os.getenv("GUILD_FETCH_CONCURRENCY", "10"))
     
     # Cache settings
     CACHE_TTL_SECONDS: int = 3600  # 1 hour
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "500"))
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    CACHE_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "60"))
+    # Stale-while-revalidate: entries up to this far past the TTL are served while refreshing in the background
+    CACHE_STALE_SECONDS: int = int(os.getenv("CACHE_STALE_SECONDS", "3600"))
+    
+    # Pre-warm frequently requested players before their cache entry expires
+    PREWARM_ENABLED: bool = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+    PREWARM_INTERVAL_SECONDS: int = int(os.getenv("PREWARM_INTERVAL_SECONDS", "60"))
+    PREWARM_LEAD_SECONDS: int = int(os.getenv("PREWARM_LEAD_SECONDS", "300"))
+    PREWARM_BUDGET_PER_MINUTE: float = float(os.getenv("PREWARM_BUDGET_PER_MINUTE", "30"))
+    PREWARM_HALF_LIFE_SECONDS: int = int(os.getenv("PREWARM_HALF_LIFE_SECONDS", "3600"))
+    PREWARM_MIN_REQUESTS: float = float(os.getenv("PREWARM_MIN_REQUESTS", "2"))
+    
+    # Cached player bodies are also stored compressed, once, with their cache entry (not counted in
+    # CACHE_MAX_ENTRIES), and sent as-is to clients that accept it.
+    # Encodings in order of preference; br and zstd need the brotli / zstandard packages
+    RESPONSE_COMPRESSION_ENABLED: bool = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+    RESPONSE_COMPRESSION_ENCODINGS: str = os.getenv("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip")
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_LEVEL: int = int(os.getenv("RESPONSE_BROTLI_LEVEL", "5"))
+    RESPONSE_ZSTD_LEVEL: int = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+    # Smaller bodies are always sent uncompressed
+    RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    
+    # "memory" keeps a per-process cache; "sqlite" shares one file between workers
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH: str = os.getenv("CACHE_SQLITE_PATH", "/app/cache-data/player_cache.sqlite3")
+    CACHE_COMPRESSION_LEVEL: int = int(os.getenv("CACHE_COMPRESSION_LEVEL", "6"))
+    # A cache hit only writes the entry's last access time back when it is at least this old (LRU precision)
+    CACHE_SQLITE_TOUCH_SECONDS: float = float(os.getenv("CACHE_SQLITE_TOUCH_SECONDS", "60"))
 
 settings = Settings()
\ No newline at end of file
@@ -1,13 +1,44 @@
+import asyncio
+import hashlib
+import time
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
 from config import settings
 from services.api_client import SWGOHAPIClient
 from services.mod_processor import ModProcessor
-from services.evaluation_engine import EvaluationEngine
+from services.evaluation_engine import EvaluationEngine, load_workflow_engine
+from services.upgrade_simulator import UpgradeSimulator
 from services.cache_manager import CacheManager
+from services.cache_backends import create_cache_backend
+from services.request_coalescer import RequestCoalescer
+from services.character_names import CharacterNameIndex
+from services.db_pool import all_pool_stats, close_all_pools
+from services.response_stream import ResponseStream
+from services.roster_stats import summarize_player, aggregate_guild
+from services.prewarm import PrewarmScheduler
+from services.metrics import metrics, SIZE_BUCKETS
+from services.roster_snapshots import (
+    RosterSnapshot, RosterSnapshotStore, apply_evaluations, diff_roster, patched_collection_stats
+)
+from services.roster_evaluator import RosterEvaluator, evaluate_packed, init_worker, pack_items
+from services.cpu_executor import CPUExecutor
+from services.mod_index import ModIndexStore, RosterIndex, parse_mod_choices, parse_secondary_thresholds, parse_sort
+from services.roster_history import RosterHistory
+from services.stat_distributions import (
+    DEFAULT_QUANTILES, SCOPES, StatDistributions, parse_metric, samples_from_body, samples_from_encoded
+)
+from services.loadout_optimizer import LoadoutGoal, optimize_loadouts, parse_set_bonuses
+from services.response_compression import ResponseCompressor, negotiate_encoding
+from services.response_formats import COLUMNAR_MEDIA_TYPE, encode_columnar, negotiate_format
+from models.guild import GuildEvaluationRequest
+from models.loadout import LoadoutRequest
+import orjson
 import logging
 
 # Configure logging
@@ -15,16 +46,132 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize API client
-api_client = SWGOHAPIClient(settings.SWGOH_API_URL)
-mod_processor = ModProcessor()
+api_client = SWGOHAPIClient(
+    settings.SWGOH_API_URL,
+    max_connections=settings.COMLINK_MAX_CONNECTIONS,
+    max_concurrent_requests=settings.COMLINK_MAX_CONCURRENT_REQUESTS,
+    connect_timeout=settings.COMLINK_CONNECT_TIMEOUT,
+    read_timeout=settings.COMLINK_READ_TIMEOUT,
+    keepalive_timeout=settings.COMLINK_KEEPALIVE_TIMEOUT,
+    stream_player_mods=settings.COMLINK_STREAM_PARSE
+)
+character_names = CharacterNameIndex()
+mod_processor = ModProcessor(name_index=character_names)
 evaluation_engine = EvaluationEngine()
-cache_manager = CacheManager(ttl_hours=1)
+workflow_engine = load_workflow_engine(settings.WORKFLOWS_CONFIG_PATH, required=settings.WORKFLOWS_CONFIG_REQUIRED)
+roster_evaluator = RosterEvaluator(mod_processor, evaluation_engine, workflow_engine,
+                                   UpgradeSimulator() if settings.UPGRADE_PROJECTIONS else None)
+cpu_executor = CPUExecutor(
+    settings.CPU_EXECUTOR,
+    max_workers=settings.CPU_EXECUTOR_WORKERS,
+    initializer=init_worker,
+    initargs=(settings.WORKFLOWS_CONFIG_PATH, settings.UPGRADE_PROJECTIONS)
+)
+response_compressor = ResponseCompressor(
+    [encoding.strip() for encoding in settings.RESPONSE_COMPRESSION_ENCODINGS.split(",") if encoding.strip()],
+    levels={"gzip": settings.RESPONSE_GZIP_LEVEL, "br": settings.RESPONSE_BROTLI_LEVEL, "zstd": settings.RESPONSE_ZSTD_LEVEL},
+    min_bytes=settings.RESPONSE_COMPRESSION_MIN_BYTES
+) if settings.RESPONSE_COMPRESSION_ENABLED else None
+cache_manager = CacheManager(
+    ttl_hours=settings.CACHE_TTL_SECONDS / 3600,
+    sweep_interval_seconds=settings.CACHE_SWEEP_INTERVAL_SECONDS,
+    backend=create_cache_backend(
+        settings.CACHE_BACKEND,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        max_bytes=settings.CACHE_MAX_BYTES,
+        sqlite_path=settings.CACHE_SQLITE_PATH,
+        compression_level=settings.CACHE_COMPRESSION_LEVEL,
+        touch_seconds=settings.CACHE_SQLITE_TOUCH_SECONDS
+    ),
+    stale_seconds=settings.CACHE_STALE_SECONDS
+)
+request_coalescer = RequestCoalescer()
+roster_snapshots = RosterSnapshotStore(max_players=settings.SNAPSHOT_MAX_PLAYERS)
+mod_indexes = ModIndexStore(max_players=settings.MOD_INDEX_MAX_PLAYERS)
+# A query arriving while the background build runs waits for it instead of building its own
+mod_index_builds = RequestCoalescer()
+roster_history = RosterHistory(
+    settings.HISTORY_SQLITE_PATH,
+    max_pending=settings.HISTORY_MAX_PENDING,
+    compression_level=settings.CACHE_COMPRESSION_LEVEL
+) if settings.HISTORY_ENABLED else None
+stat_distributions = StatDistributions(
+    settings.STAT_SKETCH_SQLITE_PATH or None,
+    k=settings.STAT_SKETCH_K,
+    resample_seconds=settings.STAT_SKETCH_RESAMPLE_SECONDS
+) if settings.STAT_DISTRIBUTIONS_ENABLED else None
+prewarm_scheduler = PrewarmScheduler(
+    refresh=lambda ally_code: refresh_player(ally_code),
+    expires_in=lambda ally_code: cache_manager.expires_in(f"player_{ally_code}"),
+    budget_per_minute=settings.PREWARM_BUDGET_PER_MINUTE,
+    lead_seconds=settings.PREWARM_LEAD_SECONDS,
+    half_life_seconds=settings.PREWARM_HALF_LIFE_SECONDS,
+    min_score=settings.PREWARM_MIN_REQUESTS
+)
+
+async def sweep_cache_periodically():
+    """Drop expired cache entries even if nobody asks for them again"""
+    while True:
+        await asyncio.sleep(settings.CACHE_SWEEP_INTERVAL_SECONDS)
+        await cache_manager.call(cache_manager.sweep_expired)
+
+async def prewarm_periodically():
+    """Refresh hot players shortly before their cache entries expire"""
+    while True:
+        await asyncio.sleep(settings.PREWARM_INTERVAL_SECONDS)
+        try:
+            await prewarm_scheduler.run_once()
+        except Exception as e:
+            logger.error(f"Pre-warm run failed: {str(e)}")
+
+async def refresh_character_names_periodically():
+    """Reload the character name index in the background"""
+    while True:
+        await asyncio.sleep(settings.CHARACTER_NAMES_REFRESH_SECONDS)
+        await asyncio.to_thread(character_names.refresh)
+
+async def persist_stat_distributions_periodically():
+    """Merge this worker's sketches into the shared file and pick up the other workers'"""
+    while True:
+        await asyncio.sleep(settings.STAT_SKETCH_PERSIST_SECONDS)
+        await asyncio.to_thread(stat_distributions.persist)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Preload every character name so player requests don't hit Postgres
+    await asyncio.to_thread(character_names.refresh)
+    background_tasks = [
+        asyncio.create_task(sweep_cache_periodically()),
+        asyncio.create_task(refresh_character_names_periodically())
+    ]
+    if settings.PREWARM_ENABLED:
+        background_tasks.append(asyncio.create_task(prewarm_periodically()))
+    if stat_distributions is not None:
+        await asyncio.to_thread(stat_distributions.persist)
+        background_tasks.append(asyncio.create_task(persist_stat_distributions_periodically()))
+    await cpu_executor.warm_up()
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # In-flight responses first, so nothing is waiting on the executor when it stops
+    for task in list(response_producers) + list(background_refreshes):
+        task.cancel()
+    await asyncio.to_thread(cpu_executor.shutdown)
+    if roster_history is not None:
+        await asyncio.to_thread(roster_history.close)
+    if stat_distributions is not None:
+        await asyncio.to_thread(stat_distributions.close)
+    # Release pooled Comlink connections on shutdown
+    await api_client.close()
+    cache_manager.close()
+    close_all_pools()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="SWGOH Mod Evaluator API",
     description="Backend API for SWGOH Mod Evaluation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -34,32 +181,552 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+def collect_service_metrics():
+    """Counters the services already keep, read at scrape time"""
+    cache_stats = cache_manager.get_cache_stats()
+    yield ("swgoh_cache_hits_total", "counter", "Fresh cache hits", {}, cache_stats['hits'])
+    yield ("swgoh_cache_stale_hits_total", "counter", "Stale cache hits served while revalidating", {}, cache_stats['stale_hits'])
+    yield ("swgoh_cache_misses_total", "counter", "Cache misses", {}, cache_stats['misses'])
+    yield ("swgoh_cache_evictions_total", "counter", "Entries evicted over the cache limits", {}, cache_stats['evictions'])
+    yield ("swgoh_cache_expirations_total", "counter", "Entries dropped after expiring", {}, cache_stats['expirations'])
+    yield ("swgoh_cache_entries", "gauge", "Entries in the cache", {}, cache_stats['total_items'])
+    yield ("swgoh_cache_resident_bytes", "gauge", "Approximate cache size in bytes", {}, cache_stats['resident_bytes'])
+
+    yield ("swgoh_cache_variant_lookups_total", "counter", "Lookups of pre-compressed bodies, by outcome",
+           {"result": "hit"}, cache_stats['variant_hits'])
+    yield ("swgoh_cache_variant_lookups_total", "counter", "Lookups of pre-compressed bodies, by outcome",
+           {"result": "miss"}, cache_stats['variant_misses'])
+
+    coalescing = request_coalescer.get_stats()
+    yield ("swgoh_coalesced_requests_total", "counter", "Requests that joined work already in flight", {}, coalescing['coalesced_requests'])
+    yield ("swgoh_in_flight_requests", "gauge", "Distinct player refreshes in flight", {}, coalescing['in_flight'])
+
+    snapshots = roster_snapshots.get_stats()
+    yield ("swgoh_snapshot_mods_total", "counter", "Mods seen on refresh, by whether they were re-evaluated",
+           {"result": "reused"}, snapshots['reused_mods'])
+    yield ("swgoh_snapshot_mods_total", "counter", "Mods seen on refresh, by whether they were re-evaluated",
+           {"result": "evaluated"}, snapshots['evaluated_mods'])
+
+    prewarm = prewarm_scheduler.get_stats()
+    yield ("swgoh_prewarm_refreshes_total", "counter", "Pre-warm refreshes by outcome", {"result": "ok"}, prewarm['refreshed'])
+    yield ("swgoh_prewarm_refreshes_total", "counter", "Pre-warm refreshes by outcome", {"result": "failed"}, prewarm['failed'])
+    yield ("swgoh_prewarm_refreshes_total", "counter", "Pre-warm refreshes by outcome",
+           {"result": "over_budget"}, prewarm['skipped_for_budget'])
+
+    indexes = mod_indexes.get_stats()
+    yield ("swgoh_mod_index_builds_total", "counter", "Per-roster mod indexes built", {}, indexes['builds'])
+    yield ("swgoh_mod_queries_total", "counter", "Mod query API requests answered", {}, indexes['queries'])
+
+    if roster_history is not None:
+        history = roster_history.get_stats()
+        for result in ("recorded", "unchanged", "dropped", "failed"):
+            yield ("swgoh_history_rosters_total", "counter", "Rosters handed to the history writer by outcome",
+                   {"result": result}, history[result])
+        yield ("swgoh_history_pending", "gauge", "Rosters waiting for the history writer", {}, history['pending'])
+
+    if stat_distributions is not None:
+        distributions = stat_distributions.get_stats()
+        yield ("swgoh_stat_rosters_total", "counter", "Rosters offered to the stat distributions, by outcome",
+               {"result": "sampled"}, distributions['rosters'])
+        yield ("swgoh_stat_rosters_total", "counter", "Rosters offered to the stat distributions, by outcome",
+               {"result": "recently_sampled"}, distributions['skipped'])
+        yield ("swgoh_stat_sketch_persists_total", "counter", "Stat sketch persists by outcome",
+               {"result": "ok"}, distributions['persists'])
+        yield ("swgoh_stat_sketch_persists_total", "counter", "Stat sketch persists by outcome",
+               {"result": "failed"}, distributions['persist_failures'])
+        yield ("swgoh_stat_sketch_values", "gauge", "Values retained across all stat sketches", {},
+               distributions['retained_values'])
+
+    executor = cpu_executor.get_stats()
+    yield ("swgoh_cpu_tasks_total", "counter", "Roster evaluations by where they ran",
+           {"where": "pool"}, executor['offloaded'])
+    yield ("swgoh_cpu_tasks_total", "counter", "Roster evaluations by where they ran",
+           {"where": "inline"}, executor['inline'])
+
+    for pool in all_pool_stats():
+        labels = {"pool": pool['name']}
+        yield ("swgoh_db_pool_connections", "gauge", "Database pool connections by state",
+               {**labels, "state": "in_use"}, pool['in_use'])
+        yield ("swgoh_db_pool_connections", "gauge", "Database pool connections by state",
+               {**labels, "state": "idle"}, pool['idle'])
+        yield ("swgoh_db_pool_utilization", "gauge", "Share of the pool's max_size checked out", labels,
+               pool['utilization'])
+        yield ("swgoh_db_pool_checkouts_total", "counter", "Connections checked out of the pool", labels,
+               pool['checkouts'])
+        yield ("swgoh_db_pool_waited_checkouts_total", "counter", "Checkouts that had to wait for a connection",
+               labels, pool['waited_checkouts'])
+        yield ("swgoh_db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection",
+               labels, pool['wait_seconds'])
+        yield ("swgoh_db_pool_max_wait_seconds", "gauge", "Longest wait for a pooled connection so far", labels,
+               pool['max_wait_ms'] / 1000)
+        yield ("swgoh_db_pool_timeouts_total", "counter", "Checkouts that gave up waiting", labels, pool['timeouts'])
+
+    names = character_names.get_stats()
+    yield ("swgoh_character_name_db_fallbacks_total", "counter", "Name lookups that had to query Postgres", {},
+           names.get('fallback_queries', 0))
+
+metrics.configure(settings.METRICS_ENABLED)
+metrics.describe("swgoh_player_responses_total", "Player responses by data source and kind")
+metrics.describe("swgoh_player_body_bytes", "Size of full player bodies as built and cached")
+metrics.describe("swgoh_player_response_bytes", "Size of buffered player responses sent, by kind, format and encoding")
+metrics.describe("swgoh_compression_ratio", "Compressed / original size of cached bodies, by encoding")
+metrics.describe("swgoh_compression_cpu_seconds_total", "CPU time spent compressing cached bodies, by encoding")
+metrics.describe("swgoh_loadout_optimizations_total", "Loadout optimizer requests, by whether the search finished in budget")
+metrics.add_collector(collect_service_metrics)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    # Collectors read the cache backend's stats
+    return Response(content=await cache_manager.call(metrics.render), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/cache/stats")
 async def get_cache_stats():
     """Get cache statistics"""
-    return cache_manager.get_cache_stats()
+    stats = await cache_manager.call(cache_manager.get_cache_stats)
+    stats['coalescing'] = request_coalescer.get_stats()
+    stats['snapshots'] = roster_snapshots.get_stats()
+    stats['prewarm'] = prewarm_scheduler.get_stats()
+    stats['executor'] = cpu_executor.get_stats()
+    stats['mod_indexes'] = mod_indexes.get_stats()
+    if roster_history is not None:
+        stats['history'] = roster_history.get_stats()
+    if stat_distributions is not None:
+        stats['stat_distributions'] = stat_distributions.get_stats()
+    return stats
 
 @app.delete("/api/cache/{ally_code}")
 async def clear_player_cache(ally_code: str):
     """Clear cache for specific player"""
     cache_key = f"player_{ally_code}"
-    cache_manager.clear(cache_key)
+    await cache_manager.call(cache_manager.clear, cache_key)
+    await cache_manager.call(cache_manager.clear, columnar_cache_key(cache_key))
+    mod_indexes.delete(ally_code)
     return {"message": f"Cache cleared for ally code {ally_code}"}
 
 @app.delete("/api/cache")
 async def clear_all_cache():
     """Clear entire cache"""
-    cache_manager.clear()
+    await cache_manager.call(cache_manager.clear)
     return {"message": "All cache cleared"}
 
+@app.post("/api/character-names/refresh")
+async def refresh_character_names():
+    """Reload the character name index from the database"""
+    refreshed = await asyncio.to_thread(character_names.refresh)
+    return {"refreshed": refreshed, **character_names.get_stats()}
+
+@app.get("/api/db/pool")
+async def get_db_pool_stats():
+    """Get database connection pool statistics (wait time, utilization)"""
+    return {"pools": all_pool_stats()}
+
 @app.get("/")
 async def root():
     return {"message": "SWGOH Mod Evaluator API is running"}
 
+# Trailing fields of the player response; a cache hit serves the stored bytes as-is
+API_SOURCE_SUFFIX = b',"dataSource":"api","cached":false}'
+CACHE_SOURCE_SUFFIX = b',"dataSource":"cache","cached":true}'
+
+# Keep references to producer tasks so they aren't garbage collected mid-stream
+response_producers = set()
+
+# Stale-while-revalidate, pre-warm refreshes and mod index builds running in the background
+background_refreshes = set()
+
+# Comlink player ID -> ally code, learned from every fetched player (insertion ordered)
+MAX_KNOWN_PLAYER_IDS = 10000
+player_id_ally_codes: Dict[str, str] = {}
+
+def remember_player_id(raw_player_data: dict, ally_code: str) -> None:
+    """Map Comlink player IDs to ally codes so guild members can hit the per-player cache"""
+    player_id = raw_player_data.get("playerId")
+    if player_id:
+        player_id_ally_codes[player_id] = ally_code
+        if len(player_id_ally_codes) > MAX_KNOWN_PLAYER_IDS:
+            player_id_ally_codes.pop(next(iter(player_id_ally_codes)))
+
+async def evaluate_changed_mods(items: list) -> list:
+    """RosterEvaluator.evaluate on the configured executor; small batches stay on the event loop"""
+    if len(items) < settings.CPU_EXECUTOR_MIN_MODS:
+        return await cpu_executor.run(roster_evaluator.evaluate, items, inline=True)
+    if cpu_executor.is_process_pool:
+        # Workers get one orjson blob instead of pickled dicts and send back encoded bytes
+        evaluations, timings = await cpu_executor.run(evaluate_packed, pack_items(items))
+        # Stage spans inside a worker process would be lost; record its timings here
+        for stage, seconds in timings.items():
+            metrics.observe_stage(stage, seconds)
+        return evaluations
+    return await cpu_executor.run(roster_evaluator.evaluate, items)
+
+async def produce_player_response(ally_code: str, cache_key: str, stream: ResponseStream,
+                                  raw_player_data: Optional[dict] = None) -> None:
+    """Fetch, process and evaluate a player's mods, streaming the encoded response and caching it"""
+    started = time.perf_counter()
+    try:
+        # Fetch raw player data from SWGOH API (unless the caller already has it)
+        if raw_player_data is None:
+            raw_player_data = await api_client.fetch_player_data(ally_code)
+        
+        if raw_player_data is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Failed to fetch player data from SWGOH API"
+            )
+        remember_player_id(raw_player_data, ally_code)
+        
+        # Names the index doesn't have yet are looked up off the event loop before the diff needs them
+        await character_names.resolve(list(mod_processor.roster_character_ids(raw_player_data)))
+
+        # Diff against the last snapshot: only new or changed mods are processed and evaluated
+        previous = roster_snapshots.get(ally_code)
+        with metrics.span("snapshot_diff"):
+            diff = diff_roster(mod_processor, raw_player_data, previous)
+
+        # Process, evaluate and encode the changed mods off the event loop
+        with metrics.span("mod_evaluation"):
+            apply_evaluations(diff, await evaluate_changed_mods(diff.changed_items))
+        changed_count = len(diff.changed_ids)
+        roster_snapshots.record_diff(len(diff.mods) - changed_count, changed_count, len(diff.removed_ids))
+        logger.info(f"Roster for {ally_code}: {len(diff.mods)} mods, {changed_count} new or changed, "
+                    f"{len(diff.removed_ids)} removed")
+
+        if workflow_engine is not None:
+            collection_stats = patched_collection_stats(diff, workflow_engine.workflow_keys, workflow_engine.result_codes)
+        else:
+            collection_stats = patched_collection_stats(diff, [], [])
+
+        player_name = raw_player_data.get('name', 'Unknown Player')
+        last_updated = datetime.now().isoformat()
+        workflows = workflow_engine.workflow_info if workflow_engine is not None else []
+
+        # Response header fields go out before the mods
+        head = orjson.dumps({
+            "success": True,
+            "playerName": player_name,
+            "allyCode": ally_code,
+            "lastUpdated": last_updated,
+            "workflows": workflows
+        })
+        stream.append(head[:-1] + b',"mods":[')
+
+        # Every mod is already encoded (unchanged ones since an earlier refresh). The snapshot version
+        # (also the ETag) hashes everything but lastUpdated, so an identical refresh keeps it;
+        # collectionStats derive from the mods
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(orjson.dumps([player_name, ally_code, workflows]))
+        entries = list(diff.mods.values())
+        chunk_size = settings.STREAM_CHUNK_MODS
+        for start in range(0, len(entries), chunk_size):
+            encoded = b",".join(entry.encoded for entry in entries[start:start + chunk_size])
+            chunk = b"," + encoded if start else encoded
+            digest.update(chunk)
+            stream.append(chunk)
+            # Let the server write this chunk before joining the next one
+            await asyncio.sleep(0)
+
+        version = digest.hexdigest()
+        roster_snapshots.put(ally_code, RosterSnapshot(
+            version, previous.version if previous is not None else None, player_name, last_updated,
+            diff.mods, collection_stats, diff.changed_ids, diff.removed_ids
+        ))
+
+        tail = b'],"snapshot":' + orjson.dumps(version) + b',"collectionStats":' + orjson.dumps(collection_stats)
+        stream.append(tail + API_SOURCE_SUFFIX)
+
+        # Cache the pre-encoded body exactly as a cache hit will send it
+        cached_body = b"".join(stream.chunks[:-1]) + tail + CACHE_SOURCE_SUFFIX
+        with metrics.span("cache_store"):
+            await cache_body(cache_key, cached_body)
+        metrics.observe("swgoh_player_body_bytes", len(cached_body), SIZE_BUCKETS, source="api")
+        metrics.observe_stage("player_total", time.perf_counter() - started)
+        stream.finish()
+        if settings.MOD_INDEX_ON_CACHE:
+            build_mod_index_in_background(ally_code, version, [entry.encoded for entry in entries])
+        if stat_distributions is not None:
+            sample_roster_in_background(ally_code, [entry.encoded for entry in entries])
+        if roster_history is not None:
+            roster_history.record(ally_code, version, player_name,
+                                  [(mod_id, entry.signature, entry.encoded) for mod_id, entry in diff.mods.items()])
+
+    except Exception as e:
+        stream.fail(e)
+
+async def start_player_response(ally_code: str, cache_key: str, raw_player_data: Optional[dict] = None) -> ResponseStream:
+    """Start producing a player's response and return its stream once the first bytes exist"""
+    stream = ResponseStream()
+    task = asyncio.create_task(produce_player_response(ally_code, cache_key, stream, raw_player_data))
+    response_producers.add(task)
+    task.add_done_callback(response_producers.discard)
+
+    # Errors before the first chunk (e.g. Comlink down) surface here, before any headers are sent
+    await stream.wait_started()
+    return stream
+
+async def get_player_stream(ally_code: str, raw_player_data: Optional[dict] = None) -> ResponseStream:
+    """Concurrent misses for the same ally code share one fetch + evaluation (and one stream)"""
+    cache_key = f"player_{ally_code}"
+    return await request_coalescer.run(
+        cache_key,
+        lambda: start_player_response(ally_code, cache_key, raw_player_data),
+        hold_until=lambda stream: stream.wait_done()
+    )
+
+async def refresh_player(ally_code: str) -> bool:
+    """Re-fetch and re-evaluate a player into the cache; joins a refresh already in flight"""
+    try:
+        stream = await get_player_stream(ally_code)
+        await stream.wait_done()
+        return True
+    except Exception as e:
+        logger.warning(f"Background refresh failed for ally code {ally_code}: {str(e)}")
+        return False
+
+def revalidate_in_background(ally_code: str) -> None:
+    """Stale-while-revalidate: refresh a stale entry without making the caller wait"""
+    task = asyncio.create_task(refresh_player(ally_code))
+    background_refreshes.add(task)
+    task.add_done_callback(background_refreshes.discard)
+
+async def build_mod_index(ally_code: str, version: str, build: Callable[..., RosterIndex], source: Any) -> RosterIndex:
+    """build(version, source) on the CPU executor, once per ally code and snapshot version"""
+    async def run_build() -> RosterIndex:
+        with metrics.span("mod_index_build"):
+            index = await cpu_executor.run(build, version, source)
+        mod_indexes.put(ally_code, index)
+        return index
+    return await mod_index_builds.run(f"{ally_code}:{version}", run_build)
+
+async def index_cached_roster(ally_code: str, version: str, encoded: List[bytes]) -> None:
+    try:
+        await build_mod_index(ally_code, version, RosterIndex.from_encoded, encoded)
+    except Exception as e:
+        logger.warning(f"Mod index build failed for ally code {ally_code}: {str(e)}")
+
+async def compress_cached_body(cache_key: str, body: bytes, stored_at: float) -> None:
+    try:
+        with metrics.span("response_compression"):
+            variants = await asyncio.to_thread(response_compressor.compress, body)
+        if variants:
+            await cache_manager.call(cache_manager.set_variants, cache_key, variants, stored_at)
+    except Exception as e:
+        logger.warning(f"Compressing {cache_key} failed: {str(e)}")
+
+async def cache_body(cache_key: str, body: bytes) -> None:
+    """Cache a response body as sent on a hit; its compressed copies follow, built off the event loop"""
+    stored_at = await cache_manager.call(cache_manager.set, cache_key, body)
+    if stored_at is None or response_compressor is None:
+        return
+    task = asyncio.create_task(compress_cached_body(cache_key, body, stored_at))
+    background_refreshes.add(task)
+    task.add_done_callback(background_refreshes.discard)
+
+async def sample_roster(ally_code: str, encoded: List[bytes]) -> None:
+    try:
+        with metrics.span("stat_sampling"):
+            samples = await cpu_executor.run(samples_from_encoded, encoded)
+            await asyncio.to_thread(stat_distributions.add, ally_code, samples)
+    except Exception as e:
+        logger.warning(f"Stat sampling failed for ally code {ally_code}: {str(e)}")
+
+def sample_roster_in_background(ally_code: str, encoded: List[bytes]) -> None:
+    """Feed a freshly evaluated roster into the cross-player distributions, unless it was sampled recently"""
+    if not stat_distributions.should_sample(ally_code):
+        return
+    task = asyncio.create_task(sample_roster(ally_code, encoded))
+    background_refreshes.add(task)
+    task.add_done_callback(background_refreshes.discard)
+
+def build_mod_index_in_background(ally_code: str, version: str, encoded: List[bytes]) -> None:
+    """Index a freshly cached roster off the response path, so mod queries find it ready"""
+    task = asyncio.create_task(index_cached_roster(ally_code, version, encoded))
+    background_refreshes.add(task)
+    task.add_done_callback(background_refreshes.discard)
+
+async def load_mod_index(ally_code: str, body: bytes) -> RosterIndex:
+    """Index of the roster in this body; built here if it isn't yet (e.g. another worker cached the body)"""
+    version = body_snapshot_version(body)
+    index = mod_indexes.get(ally_code, version)
+    if index is None:
+        index = await build_mod_index(ally_code, version, RosterIndex.from_body, body)
+    return index
+
+async def load_player_body(ally_code: Optional[str] = None, player_id: Optional[str] = None) -> bytes:
+    """Complete /api/player body for one player, from the cache when still valid"""
+    if ally_code is None:
+        ally_code = player_id_ally_codes.get(player_id)
+
+    raw_player_data = None
+    if ally_code is None:
+        # Unknown guild member: fetch by player ID to learn the ally code
+        raw_player_data = await api_client.fetch_player_data(player_id=player_id)
+        if raw_player_data is None or not raw_player_data.get("allyCode"):
+            raise HTTPException(status_code=503, detail="Failed to fetch player data from SWGOH API")
+        ally_code = str(raw_player_data["allyCode"])
+
+    cached_body, stale = await cache_manager.call(cache_manager.lookup, f"player_{ally_code}")
+    if cached_body:
+        if stale:
+            revalidate_in_background(ally_code)
+        return cached_body
+
+    stream = await get_player_stream(ally_code, raw_player_data)
+    return await stream.wait_done()
+
+def body_snapshot_version(body: bytes) -> Optional[str]:
+    """Snapshot version written into a player body's tail"""
+    marker = body.rfind(b',"snapshot":"')
+    if marker < 0:
+        return None
+    start = marker + len(b',"snapshot":"')
+    return body[start:body.index(b'"', start)].decode()
+
+def build_delta_body(ally_code: str, body: bytes, since: str) -> Optional[bytes]:
+    """Changed mods + removed ids since the client's snapshot, or None if only a full body will do"""
+    snapshot = roster_snapshots.get(ally_code)
+    # The snapshot must be the one this body came from (another worker may have refreshed the cache)
+    if snapshot is None or body_snapshot_version(body) != snapshot.version:
+        return None
+
+    if since == snapshot.version:
+        changed, removed = [], []
+    elif since == snapshot.previous_version:
+        changed = [snapshot.mods[mod_id].encoded for mod_id in snapshot.changed_ids]
+        removed = snapshot.removed_ids
+    else:
+        return None
+
+    head = orjson.dumps({
+        "success": True,
+        "delta": True,
+        "playerName": snapshot.player_name,
+        "allyCode": ally_code,
+        "lastUpdated": snapshot.last_updated,
+        "since": since,
+        "snapshot": snapshot.version,
+        "removed": removed,
+        "collectionStats": snapshot.collection_stats
+    })
+    suffix = CACHE_SOURCE_SUFFIX if body.endswith(CACHE_SOURCE_SUFFIX) else API_SOURCE_SUFFIX
+    return head[:-1] + b',"mods":[' + b",".join(changed) + b"]" + suffix
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match check against the exact tag of the selected representation (weak comparison, "*" matches anything)"""
+    if not if_none_match or etag is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def representation_etag(version: Optional[str], encoding: Optional[str]) -> Optional[str]:
+    """Strong ETag of version sent with a content-coding, or as-is when encoding is None"""
+    if version is None:
+        return None
+    return f'"{version}-{encoding}"' if encoding else f'"{version}"'
+
+def columnar_cache_key(cache_key: str) -> str:
+    return f"{cache_key}:columnar"
+
+async def load_columnar_body(ally_code: str, body: bytes) -> bytes:
+    """
+    Columnar encoding of a full player body, built once per snapshot version
+
+    The encoded form is cached next to the JSON body and reused as long as
+    its snapshot version matches; only a refreshed roster encodes it again.
+    """
+    cache_key = columnar_cache_key(f"player_{ally_code}")
+    fresh = body.endswith(API_SOURCE_SUFFIX)
+    if fresh:
+        # Cached as a cache hit will send it, like the JSON body
+        body = body[:-len(API_SOURCE_SUFFIX)] + CACHE_SOURCE_SUFFIX
+    # The JSON body's lookup already counted this request
+    columnar_body = await cache_manager.call(cache_manager.peek, cache_key)
+    if columnar_body is None or body_snapshot_version(columnar_body) != body_snapshot_version(body):
+        with metrics.span("columnar_encode"):
+            columnar_body = encode_columnar(body)
+        await cache_body(cache_key, columnar_body)
+    if fresh:
+        return columnar_body[:-len(CACHE_SOURCE_SUFFIX)] + API_SOURCE_SUFFIX
+    return columnar_body
+
+async def player_body_response(ally_code: str, body: bytes, since: Optional[str], if_none_match: Optional[str],
+                         source: str, response_format: str = "json", accept_encoding: Optional[str] = None) -> Response:
+    """
+    Complete player body as a 304, a delta or the full body, tagged with its content hash
+
+    A full body from the cache goes out pre-compressed when the client accepts
+    one of the stored encodings; fresh bodies and deltas are sent as they are.
+    """
+    version = body_snapshot_version(body)
+    columnar = response_format == "columnar"
+    if columnar and version is not None:
+        # Each representation has its own (strong) validator
+        version = f"{version}-columnar"
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept, Accept-Encoding"}
+    if version is not None:
+        headers["ETag"] = representation_etag(version, None)
+
+    # A cached full body goes out in the negotiated encoding, so that is the
+    # representation a conditional request is checked against
+    encoding = None
+    if source != "api" and response_compressor is not None:
+        encoding = negotiate_encoding(accept_encoding, response_compressor.encodings)
+
+    etag = representation_etag(version, encoding)
+    if etag_matches(if_none_match, etag):
+        headers["ETag"] = etag
+        metrics.inc("swgoh_player_responses_total", source=source, kind="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    delta_body = build_delta_body(ally_code, body, since) if since else None
+    if delta_body is not None:
+        # Deltas are small and differ per client snapshot, so they're encoded per request
+        content = encode_columnar(delta_body) if columnar else delta_body
+    else:
+        content = await load_columnar_body(ally_code, body) if columnar else body
+
+    if delta_body is not None:
+        encoding = None
+    elif encoding:
+        cache_key = f"player_{ally_code}"
+        compressed = await cache_manager.call(cache_manager.get_variant,
+                                              columnar_cache_key(cache_key) if columnar else cache_key,
+                                              encoding)
+        if compressed is not None:
+            content = compressed
+            headers["Content-Encoding"] = encoding
+            if version is not None:
+                headers["ETag"] = representation_etag(version, encoding)
+        else:
+            encoding = None
+
+    kind = "delta" if delta_body else "full"
+    metrics.inc("swgoh_player_responses_total", source=source, kind=kind)
+    metrics.observe("swgoh_player_response_bytes", len(content), SIZE_BUCKETS, kind=kind, format=response_format,
+                    encoding=encoding or "identity")
+    media_type = COLUMNAR_MEDIA_TYPE if columnar else "application/json"
+    return Response(content=content, media_type=media_type, headers=headers)
+
 @app.get("/api/player/{ally_code}")
-async def get_player(ally_code: str):
+async def get_player(ally_code: str, since: Optional[str] = None,
+                     if_none_match: Optional[str] = Header(default=None),
+                     accept: Optional[str] = Header(default=None),
+                     accept_encoding: Optional[str] = Header(default=None)):
+    """
+    Evaluated mods for a player. With ?since=<snapshot> (the "snapshot" of a
+    previous response) only mods changed since then are sent, when possible.
+    Responses carry a content-hash ETag; If-None-Match answers 304 when unchanged.
+    Accept: application/vnd.swgoh.columnar+json sends the mods one array per field.
+    Cached bodies are sent pre-compressed per Accept-Encoding (zstd, br, gzip).
+    """
     # Validate ally code format (9 digits)
     if not ally_code.isdigit() or len(ally_code) != 9:
         raise HTTPException(
@@ -70,91 +737,29 @@ async def get_player(ally_code: str):
     try:
         # Check cache first
         cache_key = f"player_{ally_code}"
-        cached_response = cache_manager.get(cache_key)
-        
-        if cached_response:
-            logger.info(f"Returning cached data for ally code: {ally_code}")
-            # Mark as cached before returning
-            cached_response["cached"] = True
-            cached_response["dataSource"] = "cache"
-            return cached_response
-        
-        # Fetch raw player data from SWGOH API
-        raw_player_data = await api_client.fetch_player_data(ally_code)
-        
-        if raw_player_data is None:
-            raise HTTPException(
-                status_code=503,
-                detail="Failed to fetch player data from SWGOH API"
-            )
+        response_format = negotiate_format(accept)
+        prewarm_scheduler.record(ally_code)
+        with metrics.span("cache_lookup"):
+            cached_body, stale = await cache_manager.call(cache_manager.lookup, cache_key)
         
-        # Process the raw data to extract mods
-        processed_data = mod_processor.process_player_data(raw_player_data, ally_code)
+        if cached_body:
+            logger.info(f"Returning {'stale ' if stale else ''}cached data for ally code: {ally_code}")
+            if stale:
+                revalidate_in_background(ally_code)
+            # Stored bytes already carry dataSource "cache" / cached true
+            return await player_body_response(ally_code, cached_body, since, if_none_match, "stale" if stale else "cache",
+                                        response_format, accept_encoding)
         
-        # Evaluate all mods with both Basic and Strict modes
-        evaluated_mods = []
-        collection_stats = {
-            "totalMods": len(processed_data.mods),
-            "byDots": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0},
-            "byTier": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
-            "byRecommendation": {
-                "basic": {"K": 0, "S": 0, "SL": 0, "LV": 0},
-                "strict": {"K": 0, "S": 0, "SL": 0, "LV": 0}
-            }
-        }
+        stream = await get_player_stream(ally_code)
 
-        for mod in processed_data.mods:
-            # Calculate efficiency data (still needed for display)
-            efficiency_data = evaluation_engine.calculate_roll_efficiency(mod)
-            
-            # Build compact mod structure WITHOUT evaluations
-            minimal_mod = {
-                "id": mod.id,
-                "d": mod.definitionId,
-                "l": mod.level,
-                "t": mod.tier,
-                "k": mod.locked,
-                "c": mod.characterId.split(':')[0],
-                "cn": mod.characterDisplayName,
-                "p": {
-                    "i": mod.primaryStat.unitStatId,
-                    "v": round(mod.primaryStat.value, 4)
-                },
-                "s": [],
-                "e": round(efficiency_data["overall"], 1)
-            }
-            
-            # Build secondary stats (this part stays the same)
-            for i, stat in enumerate(mod.secondaryStats):
-                stat_key = f"stat_{i}"
-                stat_efficiency_data = efficiency_data["individual"].get(stat_key, {})
-                
-                minimal_mod["s"].append({
-                    "i": stat.unitStatId,
-                    "v": round(stat.value, 4),
-                    "r": stat.rolls,
-                    "e": round(stat_efficiency_data.get("efficiency", 0), 1),
-                    "re": [round(e, 1) for e in stat_efficiency_data.get("rollEfficiencies", [])]
-                })
-            
-            evaluated_mods.append(minimal_mod)
-
-        # Build complete response
-        response_data = {
-            "success": True,
-            "playerName": processed_data.playerName,
-            "allyCode": processed_data.allyCode,
-            "lastUpdated": processed_data.lastUpdated,
-            "dataSource": "api",
-            "cached": False,
-            "mods": evaluated_mods,  # No evaluation data included
-            "collectionStats": collection_stats
-        }
-        
-        # Cache the response
-        cache_manager.set(cache_key, response_data)
-        
-        return response_data
+        # The ETag is only known once the last mod is encoded, so conditional,
+        # delta, columnar and buffered responses wait for the whole body
+        if since or if_none_match or response_format != "json" or not settings.STREAM_PLAYER_RESPONSES:
+            return await player_body_response(ally_code, await stream.wait_done(), since, if_none_match, "api",
+                                        response_format)
+        metrics.inc("swgoh_player_responses_total", source="api", kind="stream")
+        return StreamingResponse(stream.iter_chunks(), media_type="application/json",
+                                 headers={"Vary": "Accept, Accept-Encoding"})
         
     except Exception as e:
         logger.error(f"Unexpected error for ally code {ally_code}: {str(e)}")
@@ -163,6 +768,300 @@ async def get_player(ally_code: str):
             detail="Internal server error"
         )
 
+@app.get("/api/player/{ally_code}/mods")
+async def query_player_mods(
+    ally_code: str,
+    mod_set: Optional[List[str]] = Query(default=None, alias="set"),
+    slot: Optional[List[str]] = Query(default=None),
+    dots: Optional[List[int]] = Query(default=None),
+    tier: Optional[List[int]] = Query(default=None),
+    primary: Optional[List[int]] = Query(default=None),
+    character: Optional[List[str]] = Query(default=None),
+    secondary: Optional[List[str]] = Query(default=None),
+    min_efficiency: Optional[float] = None,
+    max_efficiency: Optional[float] = None,
+    sort: str = "efficiency",
+    order: str = "desc",
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1)
+):
+    """
+    One page of a player's evaluated mods, filtered and sorted server-side
+
+    Repeat a filter to accept several values (set=Speed&set=Health). set and
+    slot take ids or names, character takes character ids, secondary takes
+    <stat id>:<minimum> (secondary=5:15 is speed 15+; repeats must all hold).
+    sort is efficiency, level, dots, tier, set, slot, primary, character or
+    secondary:<stat id>; order is desc or asc. Mods are in the /api/player format.
+    """
+    if not ally_code.isdigit() or len(ally_code) != 9:
+        raise HTTPException(status_code=400, detail="Ally code must be exactly 9 digits")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    try:
+        equals = {
+            "set": parse_mod_choices(mod_set, ModProcessor.MOD_SETS, "set"),
+            "slot": parse_mod_choices(slot, ModProcessor.MOD_SLOTS, "slot"),
+            "dots": dots,
+            "tier": tier,
+            "primary": primary,
+            "character": character
+        }
+        secondaries = parse_secondary_thresholds(secondary)
+        parse_sort(sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = min(limit, settings.MOD_QUERY_MAX_LIMIT)
+
+    try:
+        prewarm_scheduler.record(ally_code)
+        body = await load_player_body(ally_code)
+        index = await load_mod_index(ally_code, body)
+        with metrics.span("mod_query"):
+            positions = index.query(equals, min_efficiency, max_efficiency, secondaries, sort, order == "desc")
+            page = index.page(positions, offset, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Mod query failed for ally code {ally_code}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    mod_indexes.record_query()
+
+    head = orjson.dumps({
+        "success": True,
+        "allyCode": ally_code,
+        "snapshot": index.version,
+        "workflows": workflow_engine.workflow_info if workflow_engine is not None else [],
+        "total": len(positions),
+        "offset": offset,
+        "limit": limit
+    })
+    return Response(content=head[:-1] + b',"mods":[' + b",".join(page) + b"]}", media_type="application/json",
+                    headers={"Cache-Control": "no-cache"})
+
+@app.post("/api/player/{ally_code}/optimize")
+async def optimize_player_loadouts(ally_code: str, request: LoadoutRequest):
+    """
+    Best mod loadout for each listed character, in priority order, without reusing mods
+
+    Each character maximizes the weighted total of its stats (default: speed)
+    under its required set bonuses, slot primaries and minimum totals. Mods on
+    protectedCharacters are never taken. The search stops after timeBudgetMs
+    and returns the best loadouts found so far ("complete": false).
+    """
+    if not ally_code.isdigit() or len(ally_code) != 9:
+        raise HTTPException(status_code=400, detail="Ally code must be exactly 9 digits")
+    if not request.characters:
+        raise HTTPException(status_code=400, detail="List at least one character")
+    if len(request.characters) > settings.OPTIMIZER_MAX_CHARACTERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.OPTIMIZER_MAX_CHARACTERS} characters per request")
+    try:
+        goals = []
+        for character in request.characters:
+            slots = parse_mod_choices(list(character.primaries), ModProcessor.MOD_SLOTS, "slot") or []
+            goals.append(LoadoutGoal(
+                character.character,
+                character.weights,
+                parse_set_bonuses(character.sets, ModProcessor.MOD_SETS),
+                dict(zip(slots, character.primaries.values())),
+                character.minimums
+            ).to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    budget_ms = min(request.timeBudgetMs or settings.OPTIMIZER_TIME_BUDGET_MS, settings.OPTIMIZER_MAX_TIME_BUDGET_MS)
+    listed = [character.character for character in request.characters] if request.listedCharactersOnly else None
+
+    try:
+        prewarm_scheduler.record(ally_code)
+        body = await load_player_body(ally_code)
+        with metrics.span("loadout_optimize"):
+            complete, result = await cpu_executor.run(optimize_loadouts, body, goals, request.protectedCharacters,
+                                            listed, budget_ms / 1000)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Loadout optimization failed for ally code {ally_code}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    metrics.inc("swgoh_loadout_optimizations_total", complete=str(complete).lower())
+
+    head = orjson.dumps({"success": True, "allyCode": ally_code, "snapshot": body_snapshot_version(body)})
+    return Response(content=head[:-1] + b"," + result[1:], media_type="application/json")
+
+def history_range(days: Optional[float], since: Optional[datetime], until: Optional[datetime]) -> tuple:
+    """(since, until) as timestamps; until defaults to now and since to `days` before it"""
+    until_ts = until.timestamp() if until is not None else time.time()
+    if since is not None:
+        return since.timestamp(), until_ts
+    return until_ts - timedelta(days=days or settings.HISTORY_DEFAULT_DAYS).total_seconds(), until_ts
+
+@app.get("/api/player/{ally_code}/history")
+async def get_player_history(ally_code: str, days: Optional[float] = Query(default=None, gt=0),
+                             since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    How a player's roster changed over time: one point per recorded snapshot with
+    totalMods, averageEfficiency, sixDotMods, speedSecondaries and maxSpeedSecondary.
+    The range is since..until, or the last `days` (default HISTORY_DEFAULT_DAYS).
+    """
+    if roster_history is None:
+        raise HTTPException(status_code=404, detail="Roster history is disabled")
+    if not ally_code.isdigit() or len(ally_code) != 9:
+        raise HTTPException(status_code=400, detail="Ally code must be exactly 9 digits")
+    since_ts, until_ts = history_range(days, since, until)
+    with metrics.span("history_query"):
+        points = await asyncio.to_thread(roster_history.trend, ally_code, since_ts, until_ts)
+    return Response(content=orjson.dumps({
+        "success": True,
+        "allyCode": ally_code,
+        "since": since_ts,
+        "until": until_ts,
+        "points": points
+    }), media_type="application/json")
+
+@app.get("/api/player/{ally_code}/history/roster")
+async def get_player_roster_at(ally_code: str, at: Optional[datetime] = None):
+    """The player's evaluated mods as recorded at a point in time (default: the latest recorded)"""
+    if roster_history is None:
+        raise HTTPException(status_code=404, detail="Roster history is disabled")
+    if not ally_code.isdigit() or len(ally_code) != 9:
+        raise HTTPException(status_code=400, detail="Ally code must be exactly 9 digits")
+    with metrics.span("history_query"):
+        recorded = await asyncio.to_thread(roster_history.roster_at, ally_code,
+                                           at.timestamp() if at is not None else time.time())
+    if recorded is None:
+        raise HTTPException(status_code=404, detail=f"No roster recorded for ally code {ally_code} by then")
+    snapshot, mods = recorded
+    head = orjson.dumps({"success": True, "allyCode": ally_code, **snapshot})
+    return Response(content=head[:-1] + b',"mods":[' + b",".join(mods) + b"]}", media_type="application/json")
+
+@app.get("/api/stats/percentiles")
+async def get_stat_percentiles(
+    metric: str,
+    scope: str = "mod",
+    slot: Optional[List[str]] = Query(default=None),
+    dots: Optional[List[int]] = Query(default=None),
+    value: Optional[float] = None,
+    q: Optional[List[float]] = Query(default=None)
+):
+    """
+    Distribution of a mod stat across every player evaluated so far
+
+    metric is a secondary stat id (5 is speed) or "efficiency". scope "mod"
+    counts every mod, "player" each player's mean over their mods of that
+    slot and dots. slot (ids or names) and dots narrow it and may repeat.
+    Returns the quantiles q (default p10..p99) and, with value, its percentile.
+    """
+    if stat_distributions is None:
+        raise HTTPException(status_code=404, detail="Stat distributions are disabled")
+    if scope not in SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(SCOPES)}")
+    if q and any(not 0 <= fraction <= 1 for fraction in q):
+        raise HTTPException(status_code=400, detail="q must be between 0 and 1")
+    try:
+        parsed_metric = parse_metric(metric)
+        slots = parse_mod_choices(slot, ModProcessor.MOD_SLOTS, "slot")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with metrics.span("stat_percentiles"):
+        result = await asyncio.to_thread(stat_distributions.percentiles, scope, parsed_metric, slots, dots,
+                                         q or DEFAULT_QUANTILES, value)
+    return Response(content=orjson.dumps({"success": True, "metric": parsed_metric, "scope": scope,
+                                          "slots": slots, "dots": dots, **result}), media_type="application/json")
+
+@app.get("/api/player/{ally_code}/percentiles")
+async def get_player_percentiles(ally_code: str, metric: Optional[str] = None):
+    """
+    Where a player's mods rank among every player evaluated so far: for each
+    slot and dots, the mean of each secondary (and of efficiency) over the
+    player's mods and its percentile among other players' means
+    """
+    if stat_distributions is None:
+        raise HTTPException(status_code=404, detail="Stat distributions are disabled")
+    if not ally_code.isdigit() or len(ally_code) != 9:
+        raise HTTPException(status_code=400, detail="Ally code must be exactly 9 digits")
+    try:
+        parsed_metric = parse_metric(metric) if metric is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        prewarm_scheduler.record(ally_code)
+        body = await load_player_body(ally_code)
+        with metrics.span("stat_percentiles"):
+            samples = await cpu_executor.run(samples_from_body, body)
+            if parsed_metric is not None:
+                samples = {key: values for key, values in samples.items() if key[1] == parsed_metric}
+            ranked = await asyncio.to_thread(stat_distributions.rank_roster, samples)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Percentiles failed for ally code {ally_code}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    return Response(content=orjson.dumps({"success": True, "allyCode": ally_code,
+                                          "snapshot": body_snapshot_version(body), "percentiles": ranked}),
+                    media_type="application/json")
+
+@app.post("/api/guild/evaluate")
+async def evaluate_guild(request: GuildEvaluationRequest):
+    """Evaluate many players at once (explicit ally codes or a guild's members)"""
+    members: List[dict] = []
+
+    if request.allyCodes:
+        for ally_code in dict.fromkeys(request.allyCodes):
+            if not ally_code.isdigit() or len(ally_code) != 9:
+                raise HTTPException(status_code=400, detail=f"Invalid ally code: {ally_code}")
+            members.append({"allyCode": ally_code})
+    elif request.guildId:
+        guild_data = await api_client.fetch_guild_data(request.guildId)
+        if guild_data is None:
+            raise HTTPException(status_code=503, detail="Failed to fetch guild data from SWGOH API")
+        for member in guild_data.get("guild", {}).get("member", []):
+            if member.get("playerId"):
+                members.append({"playerId": member["playerId"], "playerName": member.get("playerName")})
+    else:
+        raise HTTPException(status_code=400, detail="Provide allyCodes or guildId")
+
+    if len(members) > settings.GUILD_MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.GUILD_MAX_PLAYERS} players per request")
+
+    semaphore = asyncio.Semaphore(settings.GUILD_FETCH_CONCURRENCY)
+
+    async def evaluate_member(member: dict):
+        async with semaphore:
+            try:
+                body = await load_player_body(member.get("allyCode"), member.get("playerId"))
+                return member, body, None
+            except HTTPException as e:
+                return member, None, e.detail
+            except Exception as e:
+                logger.error(f"Guild evaluation failed for {member}: {str(e)}")
+                return member, None, "Internal server error"
+
+    results = await asyncio.gather(*[evaluate_member(member) for member in members])
+
+    summaries = []
+    player_chunks = []
+    failed = []
+    for member, body, error in results:
+        if body is None:
+            failed.append({**member, "error": error})
+            continue
+        summary = summarize_player(orjson.loads(body))
+        summaries.append(summary)
+        if request.includeMods:
+            # Splice the cached bytes in as-is instead of re-encoding each roster
+            player_chunks.append(b'{"summary":' + orjson.dumps(summary) + b',"player":' + body + b'}')
+        else:
+            player_chunks.append(orjson.dumps(summary))
+
+    head = orjson.dumps({
+        "success": True,
+        "guildId": request.guildId,
+        "guild": aggregate_guild(summaries),
+        "failed": failed
+    })
+    body = head[:-1] + b',"players":[' + b",".join(player_chunks) + b"]}"
+    return Response(content=body, media_type="application/json")
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
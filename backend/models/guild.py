@@ -0,0 +1,9 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class GuildEvaluationRequest(BaseModel):
+    # Either explicit ally codes or a Comlink guild ID whose members are evaluated
+    allyCodes: Optional[List[str]] = None
+    guildId: Optional[str] = None
+    # Embed each player's full /api/player response next to its summary
+    includeMods: bool = False
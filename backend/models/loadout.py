@@ -0,0 +1,23 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+class LoadoutGoalRequest(BaseModel):
+    character: str
+    # Stat id -> weight of that stat's total to maximize (default: speed)
+    weights: Dict[int, float] = {5: 1.0}
+    # Full set bonuses to complete, by name or id; name a 2-piece set twice to get it twice
+    sets: List[str] = []
+    # Slot (name or id) -> required primary stat id
+    primaries: Dict[str, int] = {}
+    # Stat id -> minimum total over the character's mods
+    minimums: Dict[int, float] = {}
+
+class LoadoutRequest(BaseModel):
+    # In priority order: earlier characters pick first, later ones can't reuse their mods
+    characters: List[LoadoutGoalRequest]
+    # Never take mods equipped on these characters
+    protectedCharacters: List[str] = []
+    # Only reshuffle mods already on the listed characters
+    listedCharactersOnly: bool = False
+    # Search time for the whole request; the best loadouts found by then are returned
+    timeBudgetMs: Optional[int] = None
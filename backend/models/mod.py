@@ -1,39 +1,58 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
-
-class SecondaryStat(BaseModel):
-    unitStatId: int
-    value: float
-    rolls: int
-    unscaledRollValue: Optional[List[str]] = []
-    statRollerBoundsMin: Optional[str] = ""
-    statRollerBoundsMax: Optional[str] = ""
-
-class PrimaryStat(BaseModel):
-    unitStatId: int
-    value: float
-
-class ProcessedMod(BaseModel):
-    id: str
-    definitionId: str
-    level: int
-    tier: int
-    locked: bool
-    characterId: str
-    characterDisplayName: str  # ADD THIS LINE
-    primaryStat: PrimaryStat
-    secondaryStats: List[SecondaryStat]
-    
-    # Additional metadata for processing
-    dots: int
-    set_type: str
-    slot_type: str
-    tier_name: str
-
-class PlayerData(BaseModel):
-    playerName: str
-    allyCode: str
-    lastUpdated: str
-    mods: List[ProcessedMod]
-    totalMods: int
-    processedMods: int
\ No newline at end of file
+from typing import List, Optional
+
+# Lightweight representation used between ModProcessor and EvaluationEngine.
+# Comlink data is trusted, so these skip validation; Pydantic models are
+# only used for request bodies (models/guild.py, models/loadout.py).
+
+class SecondaryStatRecord:
+    __slots__ = ('unitStatId', 'value', 'rolls', 'unscaledRollValue', 'statRollerBoundsMin', 'statRollerBoundsMax')
+
+    def __init__(self, unitStatId: int, value: float, rolls: int, unscaledRollValue: Optional[List[str]] = None,
+                 statRollerBoundsMin: Optional[str] = "", statRollerBoundsMax: Optional[str] = ""):
+        self.unitStatId = unitStatId
+        self.value = value
+        self.rolls = rolls
+        self.unscaledRollValue = unscaledRollValue if unscaledRollValue is not None else []
+        self.statRollerBoundsMin = statRollerBoundsMin
+        self.statRollerBoundsMax = statRollerBoundsMax
+
+class PrimaryStatRecord:
+    __slots__ = ('unitStatId', 'value')
+
+    def __init__(self, unitStatId: int, value: float):
+        self.unitStatId = unitStatId
+        self.value = value
+
+class ModRecord:
+    __slots__ = ('id', 'definitionId', 'level', 'tier', 'locked', 'characterId', 'characterDisplayName',
+                 'primaryStat', 'secondaryStats', 'dots', 'set_type', 'slot_type', 'tier_name')
+
+    def __init__(self, id: str, definitionId: str, level: int, tier: int, locked: bool, characterId: str,
+                 characterDisplayName: str, primaryStat: PrimaryStatRecord,
+                 secondaryStats: List[SecondaryStatRecord], dots: int, set_type: str, slot_type: str,
+                 tier_name: str):
+        self.id = id
+        self.definitionId = definitionId
+        self.level = level
+        self.tier = tier
+        self.locked = locked
+        self.characterId = characterId
+        self.characterDisplayName = characterDisplayName
+        self.primaryStat = primaryStat
+        self.secondaryStats = secondaryStats
+        self.dots = dots
+        self.set_type = set_type
+        self.slot_type = slot_type
+        self.tier_name = tier_name
+
+class PlayerRecord:
+    __slots__ = ('playerName', 'allyCode', 'lastUpdated', 'mods', 'totalMods', 'processedMods')
+
+    def __init__(self, playerName: str, allyCode: str, lastUpdated: str, mods: List[ModRecord],
+                 totalMods: int, processedMods: int):
+        self.playerName = playerName
+        self.allyCode = allyCode
+        self.lastUpdated = lastUpdated
+        self.mods = mods
+        self.totalMods = totalMods
+        self.processedMods = processedMods
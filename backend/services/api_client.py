@@ -1,79 +1,165 @@
-import requests
+import asyncio
+import aiohttp
 from typing import Dict, Any, Optional
 import logging
+from services.comlink_stream import PlayerModParser
+from services.metrics import metrics
+
+metrics.describe("swgoh_comlink_errors_total", "Failed Comlink requests by endpoint and kind")
 
 logger = logging.getLogger(__name__)
 
 class SWGOHAPIClient:
-    def __init__(self, api_url: str):
+    # Read size when parsing a player response as it arrives
+    STREAM_CHUNK_BYTES = 65536
+
+    def __init__(
+        self,
+        api_url: str,
+        max_connections: int = 20,
+        max_concurrent_requests: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        keepalive_timeout: float = 30.0,
+        stream_player_mods: bool = False
+    ):
         self.api_url = api_url
-        self.timeout = 30  # 30 second timeout
-        
-    async def fetch_player_data(self, ally_code: str) -> Optional[Dict[str, Any]]:
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=connect_timeout,
+            sock_read=read_timeout
+        )
+        self.max_connections = max_connections
+        self.max_concurrent_requests = max_concurrent_requests
+        self.keepalive_timeout = keepalive_timeout
+        # Parse player responses incrementally, keeping only what the evaluator reads
+        self.stream_player_mods = stream_player_mods
+
+        # Created lazily so the session is bound to the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._session
+
+    def _endpoint_url(self, endpoint: str) -> str:
+        # api_url is the Comlink base URL, possibly configured with a trailing /player
+        base = self.api_url.rstrip('/')
+        if base.endswith('/player'):
+            base = base[:-len('/player')]
+        return f"{base}/{endpoint}"
+
+    async def close(self) -> None:
+        """Close the shared connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Closed SWGOH API connection pool")
+        self._session = None
+        self._semaphore = None
+
+    async def fetch_player_data(self, ally_code: Optional[str] = None, player_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch raw player data from SWGOH API
-        
+
         Args:
             ally_code: 9-digit ally code string
-            
+            player_id: Comlink player ID, used when the ally code is unknown (guild members)
+
         Returns:
-            Raw API response as dictionary, or None if failed
+            Raw API response as dictionary, or None if failed. With
+            stream_player_mods only name, allyCode, playerId and each unit's
+            definitionId and equippedStatMod are kept.
         """
         # SWGOH Comlink expects this specific payload structure
+        payload = {
+            "payload": {"allyCode": ally_code} if ally_code else {"playerId": player_id},
+            "enums": False
+        }
+        target = f"ally code: {ally_code}" if ally_code else f"player id: {player_id}"
+        return await self._post("player", payload, target, stream=self.stream_player_mods)
+
+    async def fetch_guild_data(self, guild_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch raw guild data (profile and member list) from SWGOH API
+
+        Returns:
+            Raw API response as dictionary, or None if failed
+        """
         payload = {
             "payload": {
-                "allyCode": ally_code
+                "guildId": guild_id,
+                "includeRecentGuildActivityInfo": False
             },
             "enums": False
         }
-        
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
+        return await self._post("guild", payload, f"guild id: {guild_id}")
+
+    async def _post(self, endpoint: str, payload: Dict[str, Any], target: str,
+                    stream: bool = False) -> Optional[Dict[str, Any]]:
+        """POST a Comlink request through the shared pool; logs and returns None on any failure"""
         try:
-            logger.info(f"Fetching player data for ally code: {ally_code}")
-            
-            # The URL should be just the base URL, not including /player
-            url = self.api_url
-            if not url.endswith('/player'):
-                url = f"{url}/player"
-                
+            logger.info(f"Fetching {endpoint} data for {target}")
+
+            session = self._get_session()
+            url = self._endpoint_url(endpoint)
             logger.debug(f"Making request to: {url}")
-            
-            response = requests.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=self.timeout
-            )
-            
-            # Check if request was successful
-            response.raise_for_status()
-            
-            data = response.json()
-            logger.info(f"Successfully fetched data for ally code: {ally_code}")
-            
+
+            async with self._semaphore:
+                with metrics.span(f"comlink_{endpoint}"):
+                    async with session.post(url, json=payload) as response:
+                        # Check if request was successful
+                        if response.status >= 400:
+                            logger.error(f"HTTP error {response.status} for {target}")
+                            metrics.inc("swgoh_comlink_errors_total", endpoint=endpoint, kind=f"http_{response.status}")
+                            body = await response.text()
+                            if body:
+                                logger.error(f"Response body: {body}")
+                            return None
+
+                        if stream:
+                            data = await self._read_player_mods(response)
+                        else:
+                            data = await response.json(content_type=None)
+
+            logger.info(f"Successfully fetched data for {target}")
+
             return data
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout while fetching data for ally code: {ally_code}")
-            return None
-            
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Connection error while fetching data for ally code: {ally_code}. Error: {str(e)}")
+
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout while fetching data for {target}")
+            metrics.inc("swgoh_comlink_errors_total", endpoint=endpoint, kind="timeout")
             return None
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error {e.response.status_code} for ally code: {ally_code}")
-            if e.response.text:
-                logger.error(f"Response body: {e.response.text}")
+
+        except aiohttp.ClientConnectionError as e:
+            logger.error(f"Connection error while fetching data for {target}. Error: {str(e)}")
+            metrics.inc("swgoh_comlink_errors_total", endpoint=endpoint, kind="connection")
             return None
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error for ally code {ally_code}: {str(e)}")
+
+        except aiohttp.ClientError as e:
+            logger.error(f"Request error for {target}: {str(e)}")
+            metrics.inc("swgoh_comlink_errors_total", endpoint=endpoint, kind="client")
             return None
-            
+
         except ValueError as e:
-            logger.error(f"JSON decode error for ally code {ally_code}: {str(e)}")
-            return None
\ No newline at end of file
+            logger.error(f"JSON decode error for {target}: {str(e)}")
+            metrics.inc("swgoh_comlink_errors_total", endpoint=endpoint, kind="decode")
+            return None
+
+    async def _read_player_mods(self, response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """Parse the body chunk by chunk while it is still arriving; raises ValueError if malformed"""
+        parser = PlayerModParser()
+        async for chunk in response.content.iter_chunked(self.STREAM_CHUNK_BYTES):
+            parser.feed(chunk)
+        return parser.close()
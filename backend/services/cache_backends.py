@@ -0,0 +1,384 @@
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+def estimate_size(obj: Any) -> int:
+    """Approximate resident size in bytes of a JSON-like object tree"""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+class CacheBackend:
+    """
+    Storage behind CacheManager
+
+    Backends only store and evict; TTL checks and hit/miss accounting stay in
+    CacheManager so every backend behaves the same to callers. Timestamps are
+    wall-clock seconds so entries can be shared between processes.
+    """
+
+    name = "base"
+    # Whether calls do file I/O, so async code should make them off the event loop
+    blocking = False
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (data, stored_at) and mark the key as recently used"""
+        raise NotImplementedError
+
+    def set(self, key: str, data: Any, stored_at: float) -> bool:
+        """Store data, evicting least recently used entries; False if not stored"""
+        raise NotImplementedError
+
+    def stored_at(self, key: str) -> Optional[float]:
+        """When key was stored, without reading its payload or touching LRU order"""
+        raise NotImplementedError
+
+    def set_variants(self, key: str, variants: Dict[str, bytes], stored_at: float) -> bool:
+        """
+        Attach encoding -> bytes copies to the entry key, if it is still the one
+        stored at stored_at. They belong to the entry: not counted against
+        max_entries (their bytes are), and gone when it is replaced or removed.
+        """
+        raise NotImplementedError
+
+    def get_variant(self, key: str, encoding: str) -> Optional[bytes]:
+        """Copy attached to the current entry for key, without touching LRU order"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def sweep(self, expires_before: float) -> int:
+        """Delete entries stored before expires_before, returns how many"""
+        raise NotImplementedError
+
+    def count(self, expires_before: float) -> Tuple[int, int]:
+        """Return (total entries, expired entries)"""
+        raise NotImplementedError
+
+    def resident_bytes(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU dict, sized by an object-tree estimate"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 500, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(max_entries, max_bytes)
+        # key -> (data, stored_at, size); ordered from least to most recently used
+        self.entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        # key -> encoding -> bytes; their size is part of the entry's
+        self.variants: Dict[str, Dict[str, bytes]] = {}
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self.entries.pop(key)
+        self.variants.pop(key, None)
+        self._bytes -= size
+
+    def _evict_over_limits(self) -> None:
+        while self.entries and (len(self.entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+            logger.info(f"Evicted least recently used key: {oldest}")
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def set(self, key: str, data: Any, stored_at: float) -> bool:
+        size = estimate_size(data)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching key {key}: {size} bytes exceeds cache limit of {self.max_bytes}")
+            return False
+
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (data, stored_at, size)
+        self._bytes += size
+        self._evict_over_limits()
+        return True
+
+    def stored_at(self, key: str) -> Optional[float]:
+        entry = self.entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def set_variants(self, key: str, variants: Dict[str, bytes], stored_at: float) -> bool:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] != stored_at:
+            return False
+        data, _, size = entry
+        previous = self.variants.get(key)
+        if previous is not None:
+            size -= estimate_size(previous)
+        added = estimate_size(variants)
+        self.variants[key] = dict(variants)
+        self.entries[key] = (data, stored_at, size + added)
+        self._bytes += size + added - entry[2]
+        self._evict_over_limits()
+        return key in self.entries
+
+    def get_variant(self, key: str, encoding: str) -> Optional[bytes]:
+        return self.variants.get(key, {}).get(encoding)
+
+    def delete(self, key: str) -> None:
+        if key in self.entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.variants.clear()
+        self._bytes = 0
+
+    def sweep(self, expires_before: float) -> int:
+        expired_keys = [key for key, entry in self.entries.items() if entry[1] < expires_before]
+        for key in expired_keys:
+            self._remove(key)
+        return len(expired_keys)
+
+    def count(self, expires_before: float) -> Tuple[int, int]:
+        expired = sum(1 for entry in self.entries.values() if entry[1] < expires_before)
+        return len(self.entries), expired
+
+    def resident_bytes(self) -> int:
+        return self._bytes
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache in a local SQLite file, shared by every worker that opens the same path
+
+    Payloads are stored zlib-compressed: compact JSON for objects, as-is for
+    pre-encoded bytes. Variants (already compressed) are kept uncompressed in
+    a side table keyed by their entry. The file runs in WAL mode so readers
+    in other workers are not blocked by a writer. A read only writes back
+    last_access when the stored one is touch_seconds old or more, so hot
+    keys don't turn every hit into a write.
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 5000, max_bytes: int = 512 * 1024 * 1024,
+                 compression_level: int = 6, touch_seconds: float = 60):
+        super().__init__(max_entries, max_bytes)
+        self.path = path
+        self.compression_level = compression_level
+        self.touch_seconds = touch_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored_at ON cache_entries (stored_at)")
+        # An entry's size in cache_entries includes its variants' bytes
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_variants (
+                key TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (key, encoding)
+            )
+        """)
+
+    def _encode(self, data: Any) -> bytes:
+        # One tag byte: b"B" for pre-encoded bytes payloads, b"J" for JSON-able objects
+        if isinstance(data, (bytes, bytearray)):
+            return b"B" + zlib.compress(data, self.compression_level)
+        return b"J" + zlib.compress(json.dumps(data, separators=(',', ':')).encode(), self.compression_level)
+
+    def _decode(self, payload: bytes) -> Any:
+        body = zlib.decompress(payload[1:])
+        if payload[:1] == b"B":
+            return body
+        return json.loads(body)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, stored_at, last_access FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] >= self.touch_seconds:
+                self._conn.execute("UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key))
+        return self._decode(row[0]), row[1]
+
+    def set(self, key: str, data: Any, stored_at: float) -> bool:
+        payload = self._encode(data)
+        if len(payload) > self.max_bytes:
+            logger.warning(f"Not caching key {key}: {len(payload)} bytes exceeds cache limit of {self.max_bytes}")
+            return False
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM cache_variants WHERE key = ?", (key,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, payload, stored_at, last_access, size) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, stored_at, time.time(), len(payload))
+                )
+                self._evict_over_limits()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _evict_over_limits(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM cache_entries ORDER BY last_access").fetchall()
+        victims = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+        self._conn.executemany("DELETE FROM cache_variants WHERE key = ?", victims)
+        self.evictions += len(victims)
+        logger.info(f"Evicted {len(victims)} least recently used cache entries")
+
+    def stored_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT stored_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_variants(self, key: str, variants: Dict[str, bytes], stored_at: float) -> bool:
+        added = sum(len(compressed) for compressed in variants.values())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT stored_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                if row is None or row[0] != stored_at:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                replaced = self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM cache_variants WHERE key = ?", (key,)
+                ).fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_variants (key, encoding, payload) VALUES (?, ?, ?)",
+                    [(key, encoding, compressed) for encoding, compressed in variants.items()]
+                )
+                self._conn.execute("UPDATE cache_entries SET size = size + ? WHERE key = ?", (added - replaced, key))
+                self._evict_over_limits()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def get_variant(self, key: str, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM cache_variants WHERE key = ? AND encoding = ?", (key, encoding)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM cache_variants WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.execute("DELETE FROM cache_variants")
+
+    def sweep(self, expires_before: float) -> int:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_variants WHERE key IN (SELECT key FROM cache_entries WHERE stored_at < ?)",
+                (expires_before,)
+            )
+            cursor = self._conn.execute("DELETE FROM cache_entries WHERE stored_at < ?", (expires_before,))
+        return cursor.rowcount
+
+    def count(self, expires_before: float) -> Tuple[int, int]:
+        with self._lock:
+            total, expired = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_at < ?), 0) FROM cache_entries", (expires_before,)
+            ).fetchone()
+        return total, expired
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def create_cache_backend(
+    backend: str,
+    max_entries: int,
+    max_bytes: int,
+    sqlite_path: str = "",
+    compression_level: int = 6,
+    touch_seconds: float = 60
+) -> CacheBackend:
+    """Build the cache backend named in settings"""
+    if backend == "memory":
+        return MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+    if backend == "sqlite":
+        return SQLiteCacheBackend(
+            sqlite_path,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            compression_level=compression_level,
+            touch_seconds=touch_seconds
+        )
+    raise ValueError(f"Unknown cache backend: {backend}")
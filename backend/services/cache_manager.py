@@ -1,66 +1,193 @@
-from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, Optional, Tuple
+import asyncio
+import threading
+import time
 import logging
+from services.cache_backends import CacheBackend, MemoryCacheBackend
 
 logger = logging.getLogger(__name__)
 
 class CacheManager:
-    def __init__(self, ttl_hours: int = 1):
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.ttl = timedelta(hours=ttl_hours)
-    
+    def __init__(
+        self,
+        ttl_hours: float = 1,
+        max_entries: int = 500,
+        max_bytes: int = 256 * 1024 * 1024,
+        sweep_interval_seconds: float = 60,
+        backend: Optional[CacheBackend] = None,
+        stale_seconds: float = 0
+    ):
+        self.backend = backend or MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes)
+        self.ttl_seconds = ttl_hours * 3600
+        # Entries past the TTL are kept this much longer so lookup() can serve them stale
+        self.stale_seconds = stale_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+
+        # call() runs lookups on worker threads for blocking backends, so
+        # counters are only updated (and read together) under this lock
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.variant_hits = 0
+        self.variant_misses = 0
+        self._last_sweep = time.monotonic()
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Call fn (a method of this cache, or anything reading it) from async code, off the loop if the backend does file I/O"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
     def get(self, key: str) -> Optional[Dict[str, Any]]:
         """Get cached data if still valid"""
-        if key not in self.cache:
-            logger.info(f"Cache miss for key: {key}")
+        data, _ = self._lookup(key, allow_stale=False)
+        return data
+
+    def peek(self, key: str) -> Optional[Any]:
+        """
+        Cached data, stale or not, without counting a hit or miss
+
+        For entries derived from another one (a different encoding of a body
+        already looked up), so one request doesn't count twice.
+        """
+        entry = self.backend.get(key)
+        if entry is None or time.time() - entry[1] > self.ttl_seconds + self.stale_seconds:
             return None
-        
-        cached_item = self.cache[key]
-        cached_time = cached_item.get('timestamp')
-        
-        if not cached_time or datetime.now() - cached_time > self.ttl:
+        return entry[0]
+
+    def lookup(self, key: str) -> Tuple[Optional[Any], bool]:
+        """
+        Get cached data for stale-while-revalidate: returns (data, stale)
+
+        Entries past the TTL but within stale_seconds come back with
+        stale=True; the caller serves them and refreshes in the background.
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key: str, allow_stale: bool) -> Tuple[Optional[Any], bool]:
+        entry = self.backend.get(key)
+        if entry is None:
+            with self._stats_lock:
+                self.misses += 1
+            logger.info(f"Cache miss for key: {key}")
+            return None, False
+
+        data, stored_at = entry
+        age = time.time() - stored_at
+        if age > self.ttl_seconds + self.stale_seconds:
             logger.info(f"Cache expired for key: {key}")
-            del self.cache[key]
-            return None
-        
+            self.backend.delete(key)
+            with self._stats_lock:
+                self.expirations += 1
+                self.misses += 1
+            return None, False
+
+        if age > self.ttl_seconds:
+            if not allow_stale:
+                # Kept for stale readers; a fresh-only lookup treats it as a miss
+                with self._stats_lock:
+                    self.misses += 1
+                logger.info(f"Cache stale for key: {key}")
+                return None, False
+            with self._stats_lock:
+                self.stale_hits += 1
+            logger.info(f"Cache stale hit for key: {key}")
+            return data, True
+
+        with self._stats_lock:
+            self.hits += 1
         logger.info(f"Cache hit for key: {key}")
-        return cached_item.get('data')
-    
-    def set(self, key: str, data: Dict[str, Any]) -> None:
-        """Cache data with timestamp"""
-        self.cache[key] = {
-            'data': data,
-            'timestamp': datetime.now()
-        }
-        logger.info(f"Cached data for key: {key}")
-    
+        return data, False
+
+    def expires_in(self, key: str) -> Optional[float]:
+        """Seconds until key passes its TTL (negative once stale), None if not cached"""
+        stored_at = self.backend.stored_at(key)
+        if stored_at is None:
+            return None
+        return stored_at + self.ttl_seconds - time.time()
+
+    def set(self, key: str, data: Dict[str, Any]) -> Optional[float]:
+        """
+        Cache data with timestamp, evicting least recently used entries over the
+        limits; returns the timestamp (what set_variants ties copies to), None if not stored
+        """
+        stored_at = time.time()
+        stored = self.backend.set(key, data, stored_at)
+        if stored:
+            logger.info(f"Cached data for key: {key}")
+
+        if time.monotonic() - self._last_sweep >= self.sweep_interval_seconds:
+            self.sweep_expired()
+        return stored_at if stored else None
+
+    def set_variants(self, key: str, variants: Dict[str, bytes], stored_at: float) -> bool:
+        """
+        Store compressed copies of the entry key held at stored_at
+
+        They live inside that entry, so they expire and are evicted with it;
+        if the entry was replaced meanwhile the copies are stale and dropped.
+        """
+        return self.backend.set_variants(key, variants, stored_at)
+
+    def get_variant(self, key: str, encoding: str) -> Optional[bytes]:
+        """Compressed copy of the current entry for key, if one was stored with it"""
+        compressed = self.backend.get_variant(key, encoding)
+        if compressed is None:
+            with self._stats_lock:
+                self.variant_misses += 1
+            return None
+        with self._stats_lock:
+            self.variant_hits += 1
+        return compressed
+
+    def sweep_expired(self) -> int:
+        """Drop every expired entry, returns how many were removed"""
+        self._last_sweep = time.monotonic()
+        removed = self.backend.sweep(time.time() - self.ttl_seconds - self.stale_seconds)
+        with self._stats_lock:
+            self.expirations += removed
+        if removed:
+            logger.info(f"Swept {removed} expired cache entries")
+        return removed
+
     def clear(self, key: str = None) -> None:
         """Clear specific key or entire cache"""
         if key:
-            if key in self.cache:
-                del self.cache[key]
-                logger.info(f"Cleared cache for key: {key}")
+            self.backend.delete(key)
+            logger.info(f"Cleared cache for key: {key}")
         else:
-            self.cache.clear()
+            self.backend.clear()
             logger.info("Cleared entire cache")
-    
+
+    def close(self) -> None:
+        self.backend.close()
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total_items = len(self.cache)
-        valid_items = 0
-        expired_items = 0
-        
-        now = datetime.now()
-        for item in self.cache.values():
-            cached_time = item.get('timestamp')
-            if cached_time and now - cached_time <= self.ttl:
-                valid_items += 1
-            else:
-                expired_items += 1
-        
+        total_items, expired_items = self.backend.count(time.time() - self.ttl_seconds)
+        with self._stats_lock:
+            hits, stale_hits, misses = self.hits, self.stale_hits, self.misses
+            expirations, variant_hits, variant_misses = self.expirations, self.variant_hits, self.variant_misses
+        lookups = hits + stale_hits + misses
+
         return {
+            'backend': self.backend.name,
             'total_items': total_items,
-            'valid_items': valid_items,
+            'valid_items': total_items - expired_items,
             'expired_items': expired_items,
-            'ttl_hours': self.ttl.total_seconds() / 3600
-        }
\ No newline at end of file
+            'ttl_hours': self.ttl_seconds / 3600,
+            'stale_seconds': self.stale_seconds,
+            'hits': hits,
+            'stale_hits': stale_hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.backend.evictions,
+            'expirations': expirations,
+            'variant_hits': variant_hits,
+            'variant_misses': variant_misses,
+            'resident_bytes': self.backend.resident_bytes(),
+            'max_items': self.backend.max_entries,
+            'max_bytes': self.backend.max_bytes
+        }
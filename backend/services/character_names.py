@@ -0,0 +1,113 @@
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+import threading
+import time
+import logging
+from services.db_connection import DatabaseConnection
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class CharacterNameIndex:
+    """
+    Process-wide character display names for every language
+
+    Loaded in one query from character_catalog + localization and swapped in
+    atomically on refresh, so lookups never wait on the database. Only IDs the
+    index has never seen fall back to a DB query; async callers resolve them
+    with resolve() first, off the event loop. IDs the DB has no name for are
+    not asked for again until miss_ttl seconds have passed.
+    """
+
+    def __init__(self, db: Optional[DatabaseConnection] = None, miss_ttl: float = 300):
+        self.db = db or DatabaseConnection()
+        # language_code -> game_id -> display name
+        self.names: Dict[str, Dict[str, str]] = {}
+        self.last_refresh: Optional[datetime] = None
+        self.lookups = 0
+        self.fallback_queries = 0
+        self.miss_ttl = miss_ttl
+        # (language_code, game_id) -> when to ask the DB again
+        self._misses: Dict[Tuple[str, str], float] = {}
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Reload the whole index; keeps the previous one if the DB is unavailable"""
+        with self._refresh_lock:
+            try:
+                rows = self.db.get_all_localized_character_names()
+            except Exception as e:
+                logger.error(f"Character name refresh failed, keeping previous index: {e}")
+                return False
+
+            names: Dict[str, Dict[str, str]] = {}
+            for game_id, language_code, name in rows:
+                if name:
+                    names.setdefault(language_code, {})[game_id] = name
+
+            self.names = names
+            self._misses = {}
+            self.last_refresh = datetime.now()
+            logger.info(f"Loaded {sum(len(n) for n in names.values())} character names in {len(names)} languages")
+            return True
+
+    def _unresolved(self, character_ids: List[str], language: str) -> List[str]:
+        """IDs neither in the index nor recently missing from the DB"""
+        known = self.names.get(language, {})
+        now = time.monotonic()
+        unresolved = []
+        for char_id in character_ids:
+            if char_id in known:
+                continue
+            retry_at = self._misses.get((language, char_id))
+            if retry_at is not None and retry_at > now:
+                continue
+            unresolved.append(char_id)
+        return unresolved
+
+    def _remember(self, unresolved: List[str], resolved: Dict[str, str], language: str) -> None:
+        language_names = self.names.setdefault(language, {})
+        retry_at = time.monotonic() + self.miss_ttl
+        for char_id in unresolved:
+            name = resolved.get(char_id, char_id)
+            if name != char_id:
+                language_names[char_id] = name
+                self._misses.pop((language, char_id), None)
+            else:
+                # No name (or the DB failed): use the ID for a while rather than querying on every roster
+                self._misses[(language, char_id)] = retry_at
+
+    async def resolve(self, character_ids: List[str], language: str = 'Loc_ENG_US') -> None:
+        """Look up IDs the index doesn't know on a worker thread, so get_names won't query for them"""
+        unresolved = self._unresolved(character_ids, language)
+        if not unresolved:
+            return
+        self.fallback_queries += 1
+        logger.info(f"Resolving {len(unresolved)} unknown character names from the database")
+        with metrics.span("name_db_fallback"):
+            resolved = await self.db.get_all_character_names_async(unresolved, language)
+        self._remember(unresolved, resolved, language)
+
+    def get_names(self, character_ids: List[str], language: str = 'Loc_ENG_US') -> Dict[str, str]:
+        """Map base character IDs to display names, falling back to the ID itself"""
+        self.lookups += 1
+        unresolved = self._unresolved(character_ids, language)
+        if unresolved:
+            self.fallback_queries += 1
+            logger.info(f"Resolving {len(unresolved)} unknown character names from the database")
+            with metrics.span("name_db_fallback"):
+                resolved = self.db.get_all_character_names(unresolved, language)
+            self._remember(unresolved, resolved, language)
+
+        known = self.names.get(language, {})
+        return {char_id: known.get(char_id, char_id) for char_id in character_ids}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'languages': len(self.names),
+            'names': sum(len(n) for n in self.names.values()),
+            'last_refresh': self.last_refresh.isoformat() if self.last_refresh else None,
+            'lookups': self.lookups,
+            'fallback_queries': self.fallback_queries,
+            'unresolved_ids': len(self._misses)
+        }
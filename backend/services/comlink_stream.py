@@ -0,0 +1,190 @@
+from typing import Any, Dict, List, Optional
+import codecs
+import json
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Everything of a Comlink player response that the evaluator reads
+PLAYER_KEYS = ("name", "allyCode", "playerId")
+UNIT_KEYS = ("definitionId", "equippedStatMod")
+MOD_KEYS = frozenset(("id", "definitionId", "level", "tier", "locked", "primaryStat", "secondaryStat"))
+STAT_KEYS = frozenset(("unitStatId", "statValueDecimal"))
+SECONDARY_KEYS = frozenset(("stat", "statRolls", "unscaledRollValue", "statRollerBoundsMin", "statRollerBoundsMax"))
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_scan_once = json.JSONDecoder().scan_once
+
+class _NeedMore(Exception):
+    """The buffered text ends inside the current token"""
+
+def prune_mod(mod: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop, in place, the fields of a raw mod that ModProcessor never reads"""
+    for key in [key for key in mod if key not in MOD_KEYS]:
+        del mod[key]
+    primary = mod.get("primaryStat")
+    if isinstance(primary, dict):
+        for key in [key for key in primary if key != "stat"]:
+            del primary[key]
+        _prune_stat(primary.get("stat"))
+    for secondary in mod.get("secondaryStat") or ():
+        if isinstance(secondary, dict):
+            for key in [key for key in secondary if key not in SECONDARY_KEYS]:
+                del secondary[key]
+            _prune_stat(secondary.get("stat"))
+    return mod
+
+def _prune_stat(stat: Any) -> None:
+    if isinstance(stat, dict) and len(stat) > len(STAT_KEYS):
+        for key in [key for key in stat if key not in STAT_KEYS]:
+            del stat[key]
+
+class PlayerModParser:
+    """
+    Incremental parser for a Comlink `player` response that keeps only mod data
+
+    feed() takes the body chunk by chunk as it arrives and close() returns
+    {name, allyCode, playerId, rosterUnit: [{definitionId, equippedStatMod}]}
+    with every mod pruned to the fields ModProcessor reads. The rest of the
+    player (skills, gear, profile stats, datacrons, ...) is skipped without
+    being kept, and the body is never held in full, so peak memory is one
+    chunk plus the pruned mods instead of the body plus the whole tree.
+
+    Values are decoded with the json module's C scanner. A token cut off by
+    the end of the buffer is retried once enough of the next chunks has
+    arrived.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._pos = 0
+        self._closed = False
+        # Buffered length needed before retrying a token that didn't fit
+        self._retry_at = 0
+        self._state = "start"
+        self._result: Dict[str, Any] = {}
+        self._units: List[Dict[str, Any]] = []
+        self.bytes_received = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        self._text += self._decoder.decode(chunk)
+        if len(self._text) >= self._retry_at:
+            self._parse()
+
+    def close(self) -> Dict[str, Any]:
+        self._text += self._decoder.decode(b"", final=True)
+        self._closed = True
+        self._parse()
+        if self._state != "done":
+            raise ValueError(f"Incomplete Comlink player response ({self.bytes_received} bytes)")
+        return self._result
+
+    def _skip_whitespace(self) -> str:
+        text, pos = self._text, self._pos
+        if pos < len(text) and text[pos] not in " \t\n\r":
+            return text[pos]
+        self._pos = pos = _WHITESPACE.match(text, pos).end()
+        if pos >= len(text):
+            raise _NeedMore
+        return text[pos]
+
+    def _value(self) -> Any:
+        """Decode the JSON value at the current position"""
+        text = self._text
+        try:
+            value, end = _scan_once(text, self._pos)
+        except StopIteration:
+            if self._closed:
+                raise ValueError(f"Expected a JSON value at offset {self._pos}")
+            raise _NeedMore
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            raise _NeedMore
+        # A number or literal running to the end of the buffer may continue in the next chunk
+        if end >= len(text) and not self._closed:
+            raise _NeedMore
+        self._pos = end
+        return value
+
+    def _key(self) -> str:
+        """Decode `"key":` at the current position"""
+        start = self._pos
+        key = self._value()
+        if not isinstance(key, str):
+            raise ValueError(f"Expected an object key at offset {start}")
+        if self._skip_whitespace() != ":":
+            raise ValueError(f"Expected ':' at offset {self._pos}")
+        self._pos += 1
+        self._skip_whitespace()
+        return key
+
+    def _expect(self, char: str) -> None:
+        if self._skip_whitespace() != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def _parse(self) -> None:
+        committed = self._pos
+        try:
+            while self._state != "done":
+                self._step()
+                committed = self._pos
+        except _NeedMore:
+            # Back to the last complete token; retry once twice as much is buffered
+            self._pos = committed
+            self._retry_at = len(self._text) + max(len(self._text) - committed, 4096)
+        self._text = self._text[committed:]
+        self._pos = 0
+        self._retry_at -= committed
+
+    def _step(self) -> None:
+        state = self._state
+        if state == "start":
+            self._expect("{")
+            self._state = "player"
+        elif state == "player":
+            char = self._skip_whitespace()
+            if char == "}":
+                self._pos += 1
+                self._state = "done"
+            elif char == ",":
+                self._pos += 1
+            else:
+                # The key is re-read if its value doesn't fit yet
+                key = self._key()
+                if key == "rosterUnit":
+                    self._expect("[")
+                    self._state = "roster"
+                elif key in PLAYER_KEYS:
+                    self._result[key] = self._value()
+                else:
+                    self._value()
+        elif state == "roster":
+            char = self._skip_whitespace()
+            if char == "]":
+                self._pos += 1
+                self._result["rosterUnit"] = self._units
+                self._state = "player"
+            elif char == ",":
+                self._pos += 1
+            else:
+                # Units are small, so each is decoded whole and only its mods are kept
+                unit = self._value()
+                if isinstance(unit, dict):
+                    mods = unit.get("equippedStatMod")
+                    kept = {key: unit[key] for key in UNIT_KEYS if key in unit}
+                    if isinstance(mods, list):
+                        kept["equippedStatMod"] = [prune_mod(mod) for mod in mods]
+                    self._units.append(kept)
+                else:
+                    self._units.append(unit)
+
+def parse_player_mods(body: bytes) -> Dict[str, Any]:
+    """PlayerModParser over a complete body"""
+    parser = PlayerModParser()
+    parser.feed(body)
+    return parser.close()
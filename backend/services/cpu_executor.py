@@ -0,0 +1,83 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import multiprocessing
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+def _noop() -> None:
+    return None
+
+class CPUExecutor:
+    """
+    Where CPU-bound work runs: inline on the event loop, a thread pool or a process pool
+
+    A thread pool keeps the event loop responsive (the GIL is handed back
+    every few ms) but adds no CPU; a process pool adds cores at the cost of
+    serializing arguments and results. Process workers are spawned rather
+    than forked so they never inherit the event loop or open sockets.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 2,
+                 initializer: Optional[Callable[..., None]] = None, initargs: tuple = ()):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode {mode!r}, expected one of {', '.join(EXECUTOR_MODES)}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu-worker")
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+                initargs=initargs
+            )
+        self.offloaded = 0
+        self.inline = 0
+        self.failed = 0
+        logger.info(f"CPU executor: {mode}" + (f" with {max_workers} workers" if self._pool else ""))
+
+    @property
+    def is_process_pool(self) -> bool:
+        return self.mode == "process"
+
+    async def run(self, fn: Callable[..., Any], *args: Any, inline: bool = False) -> Any:
+        """Run fn(*args) on the pool, or right here when inline or there is no pool"""
+        if self._pool is None or inline:
+            self.inline += 1
+            return fn(*args)
+
+        self.offloaded += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        except Exception:
+            self.failed += 1
+            raise
+
+    async def warm_up(self) -> None:
+        """Start every worker now instead of on the first request"""
+        if self._pool is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._pool, _noop) for _ in range(self.max_workers)])
+
+    def shutdown(self) -> None:
+        """Wait for running work, drop queued work and stop the workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            logger.info("CPU executor shut down")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers if self.mode != "inline" else 0,
+            'offloaded': self.offloaded,
+            'inline': self.inline,
+            'failed': self.failed
+        }
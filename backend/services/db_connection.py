@@ -1,7 +1,9 @@
+import asyncio
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
 import logging
+from services.db_pool import ConnectionPool, get_shared_pool
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +14,49 @@ class DatabaseConnection:
         self.user = os.getenv('POSTGRES_USER', 'postgres')
         self.password = os.getenv('POSTGRES_PASSWORD', 'frmdev1234')
         self.port = os.getenv('POSTGRES_PORT', '5432')
+        self.connect_timeout = int(os.getenv('POSTGRES_CONNECT_TIMEOUT', '5'))
+        self.pool_min_size = int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1'))
+        self.pool_max_size = int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10'))
+        self.pool_acquire_timeout = float(os.getenv('POSTGRES_POOL_ACQUIRE_TIMEOUT', '10'))
         
-    def get_connection(self):
-        """Create and return a database connection"""
+    @property
+    def pool(self) -> ConnectionPool:
+        """Process-wide pool shared by every DatabaseConnection with the same target"""
+        return get_shared_pool(
+            ('postgres', self.host, self.port, self.database, self.user),
+            lambda: ConnectionPool(
+                self._connect,
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                acquire_timeout=self.pool_acquire_timeout,
+                name=f"postgres:{self.database}"
+            )
+        )
+
+    def _connect(self):
+        """Open a new physical database connection"""
         try:
             conn = psycopg2.connect(
                 host=self.host,
                 database=self.database,
                 user=self.user,
                 password=self.password,
-                port=self.port
+                port=self.port,
+                connect_timeout=self.connect_timeout
             )
             return conn
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
-            
+
+    def get_connection(self):
+        """Check out a pooled database connection; hand it back with release_connection"""
+        return self.pool.getconn()
+
+    def release_connection(self, conn) -> None:
+        """Return a connection to the pool"""
+        self.pool.putconn(conn)
+
     def get_character_name(self, base_id: str, language: str = 'Loc_ENG_US') -> str:
         """Get character display name from database"""
         conn = None
@@ -58,7 +87,7 @@ class DatabaseConnection:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
+                self.release_connection(conn)
     
     def get_all_character_names(self, character_ids: list, language: str = 'Loc_ENG_US') -> dict:
         """Get all character display names in one query"""
@@ -105,4 +134,30 @@ class DatabaseConnection:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
\ No newline at end of file
+                self.release_connection(conn)
+
+    def get_all_localized_character_names(self) -> list:
+        """Get (game_id, language_code, name) for every character in every language"""
+        conn = None
+        cursor = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT cc.game_id, l.language_code, l.value
+                FROM character_catalog cc
+                JOIN localization l ON cc.name_key = l.localization_key
+            """)
+
+            return cursor.fetchall()
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                self.release_connection(conn)
+
+    async def get_all_character_names_async(self, character_ids: list, language: str = 'Loc_ENG_US') -> dict:
+        """get_all_character_names on a worker thread, for use from async handlers"""
+        return await asyncio.to_thread(self.get_all_character_names, character_ids, language)
@@ -0,0 +1,246 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(Exception):
+    """No connection became available within the acquire timeout"""
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections (psycopg2 in practice)
+
+    Connections are opened lazily up to max_size; callers beyond that wait up
+    to acquire_timeout for one to be returned. Connections idle for longer than
+    health_check_after are pinged with SELECT 1 on checkout, and idle
+    connections above min_size are closed after max_idle_seconds.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 10.0,
+        health_check_after: float = 30.0,
+        max_idle_seconds: float = 300.0,
+        name: str = "postgres"
+    ):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+        self.max_idle_seconds = max_idle_seconds
+        self.name = name
+
+        # (connection, last returned at); most recently used at the right
+        self._idle: deque = deque()
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self.connections_created = 0
+        self.connections_discarded = 0
+        self.checkouts = 0
+        self.waited_checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+
+    def warm(self) -> None:
+        """Open connections until min_size are available"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def _new_connection(self) -> Any:
+        conn = self._connect()
+        if conn is None:
+            raise ConnectionError(f"Could not open a {self.name} connection")
+        self.connections_created += 1
+        return conn
+
+    def _is_healthy(self, conn: Any, last_used: float) -> bool:
+        if getattr(conn, 'closed', False):
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy {self.name} connection: {e}")
+            return False
+
+    def _close_quietly(self, conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _discard(self, conn: Any) -> None:
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self.connections_discarded += 1
+            self._cond.notify()
+
+    def getconn(self) -> Any:
+        """Check out a healthy connection, waiting if the pool is exhausted"""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+
+        while True:
+            conn = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(f"No {self.name} connection available after {self.acquire_timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                else:
+                    # Reserve a slot, then connect outside the lock
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(conn, last_used):
+                self.health_check_failures += 1
+                self._discard(conn)
+                continue
+
+            wait = time.monotonic() - start
+            with self._cond:
+                self._in_use += 1
+                self.checkouts += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+                if waited:
+                    self.waited_checkouts += 1
+            return conn
+
+    def putconn(self, conn: Any, discard: bool = False) -> None:
+        """Return a connection, rolling back any open transaction"""
+        with self._cond:
+            self._in_use -= 1
+
+        if not discard and not getattr(conn, 'closed', False):
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        if discard:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            self._idle.append((conn, now))
+            # Oldest idle connections sit at the left
+            while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle_seconds:
+                stale.append(self._idle.popleft()[0])
+                self._size -= 1
+                self.connections_discarded += 1
+            self._cond.notify()
+
+        for old in stale:
+            self._close_quietly(old)
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... -- returned to the pool afterwards"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'name': self.name,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'utilization': round(self._in_use / self.max_size, 4) if self.max_size else 0.0,
+                'checkouts': self.checkouts,
+                'waited_checkouts': self.waited_checkouts,
+                'wait_seconds': round(self.total_wait_seconds, 6),
+                'avg_wait_ms': round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+                'timeouts': self.timeouts,
+                'health_check_failures': self.health_check_failures,
+                'connections_created': self.connections_created,
+                'connections_discarded': self.connections_discarded
+            }
+
+_pools: Dict[Hashable, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_shared_pool(key: Hashable, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """One pool per key for the whole process, created on first use"""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+def all_pool_stats() -> list:
+    with _pools_lock:
+        return [pool.get_stats() for pool in _pools.values()]
@@ -1,86 +1,246 @@
-from typing import Dict, Any, List
-from models.mod import ProcessedMod
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from models.mod import ModRecord
+import numpy as np
+import ast
+from itertools import chain, compress
+from operator import attrgetter
+import math
+import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+_SECONDARIES = attrgetter("secondaryStats")
+_STAT_FIELDS = attrgetter("unitStatId", "statRollerBoundsMin", "statRollerBoundsMax", "unscaledRollValue")
+# Space-separated integers that fit in int64, nothing else
+_PLAIN_INTS = re.compile(r"-?[0-9]{1,18}(?: -?[0-9]{1,18})*")
+
+def _parse_ints(strings: Sequence[str]) -> np.ndarray:
+    """int() of each string at once; ValueError unless all are plain decimal integers"""
+    text = " ".join(strings)
+    # One number per string: no string empty, padded or holding several
+    if text.count(" ") != len(strings) - 1 or not _PLAIN_INTS.fullmatch(text):
+        raise ValueError("Roll values are not all plain integers")
+    return np.fromstring(text, dtype=np.int64, sep=" ")
+
+class ModColumns:
+    """
+    Columnar view of the secondary stats and rolls of many mods
+
+    Roller bounds and unscaled roll values are parsed from their Comlink
+    strings exactly once: each kind is joined into one string and parsed by
+    NumPy in C, so building the columns costs little more than collecting
+    the strings. A batch with anything int() would parse differently is
+    parsed stat by stat instead. Stats whose bounds or rolls fail to parse
+    (or have no rolls) are kept with valid=False and no rolls, which
+    reproduces the 0.0 / [] fallbacks of the per-mod path.
+    """
+
+    def __init__(self, mods: Sequence[ModRecord]):
+        # map / attrgetter / chain keep each pass over the stats in C
+        per_mod = list(map(_SECONDARIES, mods))
+        stats = list(chain.from_iterable(per_mod))
+        stats_per_mod = np.fromiter(map(len, per_mod), dtype=np.int64, count=len(mods))
+
+        self.mod_count = len(mods)
+        self.stat_mod = np.repeat(np.arange(len(mods), dtype=np.int64), stats_per_mod)
+        self.mod_stat_offsets = np.concatenate(([0], np.cumsum(stats_per_mod))).astype(np.int64)
+        if stats:
+            stat_ids, mins, maxs, rolls = zip(*map(_STAT_FIELDS, stats))
+        else:
+            stat_ids = mins = maxs = rolls = ()
+        self.stat_ids = np.fromiter(stat_ids, dtype=np.int64, count=len(stats))
+        try:
+            self._parse_bulk(mins, maxs, rolls)
+        except (ValueError, TypeError):
+            # Some string in the batch isn't a plain number: find out which stats, one at a time
+            self._parse_per_stat(stats)
+
+    def _parse_bulk(self, mins: tuple, maxs: tuple, rolls: tuple) -> None:
+        stat_count = len(rolls)
+        # Stats the per-mod path would even try to parse: both bounds and at least one roll
+        parsed = np.fromiter(map(all, zip(mins, maxs, rolls)), dtype=bool, count=stat_count)
+        if not parsed.all():
+            mins, maxs, rolls = (tuple(compress(column, parsed)) for column in (mins, maxs, rolls))
+        roll_counts = np.fromiter(map(len, rolls), dtype=np.int64, count=len(rolls))
+
+        self.stat_min = np.zeros(stat_count, dtype=np.int64)
+        self.stat_max = np.zeros(stat_count, dtype=np.int64)
+        self.stat_valid = parsed
+        if rolls:
+            self.stat_min[parsed] = _parse_ints(mins)
+            self.stat_max[parsed] = _parse_ints(maxs)
+            self.roll_value = _parse_ints(list(chain.from_iterable(rolls)))
+        else:
+            self.roll_value = np.zeros(0, dtype=np.int64)
+        self.roll_stat = np.repeat(np.flatnonzero(parsed), roll_counts)
+
+    def _parse_per_stat(self, stats: list) -> None:
+        stat_min = []
+        stat_max = []
+        stat_valid = []
+        roll_stat = []
+        roll_value = []
+        for stat_index, stat in enumerate(stats):
+            values = None
+            min_bound = max_bound = 0
+            if stat.statRollerBoundsMin and stat.statRollerBoundsMax and stat.unscaledRollValue:
+                try:
+                    min_bound = int(stat.statRollerBoundsMin)
+                    max_bound = int(stat.statRollerBoundsMax)
+                    values = [int(v) for v in stat.unscaledRollValue]
+                except (ValueError, TypeError):
+                    values = None
+
+            stat_min.append(min_bound)
+            stat_max.append(max_bound)
+            stat_valid.append(values is not None)
+            if values is not None:
+                roll_stat.extend([stat_index] * len(values))
+                roll_value.extend(values)
+
+        self.stat_min = np.asarray(stat_min, dtype=np.int64)
+        self.stat_max = np.asarray(stat_max, dtype=np.int64)
+        self.stat_valid = np.asarray(stat_valid, dtype=bool)
+        self.roll_stat = np.asarray(roll_stat, dtype=np.int64)
+        self.roll_value = np.asarray(roll_value, dtype=np.int64)
+
+class BatchEfficiency:
+    """Per-roll, per-stat and per-mod efficiencies for a ModColumns batch"""
+
+    def __init__(self, columns: ModColumns, roll_efficiency: np.ndarray,
+                 stat_efficiency: np.ndarray, mod_efficiency: np.ndarray):
+        self.columns = columns
+        self.roll_efficiency = roll_efficiency
+        self.stat_efficiency = stat_efficiency
+        self.mod_efficiency = mod_efficiency
+
+    def to_mod_results(self) -> List[dict]:
+        """Per-mod dicts in the same shape as EvaluationEngine.calculate_roll_efficiency"""
+        columns = self.columns
+        roll_lists: List[List[float]] = [[] for _ in range(len(columns.stat_mod))]
+        for stat_index, efficiency in zip(columns.roll_stat.tolist(), self.roll_efficiency.tolist()):
+            roll_lists[stat_index].append(efficiency)
+
+        stat_efficiency = self.stat_efficiency.tolist()
+        stat_ids = columns.stat_ids.tolist()
+        offsets = columns.mod_stat_offsets.tolist()
+        overall = self.mod_efficiency.tolist()
+
+        results = []
+        for mod_index in range(columns.mod_count):
+            start, end = offsets[mod_index], offsets[mod_index + 1]
+            individual_stats = {}
+            for i, stat_index in enumerate(range(start, end)):
+                individual_stats[f"stat_{i}"] = {
+                    "efficiency": stat_efficiency[stat_index],
+                    "rollEfficiencies": roll_lists[stat_index],
+                    "unitStatId": stat_ids[stat_index]
+                }
+            results.append({
+                "overall": overall[mod_index],
+                "individual": individual_stats
+            })
+        return results
+
 class EvaluationEngine:
-    
+
     def __init__(self):
 
         pass
 
-    
-    def calculate_roll_efficiency(self, mod: ProcessedMod) -> dict:
+
+    def calculate_roll_efficiency(self, mod: ModRecord) -> dict:
         """Calculate roll quality efficiency - matches frontend exactly"""
         if not mod.secondaryStats:
             return {"overall": 0.0, "individual": {}}
-        
+
         total_efficiency = 0.0
         stat_count = 0
         individual_stats = {}
-        
+
         for i, stat in enumerate(mod.secondaryStats):
-            # Calculate overall efficiency for this stat
-            stat_efficiency = self._calculate_stat_efficiency(stat, mod.dots == 6)
-            
-            # Calculate individual roll efficiencies
+            # Individual roll efficiencies are computed once and averaged for the stat
             individual_rolls = self.calculate_individual_roll_efficiencies(stat)
-            
+            stat_efficiency = self._average(individual_rolls)
+
             if stat_efficiency >= 0:
                 total_efficiency += stat_efficiency
                 stat_count += 1
-            
+
             # Store individual stat data
             individual_stats[f"stat_{i}"] = {
                 "efficiency": stat_efficiency,
                 "rollEfficiencies": individual_rolls,
                 "unitStatId": stat.unitStatId
             }
-        
+
         overall_efficiency = total_efficiency / stat_count if stat_count > 0 else 0.0
-        
+
         return {
             "overall": overall_efficiency,
             "individual": individual_stats
         }
-    
+
+    def calculate_roll_efficiency_batch(self, mods: Sequence[ModRecord]) -> BatchEfficiency:
+        """
+        Vectorized calculate_roll_efficiency for a whole roster (or several
+        concatenated rosters). Sums are accumulated in the same order as the
+        per-mod path, so results are bit-for-bit identical.
+        """
+        return self.calculate_columns_efficiency(ModColumns(mods))
+
+    def calculate_columns_efficiency(self, columns: ModColumns) -> BatchEfficiency:
+        """Per-roll, per-stat and per-mod efficiency for pre-built columns"""
+        stat_count = len(columns.stat_mod)
+
+        # Same integer arithmetic as the per-roll formula, then one float division
+        min_bound = columns.stat_min[columns.roll_stat]
+        range_size = columns.stat_max[columns.roll_stat] - min_bound
+        steps_from_min = columns.roll_value - min_bound
+        roll_efficiency = ((steps_from_min + 1) / (range_size + 1)) * 100
+
+        # bincount accumulates in input order, matching the sequential Python sums
+        roll_totals = np.bincount(columns.roll_stat, weights=roll_efficiency, minlength=stat_count)
+        roll_counts = np.bincount(columns.roll_stat, minlength=stat_count)
+        stat_efficiency = np.zeros(stat_count, dtype=np.float64)
+        has_rolls = roll_counts > 0
+        stat_efficiency[has_rolls] = roll_totals[has_rolls] / roll_counts[has_rolls]
+
+        counted = stat_efficiency >= 0
+        mod_totals = np.bincount(
+            columns.stat_mod, weights=np.where(counted, stat_efficiency, 0.0), minlength=columns.mod_count
+        )
+        mod_counts = np.bincount(columns.stat_mod, weights=counted, minlength=columns.mod_count)
+        mod_efficiency = np.zeros(columns.mod_count, dtype=np.float64)
+        has_stats = mod_counts > 0
+        mod_efficiency[has_stats] = mod_totals[has_stats] / mod_counts[has_stats]
+
+        return BatchEfficiency(columns, roll_efficiency, stat_efficiency, mod_efficiency)
+
+    def _average(self, values: List[float]) -> float:
+        # Explicit loop keeps the summation order (and result) of the original code
+        if not values:
+            return 0.0
+        total = 0.0
+        for value in values:
+            total += value
+        return total / len(values)
+
     def _calculate_stat_efficiency(self, stat, is_6_dot: bool = False) -> float:
         """Calculate efficiency for a single stat - matches frontend logic exactly"""
-        if not stat.statRollerBoundsMin or not stat.statRollerBoundsMax:
-            return 0.0
-        
-        try:
-            min_bound = int(stat.statRollerBoundsMin)
-            max_bound = int(stat.statRollerBoundsMax)
-            
-            # Use unscaledRollValue for accurate per-roll analysis (matches frontend)
-            if stat.unscaledRollValue and len(stat.unscaledRollValue) > 0:
-                total_efficiency = 0.0
-                
-                for roll_value in stat.unscaledRollValue:
-                    value = int(roll_value)
-                    range_size = max_bound - min_bound
-                    steps_from_min = value - min_bound
-                    efficiency = ((steps_from_min + 1) / (range_size + 1)) * 100
-                    total_efficiency += efficiency
-                
-                return total_efficiency / len(stat.unscaledRollValue)
-            
-            return 0.0
-            
-        except (ValueError, TypeError):
-            return 0.0
+        return self._average(self.calculate_individual_roll_efficiencies(stat))
 
     def calculate_individual_roll_efficiencies(self, stat) -> list:
         """Calculate individual roll efficiencies - matches frontend logic"""
         if not stat.statRollerBoundsMin or not stat.statRollerBoundsMax:
             return []
-        
+
         try:
             min_bound = int(stat.statRollerBoundsMin)
             max_bound = int(stat.statRollerBoundsMax)
-            
+
             if stat.unscaledRollValue and len(stat.unscaledRollValue) > 0:
                 efficiencies = []
                 for roll_value in stat.unscaledRollValue:
@@ -90,8 +250,411 @@ class EvaluationEngine:
                     efficiency = ((steps_from_min + 1) / (range_size + 1)) * 100
                     efficiencies.append(efficiency)
                 return efficiencies
-            
+
             return []
-            
+
         except (ValueError, TypeError):
-            return []
\ No newline at end of file
+            return []
+
+
+# ---------------------------------------------------------------------------
+# Workflow verdicts (Keep / Sell / Slice / Level)
+#
+# Mirrors src/utils/workflowEvaluator.js. The workflow definitions are read
+# from src/config/evaluationWorkflows.js itself so the browser and the server
+# can never disagree about the rules.
+# ---------------------------------------------------------------------------
+
+_JS_TOKEN = re.compile(r"""
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,;=])
+""", re.VERBOSE | re.DOTALL)
+
+_JS_KEYWORDS = {"true": True, "false": False, "null": None}
+
+def load_js_exports(path: str) -> Dict[str, Any]:
+    """
+    Read the `export const NAME = <literal>;` declarations of a JS config file
+
+    Only plain data literals are supported (objects, arrays, strings, numbers,
+    true/false/null) - enough for the workflow config, not a JS interpreter.
+    """
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = _JS_TOKEN.match(source, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {source[position]!r} at offset {position} in {path}")
+        position = match.end()
+        if match.lastgroup != "skip":
+            tokens.append((match.lastgroup, match.group()))
+
+    index = 0
+
+    def expect(value: str) -> None:
+        nonlocal index
+        if tokens[index][1] != value:
+            raise ValueError(f"Expected {value!r}, got {tokens[index][1]!r} in {path}")
+        index += 1
+
+    def parse_value() -> Any:
+        nonlocal index
+        kind, text = tokens[index]
+        index += 1
+        if text == "{":
+            obj = {}
+            while tokens[index][1] != "}":
+                key_kind, key = tokens[index]
+                index += 1
+                expect(":")
+                obj[ast.literal_eval(key) if key_kind == "string" else key] = parse_value()
+                if tokens[index][1] == ",":
+                    index += 1
+            index += 1
+            return obj
+        if text == "[":
+            items = []
+            while tokens[index][1] != "]":
+                items.append(parse_value())
+                if tokens[index][1] == ",":
+                    index += 1
+            index += 1
+            return items
+        if kind == "string":
+            return ast.literal_eval(text)
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if kind == "ident" and text in _JS_KEYWORDS:
+            return _JS_KEYWORDS[text]
+        raise ValueError(f"Unsupported JS value {text!r} in {path}")
+
+    exports = {}
+    while index < len(tokens):
+        if tokens[index][1] == "export" and tokens[index + 1][1] == "const":
+            name = tokens[index + 2][1]
+            index += 3
+            expect("=")
+            exports[name] = parse_value()
+        else:
+            index += 1
+    return exports
+
+# Same tables as workflowEvaluator.js
+STAT_NAMES = {
+    1: "Health", 5: "Speed", 16: "Critical Damage %", 17: "Potency %",
+    18: "Tenacity %", 28: "Protection", 41: "Offense", 42: "Defense",
+    48: "Offense %", 49: "Defense %", 53: "Critical Chance %",
+    55: "Health %", 56: "Protection %"
+}
+STAT_IDS = {name: stat_id for stat_id, name in STAT_NAMES.items()}
+
+POINT_MULTIPLIERS = {
+    "Speed": 22.222, "Offense": 2.924, "Critical Chance %": 59.259, "Defense": 13.605,
+    "Defense %": 78.431, "Health": 0.311, "Health %": 118.483, "Offense %": 236.967,
+    "Potency %": 59.259, "Protection": 0.161, "Protection %": 59.259, "Tenacity %": 59.259,
+    "Critical Damage %": 59.259
+}
+
+WORKFLOW_SETS = {
+    "1": "Health", "2": "Offense", "3": "Defense", "4": "Speed",
+    "5": "Critical Chance", "6": "Critical Damage", "7": "Potency", "8": "Tenacity"
+}
+WORKFLOW_SLOTS = {"1": "Square", "2": "Arrow", "3": "Diamond", "4": "Triangle", "5": "Circle", "6": "Cross"}
+
+SET_SYNERGIES = {
+    "Speed": {"Speed", "Offense", "Offense %", "Critical Chance %", "Potency %"},
+    "Offense": {"Offense", "Offense %", "Critical Chance %", "Critical Damage %", "Speed"},
+    "Critical Damage": {"Critical Chance %", "Offense", "Offense %", "Speed"},
+    "Critical Chance": {"Critical Damage %", "Offense", "Offense %", "Speed"},
+    "Potency": {"Potency %", "Speed", "Offense", "Offense %"},
+    "Health": {"Health", "Health %", "Protection", "Protection %", "Defense %"},
+    "Defense": {"Defense", "Defense %", "Health %", "Protection %", "Tenacity %"},
+    "Tenacity": {"Tenacity %", "Speed", "Defense", "Defense %", "Health %"}
+}
+COMBINATION_BONUSES = (
+    ("Offense", "Offense %", 20), ("Defense", "Defense %", 20), ("Health", "Health %", 15),
+    ("Protection", "Protection %", 15), ("Speed", "Offense", 15), ("Speed", "Critical Chance %", 15),
+    ("Speed", "Potency %", 10)
+)
+OFFENSIVE_SETS = {"Speed", "Offense", "Critical Damage", "Critical Chance", "Potency"}
+DEFENSIVE_SETS = {"Health", "Defense", "Tenacity"}
+OFFENSIVE_PRIMARIES = {"Offense %", "Critical Chance %", "Critical Damage %", "Speed", "Potency %"}
+DEFENSIVE_PRIMARIES = {"Defense %", "Health %", "Protection %", "Tenacity %"}
+
+DOT_KEYS = ("dot_1-4", "dot_5", "dot_6")
+SELL_CODE = "S"
+KEEP_CODE = "K"
+LEVEL_CODE = "LV"
+
+def workflow_score(mod: ModRecord) -> float:
+    """Base points plus synergies, as checked by point_threshold"""
+    names = {STAT_NAMES.get(stat.unitStatId) for stat in mod.secondaryStats}
+    set_type = WORKFLOW_SETS.get(mod.definitionId[0])
+    slot_type = WORKFLOW_SLOTS.get(mod.definitionId[2])
+
+    points = 0.0
+    synergies = 0
+    set_synergies = SET_SYNERGIES.get(set_type, ())
+    for stat in mod.secondaryStats:
+        name = STAT_NAMES.get(stat.unitStatId)
+        multiplier = POINT_MULTIPLIERS.get(name)
+        if multiplier:
+            points += stat.value * multiplier
+        if name in set_synergies:
+            synergies += 15
+
+    for first, second, bonus in COMBINATION_BONUSES:
+        if first in names and second in names:
+            synergies += bonus
+
+    if slot_type not in ("Square", "Diamond"):
+        primary_id = mod.primaryStat.unitStatId
+        primary = STAT_NAMES.get(primary_id)
+        if slot_type == "Arrow" and primary_id == 5 and set_type == "Speed":
+            synergies += 25
+        elif slot_type == "Cross" and ((primary == "Potency %" and set_type == "Potency") or
+                                       (primary == "Tenacity %" and set_type == "Tenacity")):
+            synergies += 20
+        elif slot_type == "Triangle" and ((primary == "Critical Damage %" and set_type == "Critical Damage") or
+                                          (primary == "Critical Chance %" and set_type == "Critical Chance")):
+            synergies += 15
+        elif (set_type in OFFENSIVE_SETS and primary in OFFENSIVE_PRIMARIES) or \
+                (set_type in DEFENSIVE_SETS and primary in DEFENSIVE_PRIMARIES):
+            synergies += 10
+
+    return points + synergies
+
+class WorkflowEngine:
+    """
+    Server-side Keep/Sell/Slice/Level verdicts for every workflow at once
+
+    Each workflow's dot/tier/level check lists are compiled once into a table
+    indexed by (dot bucket, tier, level), so evaluating a mod never searches
+    level keys. Verdicts only depend on a few mod features (bucket, tier,
+    level, speed arrow, the floored values of the stats any check reads), so
+    the verdicts for all workflows are memoized per feature tuple - a roster
+    of thousands of mods only runs the check lists a few dozen times.
+
+    Verdict codes are the RESULT_CODES keys; a level verdict with a target is
+    "LV:<target>". Locked mods are always "K".
+    """
+
+    def __init__(self, workflows: Dict[str, Any], result_codes: Dict[str, Any], tier_keys: Dict[Any, str]):
+        self.result_codes = result_codes
+        self.workflow_keys: List[str] = list(workflows)
+        self.workflow_info = [
+            {"key": key, "name": workflow.get("name", key), "description": workflow.get("description", "")}
+            for key, workflow in workflows.items()
+        ]
+        self.tiers = sorted(int(tier) for tier in tier_keys)
+
+        self.relevant_stats: List[int] = []
+        self.uses_points = False
+        compiled_configs = []
+        for workflow in workflows.values():
+            compiled_configs.append({
+                (dot_key, int(tier)): self._compile_tier_config(workflow.get(dot_key, {}).get(tier_name))
+                for dot_key in DOT_KEYS
+                for tier, tier_name in tier_keys.items()
+            })
+        level_keys = [level for compiled in compiled_configs for levels in compiled.values() if levels for level in levels]
+        self.max_level = max(level_keys + [15])
+
+        # tables[workflow][(dot_key, tier)][level] -> compiled checks (None = no rules)
+        self.tables = [
+            {key: self._level_table(config) for key, config in compiled.items()}
+            for compiled in compiled_configs
+        ]
+        self._stat_slots = {stat_id: slot for slot, stat_id in enumerate(self.relevant_stats)}
+        self._memo: Dict[tuple, Tuple[str, ...]] = {}
+
+    @classmethod
+    def from_js_config(cls, path: str) -> "WorkflowEngine":
+        exports = load_js_exports(path)
+        return cls(exports["EVALUATION_WORKFLOWS"], exports["RESULT_CODES"], exports["TIER_KEYS"])
+
+    def _compile_tier_config(self, tier_config: Optional[Dict[str, Any]]) -> Optional[Dict[int, Optional[tuple]]]:
+        if not tier_config:
+            return None
+        return {
+            int(level_key.replace("level_", "")): self._compile_checks(checks)
+            for level_key, checks in tier_config.items()
+        }
+
+    def _level_table(self, levels: Optional[Dict[int, Optional[tuple]]]) -> Optional[List[Optional[tuple]]]:
+        """Checks for every level 0..max_level (findClosestLevelKey, precomputed)"""
+        if levels is None:
+            return None
+        table = []
+        for level in range(self.max_level + 1):
+            applicable = [key for key in levels if level >= key]
+            # Nothing applies -> level_1, which may itself be missing
+            table.append(levels[max(applicable)] if applicable else levels.get(1))
+        return table
+
+    def _stat_id(self, name: str) -> Optional[int]:
+        stat_id = STAT_IDS.get(name)
+        if stat_id is None:
+            logger.warning(f"Unknown stat name in workflow: {name}")
+        elif stat_id not in self.relevant_stats:
+            self.relevant_stats.append(stat_id)
+        return stat_id
+
+    def _compile_checks(self, checks: Optional[List[Dict[str, Any]]]) -> Optional[tuple]:
+        """Turn check dicts into (kind, argument, verdict code) tuples"""
+        if checks is None:
+            return None
+        compiled = []
+        for check in checks:
+            kind = check.get("check")
+            params = check.get("params") or {}
+            target = check.get("target")
+            result = check.get("result")
+            if not result and not target and kind not in ("needs_leveling", "combined_stats",
+                                                          "combined_speed_offense", "point_threshold"):
+                # executeCheck returns the (missing) result itself, which never matches
+                continue
+            if result not in self.result_codes:
+                code = SELL_CODE
+            elif result == LEVEL_CODE and target:
+                code = f"{LEVEL_CODE}:{target}"
+            else:
+                code = result
+
+            if kind == "speed_threshold":
+                kind, params = "stat_threshold", {**params, "stat": "Speed"}
+            elif kind == "offense_threshold":
+                kind, params = "stat_threshold", {**params, "stat": "Offense"}
+            elif kind == "combined_speed_offense":
+                kind, params = "combined_stats", {"stats": [
+                    {"stat": "Speed", "min": params.get("minSpeed") or 0},
+                    {"stat": "Offense", "min": params.get("minOffense") or 0}
+                ]}
+
+            if kind == "default":
+                compiled.append(("default", None, code))
+            elif kind == "needs_leveling":
+                compiled.append(("needs_leveling", target, code))
+            elif kind == "speed_arrow":
+                compiled.append(("speed_arrow", None, code))
+            elif kind == "stat_threshold":
+                stat_id = self._stat_id(params.get("stat")) if params.get("stat") else None
+                if stat_id is not None:
+                    compiled.append(("stat_threshold", (stat_id, bool(params.get("any")), params.get("min") or 0), code))
+            elif kind == "combined_stats":
+                stats = params.get("stats") or []
+                stat_ids = [self._stat_id(stat.get("stat")) for stat in stats]
+                if len(stats) >= 2 and None not in stat_ids:
+                    mins = tuple(stat.get("min") or 0 for stat in stats)
+                    compiled.append(("combined_stats", tuple(zip(stat_ids, mins)), code))
+            elif kind == "point_threshold":
+                self.uses_points = True
+                compiled.append(("point_threshold", params["threshold"], code))
+            else:
+                logger.warning(f"Unknown workflow check type: {kind}")
+        return tuple(compiled)
+
+    def _run_checks(self, checks: tuple, level: int, speed_arrow: bool,
+                    stat_values: Dict[int, int], score: Optional[float]) -> str:
+        for kind, argument, code in checks:
+            if kind == "default":
+                return code
+            if kind == "needs_leveling":
+                if argument is not None and level < argument:
+                    return code
+            elif kind == "speed_arrow":
+                if speed_arrow:
+                    return code
+            elif kind == "stat_threshold":
+                stat_id, any_value, minimum = argument
+                value = stat_values.get(stat_id)
+                if value is not None and ((any_value and value > 0) or (minimum and value >= minimum)):
+                    return code
+            elif kind == "combined_stats":
+                if all(stat_id in stat_values and stat_values[stat_id] >= minimum for stat_id, minimum in argument):
+                    return code
+            elif kind == "point_threshold":
+                if score >= argument:
+                    return code
+        return SELL_CODE
+
+    def evaluate(self, mod: ModRecord) -> Tuple[str, ...]:
+        """Verdict code per workflow (in workflow_keys order)"""
+        if mod.locked:
+            return (KEEP_CODE,) * len(self.workflow_keys)
+
+        definition_id = mod.definitionId
+        dots = int(definition_id[1]) if definition_id[1:2].isdigit() else None
+        dot_key = "dot_1-4" if dots is not None and dots <= 4 else "dot_6" if dots == 6 else "dot_5"
+        level = max(0, min(mod.level, self.max_level))
+        speed_arrow = definition_id[2:3] == "2" and mod.primaryStat.unitStatId == 5
+
+        # Floored values of the stats the checks read (first occurrence, like Array.find)
+        values: List[Optional[int]] = [None] * len(self.relevant_stats)
+        for stat in mod.secondaryStats:
+            slot = self._stat_slots.get(stat.unitStatId)
+            if slot is not None and values[slot] is None:
+                values[slot] = math.floor(stat.value)
+        score = workflow_score(mod) if self.uses_points else None
+
+        feature = (dot_key, mod.tier, level, speed_arrow, tuple(values), score)
+        verdicts = self._memo.get(feature)
+        if verdicts is None:
+            stat_values = {stat_id: value for stat_id, value in zip(self.relevant_stats, values) if value is not None}
+            results = []
+            for table in self.tables:
+                levels = table.get((dot_key, mod.tier))
+                checks = levels[level] if levels is not None else None
+                # No rules for this dot/tier/level -> sell, like the frontend
+                results.append(SELL_CODE if checks is None else self._run_checks(checks, level, speed_arrow, stat_values, score))
+            verdicts = tuple(results)
+            if len(self._memo) < 100000:
+                self._memo[feature] = verdicts
+        return verdicts
+
+    def evaluate_mods(self, mods: Sequence[ModRecord]) -> Tuple[List[Tuple[str, ...]], Dict[str, Dict[str, int]]]:
+        """Verdicts for every mod and workflow in one pass, plus per-workflow counts"""
+        verdicts = [self.evaluate(mod) for mod in mods]
+        counts = []
+        for _ in self.workflow_keys:
+            counts.append({code: 0 for code in self.result_codes})
+        for mod_verdicts in verdicts:
+            for workflow_counts, code in zip(counts, mod_verdicts):
+                # "LV:15" counts as LV
+                workflow_counts[code.split(":", 1)[0]] += 1
+        return verdicts, dict(zip(self.workflow_keys, counts))
+
+    def describe(self, code: str) -> Dict[str, str]:
+        """verdict/text/className for a code, as formatResult builds them"""
+        result, _, target = code.partition(":")
+        described = dict(self.result_codes.get(result, self.result_codes[SELL_CODE]))
+        if target:
+            described["text"] = f"Level to {target}"
+        return described
+
+def load_workflow_engine(path: str, required: bool = False) -> Optional[WorkflowEngine]:
+    """
+    Compile the frontend workflow config, or None (no verdicts) if it isn't available
+
+    required: raise instead, for a path that was configured explicitly
+    """
+    if not os.path.exists(path):
+        if required:
+            raise FileNotFoundError(f"Workflow config not found at {path}")
+        logger.error(f"Workflow config not found at {path}; workflow verdicts disabled")
+        return None
+    try:
+        engine = WorkflowEngine.from_js_config(path)
+        logger.info(f"Compiled {len(engine.workflow_keys)} evaluation workflows from {path}")
+        return engine
+    except Exception as e:
+        if required:
+            raise
+        logger.error(f"Failed to compile workflow config {path}: {str(e)}")
+        return None
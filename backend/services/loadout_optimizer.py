@@ -0,0 +1,285 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import logging
+import time
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+SLOTS = (1, 2, 3, 4, 5, 6)
+# Set id -> mods needed for one bonus
+SET_PIECES = {1: 2, 2: 4, 3: 2, 4: 4, 5: 2, 6: 4, 7: 2, 8: 2}
+# Searched nodes between two deadline checks
+DEADLINE_CHECK_NODES = 512
+
+class LoadoutGoal:
+    """
+    What one character should get: the stat total to maximize (weights per
+    stat id), full set bonuses to complete ({set id: pieces}), required
+    primaries ({slot: stat id}) and minimum stat totals ({stat id: value})
+
+    Totals add up the mods' primary and secondary values as shown (flat and
+    percent stats alike); set bonuses and the character's base stats are
+    not part of them.
+    """
+
+    def __init__(self, character: str, weights: Mapping[int, float], sets: Optional[Mapping[int, int]] = None,
+                 primaries: Optional[Mapping[int, int]] = None, minimums: Optional[Mapping[int, float]] = None):
+        self.character = character
+        self.weights = dict(weights)
+        self.sets = dict(sets or {})
+        self.primaries = dict(primaries or {})
+        self.minimums = dict(minimums or {})
+        if sum(self.sets.values()) > len(SLOTS):
+            raise ValueError(f"Set bonuses for {character} need more than {len(SLOTS)} mods")
+
+    @classmethod
+    def from_dict(cls, goal: Dict[str, Any]) -> "LoadoutGoal":
+        return cls(goal["character"], goal["weights"], goal.get("sets"), goal.get("primaries"), goal.get("minimums"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"character": self.character, "weights": self.weights, "sets": self.sets,
+                "primaries": self.primaries, "minimums": self.minimums}
+
+def parse_set_bonuses(values: Sequence[str], names: Mapping[str, str]) -> Dict[int, int]:
+    """["Speed", "Health"] -> {4: 4, 1: 2}; a set named twice counts twice"""
+    ids_by_name = {name.lower(): int(key) for key, name in names.items()}
+    pieces: Dict[int, int] = {}
+    for value in values:
+        value = value.strip()
+        set_id = int(value) if value.isdigit() and value in names else ids_by_name.get(value.lower())
+        if set_id is None:
+            raise ValueError(f"Unknown set: {value}")
+        pieces[set_id] = pieces.get(set_id, 0) + SET_PIECES[set_id]
+    return pieces
+
+class Candidate:
+    __slots__ = ("position", "set_id", "score", "stats")
+
+    def __init__(self, position: int, set_id: int, score: float, stats: Tuple[float, ...]):
+        self.position = position
+        self.set_id = set_id
+        self.score = score
+        self.stats = stats
+
+class StateFront:
+    """(score, stats...) rows of the partial loadouts searched so far, for dominance checks"""
+
+    def __init__(self, width: int):
+        self.rows = np.empty((16, width))
+        self.size = 0
+
+    def dominates(self, row: Tuple[float, ...]) -> bool:
+        """Some row is at least as good everywhere"""
+        return bool(self.size) and bool((self.rows[:self.size] >= row).all(axis=1).any())
+
+    def add(self, row: Tuple[float, ...]) -> None:
+        if self.size == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.empty_like(self.rows)])
+        self.rows[self.size] = row
+        self.size += 1
+
+class LoadoutOptimizer:
+    """
+    Best loadout per character over one evaluated roster, characters in priority order
+
+    Each character is a branch-and-bound search over one mod per slot:
+
+    - candidate index: mods per slot, filtered by the required primary and
+      already reduced to what can matter for this goal
+    - dominance pruning: within a slot, a mod is dropped when another mod of
+      the same set (or any set, when its set isn't required) is at least as
+      good on the objective and on every minimum-constrained stat
+    - bounds: slots are searched fewest-candidates first, best candidates
+      first; a branch stops when its score plus the best still available per
+      remaining slot can't beat the best loadout found, when a minimum can't
+      be reached any more, or when the remaining slots can't complete the
+      required sets
+
+    Earlier characters pick first; later ones never reuse their mods. The
+    search stops at the deadline and keeps the best loadouts found so far
+    ("complete": false).
+    """
+
+    def __init__(self, mods: List[Dict[str, Any]]):
+        self.mods = mods
+        self.slots = [int(mod["d"][2]) for mod in mods]
+        self.set_ids = [int(mod["d"][0]) for mod in mods]
+        self.characters = [mod["c"] for mod in mods]
+        # Stat id -> total the mod adds (primary + secondaries)
+        self.totals: List[Dict[int, float]] = []
+        for mod in mods:
+            totals = {mod["p"]["i"]: mod["p"]["v"]}
+            for stat in mod["s"]:
+                totals[stat["i"]] = totals.get(stat["i"], 0.0) + stat["v"]
+            self.totals.append(totals)
+        self.nodes = 0
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "LoadoutOptimizer":
+        return cls(orjson.loads(body).get("mods", []))
+
+    def optimize(self, goals: Sequence[LoadoutGoal], excluded_characters: Iterable[str] = (),
+                 only_characters: Optional[Iterable[str]] = None, time_budget: float = 2.0) -> Dict[str, Any]:
+        """Loadouts for the goals in order; mods on excluded characters (or off only_characters) are never used"""
+        deadline = time.perf_counter() + time_budget
+        excluded = set(excluded_characters)
+        allowed = set(only_characters) if only_characters is not None else None
+        available = {
+            position for position, character in enumerate(self.characters)
+            if character not in excluded and (allowed is None or character in allowed)
+        }
+
+        loadouts = []
+        complete = True
+        for goal in goals:
+            loadout = self._search(goal, available, deadline)
+            complete = complete and loadout["complete"]
+            available.difference_update(loadout["positions"])
+            loadouts.append(loadout)
+
+        return {"complete": complete, "nodes": self.nodes,
+                "loadouts": [self._describe(goal, loadout) for goal, loadout in zip(goals, loadouts)]}
+
+    def _score(self, position: int, goal: LoadoutGoal) -> float:
+        totals = self.totals[position]
+        return sum(weight * totals.get(stat_id, 0.0) for stat_id, weight in goal.weights.items())
+
+    def _candidates(self, goal: LoadoutGoal, available: Iterable[int]) -> Dict[int, List[Candidate]]:
+        """Per slot, the non-dominated candidates, best score first"""
+        constrained = tuple(goal.minimums)
+        grouped: Dict[Tuple[int, int], List[Candidate]] = {}
+        for position in available:
+            slot = self.slots[position]
+            required_primary = goal.primaries.get(slot)
+            if required_primary is not None and self.mods[position]["p"]["i"] != required_primary:
+                continue
+            set_id = self.set_ids[position]
+            totals = self.totals[position]
+            # A stat at or past its minimum is as good as the minimum itself (stats are never negative)
+            candidate = Candidate(position, set_id, self._score(position, goal),
+                                  tuple(min(totals.get(stat_id, 0.0), goal.minimums[stat_id]) for stat_id in constrained))
+            # Sets the goal doesn't ask for are interchangeable
+            grouped.setdefault((slot, set_id if set_id in goal.sets else 0), []).append(candidate)
+
+        per_slot: Dict[int, List[Candidate]] = {slot: [] for slot in SLOTS}
+        for (slot, _), candidates in grouped.items():
+            # Ties by roster position keep the search deterministic
+            candidates.sort(key=lambda c: (-c.score, c.position))
+            front: List[Candidate] = []
+            for candidate in candidates:
+                # Everything in front scores at least as much; dominated if one is as good on every constraint too
+                if not any(all(kept >= value for kept, value in zip(other.stats, candidate.stats)) for other in front):
+                    front.append(candidate)
+            per_slot[slot].extend(front)
+        for candidates in per_slot.values():
+            candidates.sort(key=lambda c: (-c.score, c.position))
+        return per_slot
+
+    def _search(self, goal: LoadoutGoal, available: Iterable[int], deadline: float) -> Dict[str, Any]:
+        per_slot = self._candidates(goal, available)
+        if any(not per_slot[slot] for slot in goal.primaries):
+            # A required primary no available mod has: no loadout meets the goal
+            return {"positions": [], "complete": True, "feasible": False,
+                    "candidates": sum(len(candidates) for candidates in per_slot.values()), "nodes": 0}
+        # Other slots without any candidate stay empty
+        order = sorted((slot for slot in SLOTS if per_slot[slot]), key=lambda slot: len(per_slot[slot]))
+        slot_candidates = [per_slot[slot] for slot in order]
+        depth = len(order)
+        constrained = tuple(goal.minimums)
+        minimums = tuple(goal.minimums[stat_id] for stat_id in constrained)
+        required_sets = tuple(goal.sets)
+        needed = tuple(goal.sets[set_id] for set_id in required_sets)
+
+        # Optimistic totals of the slots from each depth on
+        best_rest = [0.0] * (depth + 1)
+        stat_rest = [(0.0,) * len(constrained)] * (depth + 1)
+        set_rest = [(0,) * len(required_sets)] * (depth + 1)
+        for level in range(depth - 1, -1, -1):
+            candidates = slot_candidates[level]
+            best_rest[level] = best_rest[level + 1] + candidates[0].score
+            stat_rest[level] = tuple(rest + max(c.stats[i] for c in candidates)
+                                     for i, rest in enumerate(stat_rest[level + 1]))
+            set_rest[level] = tuple(rest + any(c.set_id == set_id for c in candidates)
+                                    for set_id, rest in zip(required_sets, set_rest[level + 1]))
+
+        best: Dict[str, Any] = {"score": float("-inf"), "positions": []}
+        chosen: List[int] = []
+        # Partial loadouts already searched, per depth and set progress
+        seen: List[Dict[Tuple[int, ...], StateFront]] = [{} for _ in range(depth)]
+        stopped = False
+        nodes = 0
+
+        def search(level: int, score: float, stats: Tuple[float, ...], set_counts: Tuple[int, ...]) -> None:
+            nonlocal stopped, nodes
+            nodes += 1
+            if nodes % DEADLINE_CHECK_NODES == 0 and time.perf_counter() > deadline:
+                stopped = True
+            if stopped:
+                return
+            if any(stat + rest < minimum for stat, rest, minimum in zip(stats, stat_rest[level], minimums)):
+                return
+            missing = [max(0, need - count) for need, count in zip(needed, set_counts)]
+            if sum(missing) > depth - level or any(m > rest for m, rest in zip(missing, set_rest[level])):
+                return
+            if 0 < level < depth - 1:
+                # Same slots filled and set progress as a partial loadout already searched that scores at
+                # least as much and is as far along every minimum: nothing here can beat what it led to
+                key = tuple(min(count, need) for count, need in zip(set_counts, needed))
+                front = seen[level].get(key)
+                if front is None:
+                    front = seen[level][key] = StateFront(1 + len(stats))
+                row = (score,) + stats
+                if front.dominates(row):
+                    return
+                front.add(row)
+            if level == depth:
+                if score > best["score"]:
+                    best["score"] = score
+                    best["positions"] = list(chosen)
+                return
+            for candidate in slot_candidates[level]:
+                # Best first: once the bound fails here it fails for the rest of the slot
+                if score + candidate.score + best_rest[level + 1] <= best["score"]:
+                    break
+                chosen.append(candidate.position)
+                search(level + 1, score + candidate.score,
+                       tuple(min(stat + value, minimum) for stat, value, minimum in zip(stats, candidate.stats, minimums)),
+                       tuple(count + (candidate.set_id == set_id) for set_id, count in zip(required_sets, set_counts)))
+                chosen.pop()
+                if stopped:
+                    return
+
+        search(0, 0.0, (0.0,) * len(constrained), (0,) * len(required_sets))
+        self.nodes += nodes
+        return {"positions": best["positions"], "complete": not stopped,
+                "feasible": bool(best["positions"]) or (depth == 0 and not minimums and not needed),
+                "candidates": sum(len(candidates) for candidates in slot_candidates), "nodes": nodes}
+
+    def _describe(self, goal: LoadoutGoal, loadout: Dict[str, Any]) -> Dict[str, Any]:
+        positions = sorted(loadout["positions"], key=lambda position: self.slots[position])
+        stat_ids = list(dict.fromkeys(list(goal.weights) + list(goal.minimums)))
+        totals = {stat_id: round(sum(self.totals[p].get(stat_id, 0.0) for p in positions), 4) for stat_id in stat_ids}
+        set_counts: Dict[int, int] = {}
+        for position in positions:
+            set_counts[self.set_ids[position]] = set_counts.get(self.set_ids[position], 0) + 1
+        return {
+            "character": goal.character,
+            "feasible": loadout["feasible"],
+            "complete": loadout["complete"],
+            "score": round(sum(self._score(p, goal) for p in positions), 4),
+            "totals": totals,
+            "sets": set_counts,
+            "moved": sum(self.characters[p] != goal.character for p in positions),
+            "candidates": loadout["candidates"],
+            "nodes": loadout["nodes"],
+            "mods": [self.mods[p] for p in positions]
+        }
+
+def optimize_loadouts(body: bytes, goals: List[Dict[str, Any]], excluded_characters: List[str],
+                      only_characters: Optional[List[str]], time_budget: float) -> Tuple[bool, bytes]:
+    """CPUExecutor entry point: optimize over a /api/player body; (complete, encoded result)"""
+    optimizer = LoadoutOptimizer.from_body(body)
+    result = optimizer.optimize([LoadoutGoal.from_dict(goal) for goal in goals], excluded_characters,
+                                only_characters, time_budget)
+    return result["complete"], orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
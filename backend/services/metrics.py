@@ -0,0 +1,165 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cached lookups (sub-ms) up to slow Comlink calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes; a large roster is a few hundred KB
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576, 2097152, 4194304, 8388608)
+
+# (name, type, help, labels, value) reported by collectors at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # bisect_left: a value equal to a bound belongs to that bucket (le is inclusive)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _NullSpan:
+    """Shared no-op span handed out while metrics are disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('registry', 'stage', 'start')
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = [f'{key}="{_escape(value)}"' for key, value in labels]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms rendered in the Prometheus text format
+
+    Disabled by default: span() then returns a shared no-op context manager
+    and inc()/observe() return after one attribute check, so instrumented
+    code costs next to nothing. Values that other services already count
+    (cache hits, coalescing, ...) are pulled by collectors at scrape time
+    instead of being mirrored on every request.
+    """
+
+    STAGE_METRIC = "swgoh_stage_duration_seconds"
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._help: Dict[str, str] = {
+            self.STAGE_METRIC: "Time spent in each stage of building a response"
+        }
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def configure(self, enabled: bool) -> None:
+        self.enabled = enabled
+        logger.info(f"Metrics {'enabled' if enabled else 'disabled'}")
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def span(self, stage: str):
+        """Time a block into the per-stage latency histogram"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.observe(self.STAGE_METRIC, seconds, LATENCY_BUCKETS, stage=stage)
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        # name -> (type, [(suffix, labels, value)])
+        families: Dict[str, Tuple[str, list]] = {}
+
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                families.setdefault(name, ("counter", []))[1].append(("", labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                samples = families.setdefault(name, ("histogram", []))[1]
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    samples.append(("_bucket", labels + (("le", _format_value(float(bound))),), cumulative))
+                samples.append(("_bucket", labels + (("le", "+Inf"),), histogram.count))
+                samples.append(("_sum", labels, histogram.sum))
+                samples.append(("_count", labels, histogram.count))
+
+        for collector in self._collectors:
+            try:
+                for name, metric_type, help_text, labels, value in collector():
+                    self._help.setdefault(name, help_text)
+                    families.setdefault(name, (metric_type, []))[1].append(("", tuple(sorted(labels.items())), value))
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+
+        lines = []
+        for name in sorted(families):
+            metric_type, samples = families[name]
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry, configured from settings at startup
+metrics = MetricsRegistry()
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from collections import OrderedDict
+import logging
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Fields with one posting list (sorted mod positions) per value
+EQUALITY_FIELDS = ("set", "slot", "dots", "tier", "primary", "character")
+# Sort keys besides "secondary:<stat id>"
+SORT_FIELDS = ("efficiency", "level", "dots", "tier", "set", "slot", "primary", "character")
+
+def parse_mod_choices(values: Optional[Sequence[str]], names: Mapping[str, str], field: str) -> Optional[List[int]]:
+    """Set / slot filter values as ids; each value may be the id ("4") or the name ("Speed")"""
+    if not values:
+        return None
+    ids_by_name = {name.lower(): int(key) for key, name in names.items()}
+    choices = []
+    for value in values:
+        value = value.strip()
+        if value.isdigit() and value in names:
+            choices.append(int(value))
+        elif value.lower() in ids_by_name:
+            choices.append(ids_by_name[value.lower()])
+        else:
+            raise ValueError(f"Unknown {field}: {value}")
+    return choices
+
+def parse_secondary_thresholds(values: Optional[Sequence[str]]) -> List[Tuple[int, float]]:
+    """"5:15" -> (5, 15.0): secondary stat 5 (Speed) at least 15"""
+    thresholds = []
+    for value in values or ():
+        stat_id, separator, minimum = value.partition(":")
+        try:
+            thresholds.append((int(stat_id), float(minimum) if separator else float("-inf")))
+        except ValueError:
+            raise ValueError(f"Secondary filter must look like <stat id>:<minimum>, got {value}")
+    return thresholds
+
+def parse_sort(sort: str) -> Any:
+    """A SORT_FIELDS name, or the stat id of secondary:<stat id>"""
+    if sort in SORT_FIELDS:
+        return sort
+    prefix, _, stat_id = sort.partition(":")
+    if prefix == "secondary" and stat_id.isdigit():
+        return int(stat_id)
+    raise ValueError(f"Unknown sort: {sort}")
+
+class RosterIndex:
+    """
+    Secondary indexes over one evaluated roster, for filtered and sorted pages
+
+    Equality filters (set, slot, dots, tier, primary stat, character) are
+    posting lists of mod positions; efficiency and every secondary stat have
+    their values sorted next to the mod positions, so a threshold is one
+    binary search. A query intersects the matching lists, starting with
+    the smallest, and only sorts what is left. Pages are the mods' cached
+    encoded bytes, never re-encoded.
+    """
+
+    def __init__(self, version: str, mods: List[Dict[str, Any]], encoded: List[bytes]):
+        self.version = version
+        self.encoded = encoded
+        self.size = len(mods)
+
+        characters: Dict[str, int] = {}
+        for mod in mods:
+            characters.setdefault(mod["c"], len(characters))
+        names = {mod["c"]: mod["cn"] for mod in mods}
+        self.characters = characters
+        # Character sort order is by display name
+        name_rank = np.empty(len(characters), dtype=np.int32)
+        name_rank[np.argsort([names[c].lower() for c in characters], kind="stable")] = np.arange(len(characters))
+        character_ids = np.array([characters[mod["c"]] for mod in mods], dtype=np.int32)
+
+        self.columns: Dict[str, np.ndarray] = {
+            "set": np.array([int(mod["d"][0]) for mod in mods], dtype=np.int16),
+            "dots": np.array([int(mod["d"][1]) for mod in mods], dtype=np.int16),
+            "slot": np.array([int(mod["d"][2]) for mod in mods], dtype=np.int16),
+            "tier": np.array([mod["t"] for mod in mods], dtype=np.int16),
+            "level": np.array([mod["l"] for mod in mods], dtype=np.int16),
+            "primary": np.array([mod["p"]["i"] for mod in mods], dtype=np.int16),
+            "efficiency": np.array([mod["e"] for mod in mods], dtype=np.float64),
+            "character": character_ids
+        }
+        self._sort_columns = dict(self.columns, character=name_rank[character_ids] if len(mods) else character_ids)
+
+        self._postings: Dict[str, Dict[int, np.ndarray]] = {
+            field: self._build_postings(self.columns[field]) for field in EQUALITY_FIELDS
+        }
+        self._ranges: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {
+            "efficiency": self._build_range(self.columns["efficiency"], np.arange(self.size, dtype=np.int32))
+        }
+
+        # Secondary stat id -> value per mod (NaN where the mod doesn't have it)
+        self._secondaries: Dict[int, np.ndarray] = {}
+        positions: Dict[int, List[int]] = {}
+        values: Dict[int, List[float]] = {}
+        for position, mod in enumerate(mods):
+            for stat in mod["s"]:
+                positions.setdefault(stat["i"], []).append(position)
+                values.setdefault(stat["i"], []).append(stat["v"])
+        for stat_id in positions:
+            stat_positions = np.array(positions[stat_id], dtype=np.int32)
+            stat_values = np.array(values[stat_id], dtype=np.float64)
+            self._ranges[stat_id] = self._build_range(stat_values, stat_positions)
+            column = np.full(self.size, np.nan)
+            column[stat_positions] = stat_values
+            self._secondaries[stat_id] = column
+
+    @classmethod
+    def from_encoded(cls, version: str, encoded: List[bytes]) -> "RosterIndex":
+        """From the encoded mods of a snapshot, in roster order"""
+        return cls(version, orjson.loads(b"[" + b",".join(encoded) + b"]"), encoded)
+
+    @classmethod
+    def from_body(cls, version: str, body: bytes) -> "RosterIndex":
+        """From a complete /api/player body (e.g. one cached by another worker)"""
+        mods = orjson.loads(body).get("mods", [])
+        return cls(version, mods, [orjson.dumps(mod) for mod in mods])
+
+    @staticmethod
+    def _build_postings(column: np.ndarray) -> Dict[int, np.ndarray]:
+        order = np.argsort(column, kind="stable").astype(np.int32)
+        values, starts = np.unique(column[order], return_index=True)
+        return {int(value): positions for value, positions in zip(values, np.split(order, starts[1:]))}
+
+    @staticmethod
+    def _build_range(values: np.ndarray, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(values, kind="stable")
+        return values[order], positions[order]
+
+    def _matching(self, field: str, choices: Sequence[int]) -> np.ndarray:
+        postings = self._postings[field]
+        lists = [postings[choice] for choice in set(choices) if choice in postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        return lists[0] if len(lists) == 1 else np.sort(np.concatenate(lists))
+
+    def _in_range(self, key: Any, minimum: Optional[float], maximum: Optional[float]) -> np.ndarray:
+        if key not in self._ranges:
+            return np.empty(0, dtype=np.int32)
+        values, positions = self._ranges[key]
+        start = np.searchsorted(values, minimum, side="left") if minimum is not None else 0
+        end = np.searchsorted(values, maximum, side="right") if maximum is not None else len(values)
+        return np.sort(positions[start:end])
+
+    def query(self, equals: Optional[Mapping[str, Optional[Sequence[int]]]] = None,
+              min_efficiency: Optional[float] = None, max_efficiency: Optional[float] = None,
+              secondaries: Sequence[Tuple[int, float]] = (),
+              sort: str = "efficiency", descending: bool = True) -> np.ndarray:
+        """
+        Positions of the matching mods in sort order (ties keep roster order)
+
+        equals maps EQUALITY_FIELDS to accepted values (any of them matches;
+        character values are character ids); secondaries are (stat id,
+        minimum) pairs that must all hold. sort is one of SORT_FIELDS or
+        "secondary:<stat id>" (mods without that stat go last).
+        """
+        candidates = []
+        for field, choices in (equals or {}).items():
+            if choices:
+                if field == "character":
+                    choices = [self.characters[c] for c in choices if c in self.characters]
+                candidates.append(self._matching(field, choices))
+        if min_efficiency is not None or max_efficiency is not None:
+            candidates.append(self._in_range("efficiency", min_efficiency, max_efficiency))
+        for stat_id, minimum in secondaries:
+            candidates.append(self._in_range(stat_id, minimum, None))
+
+        if candidates:
+            candidates.sort(key=len)
+            positions = candidates[0]
+            for other in candidates[1:]:
+                if not len(positions):
+                    break
+                positions = np.intersect1d(positions, other, assume_unique=True)
+        else:
+            positions = np.arange(self.size, dtype=np.int32)
+
+        key = self._sort_key(parse_sort(sort))[positions]
+        order = np.argsort(-key if descending else key, kind="stable")
+        return positions[order]
+
+    def _sort_key(self, sort: Any) -> np.ndarray:
+        if isinstance(sort, int):
+            # Secondary stat values; NaN sorts last both ways (descending negates the key)
+            return self._secondaries.get(sort, np.full(self.size, np.nan))
+        return self._sort_columns[sort].astype(np.float64)
+
+    def page(self, positions: np.ndarray, offset: int, limit: int) -> List[bytes]:
+        return [self.encoded[position] for position in positions[offset:offset + limit]]
+
+class ModIndexStore:
+    """Per-process LRU of the RosterIndex of each ally code's latest snapshot"""
+
+    def __init__(self, max_players: int = 500):
+        self.max_players = max_players
+        self.indexes: "OrderedDict[str, RosterIndex]" = OrderedDict()
+        self.builds = 0
+        self.queries = 0
+
+    def get(self, ally_code: str, version: Optional[str]) -> Optional[RosterIndex]:
+        """The index for exactly this snapshot version, if built"""
+        index = self.indexes.get(ally_code)
+        if index is None or index.version != version:
+            return None
+        self.indexes.move_to_end(ally_code)
+        return index
+
+    def put(self, ally_code: str, index: RosterIndex) -> None:
+        self.builds += 1
+        self.indexes[ally_code] = index
+        self.indexes.move_to_end(ally_code)
+        while len(self.indexes) > self.max_players:
+            oldest, _ = self.indexes.popitem(last=False)
+            logger.info(f"Dropped mod index for {oldest}")
+
+    def record_query(self) -> None:
+        self.queries += 1
+
+    def delete(self, ally_code: str) -> None:
+        self.indexes.pop(ally_code, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'players': len(self.indexes),
+            'max_players': self.max_players,
+            'builds': self.builds,
+            'queries': self.queries
+        }
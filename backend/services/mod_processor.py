@@ -1,8 +1,10 @@
-from typing import List, Dict, Any, Optional
-from models.mod import ProcessedMod, SecondaryStat, PrimaryStat, PlayerData
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
+from models.mod import ModRecord, SecondaryStatRecord, PrimaryStatRecord, PlayerRecord
 from datetime import datetime
 import logging
 from services.db_connection import DatabaseConnection  # ADD THIS
+from services.character_names import CharacterNameIndex
+from services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +25,11 @@ class ModProcessor:
         1: "Grey", 2: "Green", 3: "Blue", 4: "Purple", 5: "Gold"
     }
 
-    def __init__(self):
-        self.db = DatabaseConnection()  # ADD THIS
+    def __init__(self, name_index: Optional[CharacterNameIndex] = None):
+        self.name_index = name_index or CharacterNameIndex()
+        self.db = self.name_index.db
     
-    def process_player_data(self, raw_data: Dict[str, Any], ally_code: str) -> PlayerData:
+    def process_player_data(self, raw_data: Dict[str, Any], ally_code: str) -> PlayerRecord:
         """
         Process raw SWGOH API data and extract mod information
         
@@ -45,7 +48,7 @@ class ModProcessor:
             
             logger.info(f"Processed {len(all_mods)} total mods for player {player_name}")
             
-            return PlayerData(
+            return PlayerRecord(
                 playerName=player_name,
                 allyCode=ally_code,
                 lastUpdated=datetime.now().isoformat(),
@@ -58,54 +61,76 @@ class ModProcessor:
             logger.error(f"Error processing player data for {ally_code}: {str(e)}")
             raise
     
-    def extract_mods_from_roster(self, raw_data: Dict[str, Any]) -> List[ProcessedMod]:
+    def extract_mods_from_roster(self, raw_data: Dict[str, Any]) -> List[ModRecord]:
         """Extract all mods from roster units"""
         mods = []
         
+        for mod_data, character_id, character_display_name in self.iter_roster_mods(raw_data):
+            try:
+                processed_mod = self.process_single_mod(
+                    mod_data, 
+                    character_id, 
+                    character_display_name
+                )
+                if processed_mod:
+                    mods.append(processed_mod)
+            except Exception as e:
+                logger.warning(f"Failed to process mod {mod_data.get('id', 'unknown')}: {str(e)}")
+                continue
+
+        logger.info(f"Extracted {len(mods)} total mods before filtering")
+        
+        return mods
+
+    @staticmethod
+    def roster_character_ids(raw_data: Dict[str, Any]) -> Set[str]:
+        """Base IDs of every character with mods equipped"""
+        unique_character_ids = set()
+        for unit in raw_data.get('rosterUnit', []):
+            if unit.get('equippedStatMod'):
+                character_id = unit.get('definitionId', 'UNKNOWN')
+                unique_character_ids.add(character_id.split(':')[0])
+        return unique_character_ids
+
+    def iter_roster_mods(self, raw_data: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], str, str]]:
+        """Yield (raw mod, unit definition ID, character display name) for every equipped mod"""
         roster_units = raw_data.get('rosterUnit', [])
         if not roster_units:
             logger.warning("No roster units found in player data")
-            return mods
+            return
         
         # STEP 1: Collect all unique character IDs first
-        unique_character_ids = set()
-        for unit in roster_units:
-            if unit.get('equippedStatMod'):
-                character_id = unit.get('definitionId', 'UNKNOWN')
-                base_character_id = character_id.split(':')[0]
-                unique_character_ids.add(base_character_id)
+        unique_character_ids = self.roster_character_ids(raw_data)
         
-        # STEP 2: Fetch ALL character names in ONE query
+        # STEP 2: Resolve ALL character names from the preloaded index (DB only for unknown IDs)
         logger.info(f"Fetching names for {len(unique_character_ids)} unique characters")
-        character_names = self.db.get_all_character_names(list(unique_character_ids))
+        with metrics.span("name_lookup"):
+            character_names = self.name_index.get_names(list(unique_character_ids))
         
-        # STEP 3: Now process mods with the pre-fetched names
+        # STEP 3: Hand out mods with the pre-fetched names
         for unit in roster_units:
             character_id = unit.get('definitionId', 'UNKNOWN')
             base_character_id = character_id.split(':')[0]
-            equipped_mods = unit.get('equippedStatMod', [])
-            
-            for mod_data in equipped_mods:
-                try:
-                    # Use the pre-fetched name
-                    character_display_name = character_names.get(base_character_id, base_character_id)
-                    
-                    processed_mod = self.process_single_mod(
-                        mod_data, 
-                        character_id, 
-                        character_display_name
-                    )
-                    if processed_mod:
-                        mods.append(processed_mod)
-                except Exception as e:
-                    logger.warning(f"Failed to process mod {mod_data.get('id', 'unknown')}: {str(e)}")
-                    continue
+            character_display_name = character_names.get(base_character_id, base_character_id)
+            for mod_data in unit.get('equippedStatMod', []):
+                yield mod_data, character_id, character_display_name
 
-        logger.info(f"Extracted {len(mods)} total mods before filtering")
-        
-        return mods
+    @staticmethod
+    def mod_signature(mod_data: Dict[str, Any], character_id: str, character_display_name: str) -> tuple:
+        """Everything in a raw mod that affects its evaluated output; equal signatures -> same result"""
+        primary = mod_data.get('primaryStat', {}).get('stat', {})
+        return (
+            mod_data.get('definitionId'), mod_data.get('level'), mod_data.get('tier'), mod_data.get('locked'),
+            character_id, character_display_name, primary.get('unitStatId'), primary.get('statValueDecimal'),
+            tuple(
+                (stat.get('stat', {}).get('unitStatId'), stat.get('stat', {}).get('statValueDecimal'),
+                 stat.get('statRolls'), tuple(stat.get('unscaledRollValue') or ()),
+                 stat.get('statRollerBoundsMin'), stat.get('statRollerBoundsMax'))
+                for stat in mod_data.get('secondaryStat', [])
+            )
+        )
     
-    def process_single_mod(self, mod_data: Dict[str, Any], character_id: str, character_display_name: str) -> Optional[ProcessedMod]:
+    def process_single_mod(self, mod_data: Dict[str, Any], character_id: str, character_display_name: str) -> Optional[ModRecord]:
         """Process a single mod from raw API data"""
         try:
             # Extract basic mod info
@@ -130,7 +155,7 @@ class ModProcessor:
             
             # Process primary stat
             primary_stat_data = mod_data.get('primaryStat', {}).get('stat', {})
-            primary_stat = PrimaryStat(
+            primary_stat = PrimaryStatRecord(
                 unitStatId=primary_stat_data.get('unitStatId', 0),
                 value=int(primary_stat_data.get('statValueDecimal', '0')) / 10000
             )
@@ -141,7 +166,7 @@ class ModProcessor:
             
             for stat_data in secondary_stats_data:
                 stat_info = stat_data.get('stat', {})
-                secondary_stat = SecondaryStat(
+                secondary_stat = SecondaryStatRecord(
                     unitStatId=stat_info.get('unitStatId', 0),
                     value=int(stat_info.get('statValueDecimal', '0')) / 10000,
                     rolls=stat_data.get('statRolls', 1),
@@ -151,7 +176,7 @@ class ModProcessor:
                 )
                 secondary_stats.append(secondary_stat)
             
-            return ProcessedMod(
+            return ModRecord(
                 id=mod_id,
                 definitionId=definition_id,
                 level=level,
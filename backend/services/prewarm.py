@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PrewarmScheduler:
+    """
+    Refreshes the most requested cache keys shortly before their TTL runs out
+
+    Request frequency is an exponentially decayed count per key, so a key
+    that was hot yesterday cools down on its own. Every run picks the
+    hottest keys expiring within lead_seconds and refreshes as many as the
+    Comlink budget (a token bucket of budget_per_minute requests) allows.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str], Awaitable[bool]],
+        expires_in: Callable[[str], Optional[float]],
+        budget_per_minute: float = 30,
+        lead_seconds: float = 300,
+        half_life_seconds: float = 3600,
+        min_score: float = 2,
+        max_tracked: int = 5000,
+        trim_to: float = 0.9
+    ):
+        self.refresh = refresh
+        self.expires_in = expires_in
+        self.budget_per_minute = budget_per_minute
+        self.lead_seconds = lead_seconds
+        self.decay_rate = math.log(2) / half_life_seconds
+        self.min_score = min_score
+        self.max_tracked = max_tracked
+        self.trim_to = trim_to
+
+        # key -> (score, time the score was last decayed)
+        self.scores: Dict[str, tuple] = {}
+        self._tokens = float(budget_per_minute)
+        self._tokens_at = time.monotonic()
+
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_for_budget = 0
+
+    def _score(self, key: str, now: float) -> float:
+        score, updated_at = self.scores.get(key, (0.0, now))
+        return score * math.exp(-self.decay_rate * (now - updated_at))
+
+    def record(self, key: str) -> None:
+        """Count one request for key"""
+        now = time.monotonic()
+        self.scores[key] = (self._score(key, now) + 1.0, now)
+        if len(self.scores) > self.max_tracked:
+            self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        """Keep the hottest trim_to share of max_tracked keys"""
+        # One O(n) pass frees room for the next tenth of max_tracked new keys,
+        # so the cost per request stays constant instead of a scan on every miss
+        keep = int(self.max_tracked * self.trim_to)
+        hottest = heapq.nlargest(keep, self.scores.items(), key=lambda item: self._score(item[0], now))
+        self.scores = dict(hottest)
+
+    def _take_tokens(self, wanted: int) -> int:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.budget_per_minute),
+            self._tokens + (now - self._tokens_at) * self.budget_per_minute / 60
+        )
+        self._tokens_at = now
+        granted = min(wanted, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def candidates(self) -> List[str]:
+        """Hot keys that are cached and expire within lead_seconds, hottest first"""
+        now = time.monotonic()
+        hot = []
+        for key in list(self.scores):
+            score = self._score(key, now)
+            if score < self.min_score:
+                continue
+            remaining = self.expires_in(key)
+            if remaining is not None and remaining <= self.lead_seconds:
+                hot.append((score, key))
+        hot.sort(reverse=True)
+        return [key for _, key in hot]
+
+    async def run_once(self) -> int:
+        """Refresh due hot keys within the budget, returns how many were refreshed"""
+        # expires_in may read a cache file, so the scan runs off the event loop
+        due = await asyncio.to_thread(self.candidates)
+        if not due:
+            return 0
+
+        granted = self._take_tokens(len(due))
+        self.skipped_for_budget += len(due) - granted
+        if granted < len(due):
+            logger.info(f"Pre-warm budget allows {granted} of {len(due)} due keys")
+
+        results = await asyncio.gather(*[self.refresh(key) for key in due[:granted]], return_exceptions=True)
+        refreshed = sum(1 for result in results if result is True)
+        self.refreshed += refreshed
+        self.failed += len(results) - refreshed
+        if results:
+            logger.info(f"Pre-warmed {refreshed} of {len(results)} hot keys")
+        return refreshed
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        hottest = sorted(((self._score(key, now), key) for key in self.scores), reverse=True)[:10]
+        return {
+            'tracked_keys': len(self.scores),
+            'budget_per_minute': self.budget_per_minute,
+            'lead_seconds': self.lead_seconds,
+            'refreshed': self.refreshed,
+            'failed': self.failed,
+            'skipped_for_budget': self.skipped_for_budget,
+            'hottest': [{'key': key, 'score': round(score, 2)} for score, key in hottest]
+        }
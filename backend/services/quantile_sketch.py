@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Optional
+import math
+import random
+import numpy as np
+import orjson
+
+# Level capacities shrink by this factor per level below the top one
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 2
+EMPTY = np.empty(0)
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: approximate ranks and quantiles of a stream in bounded memory
+
+    Items on level h each stand for 2**h values. When the sketch holds more
+    than its levels' capacities, a full level is sorted and every other item
+    (from a random offset) moves up a level, which keeps the total weight
+    exact and the rank error unbiased. Capacities shrink geometrically
+    below the top level, so a sketch keeps about 3k items however many
+    values it has seen. Two sketches merge level by level into one with the
+    same guarantees, which is what lets workers sketch separately.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.levels: List[np.ndarray] = [EMPTY]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(MIN_CAPACITY, math.ceil(self.k * CAPACITY_DECAY ** depth))
+
+    def _compress(self) -> None:
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for level, items in enumerate(self.levels):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(EMPTY)
+                items = np.sort(items)
+                # An odd item out stays on this level
+                leftover = items[:len(items) % 2]
+                promoted = items[len(leftover) + random.getrandbits(1)::2]
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+                break
+
+    def update(self, values: Any) -> None:
+        """Add values (any sequence of numbers; NaN and infinities are ignored)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one"""
+        if not other.count:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(EMPTY)
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.k)
+        sketch.levels = list(self.levels)
+        sketch.count, sketch.min, sketch.max = self.count, self.min, self.max
+        return sketch
+
+    def rank(self, value: float) -> float:
+        """Approximate share of the values <= value, 0 to 1"""
+        if not self.count:
+            return 0.0
+        below = sum(int(np.count_nonzero(items <= value)) << level for level, items in enumerate(self.levels))
+        return below / self.count
+
+    def quantiles(self, fractions: List[float]) -> List[Optional[float]]:
+        """Approximate value at each fraction (0 to 1) of the sorted values"""
+        if not self.count:
+            return [None] * len(fractions)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 1 << level) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        results = []
+        for fraction in fractions:
+            position = int(np.searchsorted(cumulative, fraction * self.count, side="left"))
+            value = float(items[min(position, len(items) - 1)])
+            results.append(min(max(value, self.min), self.max))
+        return results
+
+    @property
+    def retained(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def to_bytes(self) -> bytes:
+        return orjson.dumps({"k": self.k, "n": self.count, "min": self.min, "max": self.max, "levels": self.levels},
+                            option=orjson.OPT_SERIALIZE_NUMPY)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        state: Dict[str, Any] = orjson.loads(data)
+        sketch = cls(state["k"])
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in state["levels"]] or [EMPTY]
+        sketch.count = state["n"]
+        if sketch.count:
+            sketch.min, sketch.max = state["min"], state["max"]
+        return sketch
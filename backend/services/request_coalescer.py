@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RequestCoalescer:
+    """
+    Single-flight de-duplication of concurrent work keyed by a string
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result (or exception) instead of repeating it.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leader_count = 0
+        self.coalesced_count = 0
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        hold_until: Optional[Callable[[Any], Awaitable[Any]]] = None
+    ) -> Any:
+        """
+        Run factory() for key, or join the run already in flight
+
+        If hold_until is given, the key stays in flight after factory() returns
+        until hold_until(result) completes, so late callers keep joining a
+        result that is still being produced (e.g. a response stream).
+        """
+        task = self._in_flight.get(key)
+
+        if task is None:
+            self.leader_count += 1
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t, hold_until))
+        else:
+            self.coalesced_count += 1
+            logger.info(f"Coalesced request for key: {key}")
+
+        # Shield so one caller disconnecting doesn't cancel the shared work
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task, hold_until=None) -> None:
+        if hold_until is not None and not task.cancelled() and task.exception() is None:
+            holder = asyncio.ensure_future(hold_until(task.result()))
+            holder.add_done_callback(lambda h: self._release(key, task, h))
+            return
+        self._release(key, task)
+
+    def _release(self, key: str, task: asyncio.Task, holder: Optional[asyncio.Future] = None) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark exceptions as retrieved in case every caller went away
+        for future in (task, holder):
+            if future is not None and not future.cancelled():
+                future.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            'in_flight': len(self._in_flight),
+            'leader_requests': self.leader_count,
+            'coalesced_requests': self.coalesced_count
+        }
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional, Sequence
+import gzip
+import time
+import logging
+from services.metrics import metrics
+
+# Optional codecs: without the package the encoding is simply not offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Content-Encoding tokens, most preferred first when a client accepts several equally
+ENCODINGS = ("zstd", "br", "gzip")
+# Compressed size / original size
+RATIO_BUCKETS = (0.02, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0)
+
+def available_encodings() -> List[str]:
+    """ENCODINGS whose codec is installed"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [encoding for encoding in ENCODINGS if installed[encoding]]
+
+def negotiate_encoding(accept_encoding: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    The offered encoding the Accept-Encoding header prefers, None for identity
+
+    Highest q wins, ties go to the order of offered; "*" covers encodings not
+    listed and q=0 refuses one. Identity is always acceptable here, so a
+    header refusing everything still gets the uncompressed body.
+    """
+    if not accept_encoding or not offered:
+        return None
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.strip().lower()
+        if coding:
+            qualities[coding] = quality
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class ResponseCompressor:
+    """
+    Compressed copies of a response body, one per enabled Content-Encoding
+
+    Meant to run once when a body is cached, not per request, so levels can
+    be higher than a compressing proxy would use. Each run records the
+    compression ratio and the CPU time it took (this thread's, so other
+    requests running meanwhile don't count).
+    """
+
+    def __init__(self, encodings: Sequence[str] = ENCODINGS, levels: Optional[Dict[str, int]] = None,
+                 min_bytes: int = 1024):
+        installed = available_encodings()
+        self.encodings = [encoding for encoding in ENCODINGS if encoding in encodings and encoding in installed]
+        missing = [encoding for encoding in encodings if encoding not in self.encodings]
+        if missing:
+            logger.warning(f"Response compression: {', '.join(missing)} unavailable, offering "
+                           f"{', '.join(self.encodings) or 'none'}")
+        self.levels = {"gzip": 6, "br": 5, "zstd": 3, **(levels or {})}
+        self.min_bytes = min_bytes
+
+    def _compress(self, encoding: str, data: bytes) -> bytes:
+        if encoding == "gzip":
+            # mtime=0: the same body always compresses to the same bytes
+            return gzip.compress(data, compresslevel=self.levels["gzip"], mtime=0)
+        if encoding == "br":
+            return brotli.compress(data, quality=self.levels["br"])
+        # A ZstdCompressor can't be shared between threads; creating one is cheap
+        return zstandard.ZstdCompressor(level=self.levels["zstd"]).compress(data)
+
+    def compress(self, data: bytes) -> Dict[str, bytes]:
+        """Encoding -> compressed body; empty for bodies too small to be worth it"""
+        if len(data) < self.min_bytes:
+            return {}
+        variants = {}
+        for encoding in self.encodings:
+            started = time.thread_time()
+            variants[encoding] = self._compress(encoding, data)
+            cpu_seconds = time.thread_time() - started
+            metrics.inc("swgoh_compression_cpu_seconds_total", cpu_seconds, encoding=encoding)
+            metrics.observe("swgoh_compression_ratio", len(variants[encoding]) / len(data), RATIO_BUCKETS,
+                            encoding=encoding)
+        return variants
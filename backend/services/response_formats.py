@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.swgoh.columnar+json"
+
+# Per-mod scalar fields of the row format, stored as one array each
+MOD_COLUMNS = ("id", "d", "l", "t", "k", "e")
+SECONDARY_COLUMNS = ("i", "v", "r", "e")
+
+def _media_ranges(accept: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in accept.split(","):
+        media_type, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_type.strip().lower(), quality))
+    return ranges
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    "columnar" when the Accept header asks for COLUMNAR_MEDIA_TYPE at least as
+    strongly as for JSON, else "json"
+
+    Wildcards only ever select JSON, so browsers and clients that don't know
+    about the columnar format keep getting the row format.
+    """
+    if not accept or COLUMNAR_MEDIA_TYPE not in accept:
+        return "json"
+    columnar_q = 0.0
+    json_q = {}
+    for media_type, quality in _media_ranges(accept):
+        if media_type == COLUMNAR_MEDIA_TYPE:
+            columnar_q = max(columnar_q, quality)
+        elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q[media_type] = max(json_q.get(media_type, 0.0), quality)
+    # The most specific range decides JSON's quality
+    json_quality = next((json_q[t] for t in (JSON_MEDIA_TYPE, "application/*", "*/*") if t in json_q), 0.0)
+    return "columnar" if columnar_q > 0 and columnar_q >= json_quality else "json"
+
+def columnar_mods(mods: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Mods in row format (build_minimal_mod) as one array per field
+
+    Layout:
+        n                  mod count
+        id d l t k e       one value per mod
+        u                  index into units per mod; units is [[c, cn], ...]
+        pi pv              primary stat id / value per mod
+        w                  per workflow, an index into codes per mod (only if mods carry verdicts)
+        xl xs              upgrade projection per mod, [speed, efficiency] or null
+                           (only if some mod carries one)
+        sn                 secondary count per mod; si sv sr se hold every
+                           secondary in mod order
+        rn                 roll efficiency count per secondary; re holds them all
+    """
+    columns: Dict[str, Any] = {"n": len(mods)}
+    for name in MOD_COLUMNS:
+        columns[name] = [mod[name] for mod in mods]
+
+    units: Dict[Tuple[str, str], int] = {}
+    columns["u"] = [units.setdefault((mod["c"], mod["cn"]), len(units)) for mod in mods]
+    columns["units"] = [list(unit) for unit in units]
+    columns["pi"] = [mod["p"]["i"] for mod in mods]
+    columns["pv"] = [mod["p"]["v"] for mod in mods]
+
+    if any("x" in mod for mod in mods):
+        columns["xl"] = [mod.get("x", {}).get("lv") for mod in mods]
+        columns["xs"] = [mod.get("x", {}).get("sl") for mod in mods]
+
+    if mods and "w" in mods[0]:
+        codes: Dict[str, int] = {}
+        columns["w"] = [[codes.setdefault(code, len(codes)) for code in workflow]
+                        for workflow in zip(*(mod["w"] for mod in mods))]
+        columns["codes"] = list(codes)
+
+    secondaries = [stat for mod in mods for stat in mod["s"]]
+    columns["sn"] = [len(mod["s"]) for mod in mods]
+    for name in SECONDARY_COLUMNS:
+        columns["s" + name] = [stat[name] for stat in secondaries]
+    columns["rn"] = [len(stat["re"]) for stat in secondaries]
+    columns["re"] = [value for stat in secondaries for value in stat["re"]]
+    return columns
+
+def row_mods(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inverse of columnar_mods: the row format mods back"""
+    secondaries = []
+    roll_offset = 0
+    for index, roll_count in enumerate(columns["rn"]):
+        secondary = {name: columns["s" + name][index] for name in SECONDARY_COLUMNS}
+        secondary["re"] = columns["re"][roll_offset:roll_offset + roll_count]
+        roll_offset += roll_count
+        secondaries.append(secondary)
+
+    verdicts = None
+    if "w" in columns:
+        codes = columns["codes"]
+        verdicts = list(zip(*([codes[code] for code in workflow] for workflow in columns["w"])))
+        # zip(*...) over zero workflows yields nothing; every mod still carries its (empty) list
+        if not verdicts:
+            verdicts = [()] * columns["n"]
+
+    mods = []
+    offset = 0
+    units = columns["units"]
+    for index in range(columns["n"]):
+        character, display_name = units[columns["u"][index]]
+        count = columns["sn"][index]
+        mod = {
+            "id": columns["id"][index],
+            "d": columns["d"][index],
+            "l": columns["l"][index],
+            "t": columns["t"][index],
+            "k": columns["k"][index],
+            "c": character,
+            "cn": display_name,
+            "p": {"i": columns["pi"][index], "v": columns["pv"][index]},
+            "s": secondaries[offset:offset + count],
+            "e": columns["e"][index]
+        }
+        offset += count
+        if "xl" in columns:
+            projection = {plan: columns[column][index] for plan, column in (("lv", "xl"), ("sl", "xs"))
+                          if columns[column][index] is not None}
+            if projection:
+                mod["x"] = projection
+        if verdicts is not None:
+            mod["w"] = list(verdicts[index])
+        mods.append(mod)
+    return mods
+
+def encode_columnar(body: bytes) -> bytes:
+    """
+    A /api/player body (full or delta) with its mods in columnar form
+
+    Every other field, and their order, stays the same ("format" comes
+    first), so the body still ends with the snapshot, collectionStats and
+    dataSource / cached fields.
+    """
+    player = {"format": "columnar", **orjson.loads(body)}
+    player["mods"] = columnar_mods(player.get("mods", []))
+    return orjson.dumps(player)
@@ -0,0 +1,65 @@
+from typing import AsyncIterator, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResponseStream:
+    """
+    Append-only buffer of encoded response chunks shared by many readers
+
+    A single producer appends chunks as it encodes them; every reader (the
+    request that started the work and any coalesced ones) replays the chunks
+    from the start and then follows the producer until finish() or fail().
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self._notify()
+
+    def fail(self, error: BaseException) -> None:
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def wait_started(self) -> None:
+        """Wait for the first chunk; re-raises errors that happened before any output"""
+        while not self.chunks and not self.done:
+            await self._changed.wait()
+        if not self.chunks and self.error is not None:
+            raise self.error
+
+    async def wait_done(self) -> bytes:
+        """Wait for the whole body and return it"""
+        while not self.done:
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return b"".join(self.chunks)
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        position = 0
+        while True:
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    # Headers are already sent; all we can do is cut the body short
+                    logger.error(f"Response stream aborted: {self.error}")
+                return
+            await self._changed.wait()
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import time
+import orjson
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import EvaluationEngine, WorkflowEngine, load_workflow_engine
+from services.metrics import metrics
+from services.mod_processor import ModProcessor
+from services.upgrade_simulator import UpgradeSimulator
+
+logger = logging.getLogger(__name__)
+
+# (mod_data, character_id, character_display_name) as yielded by ModProcessor.iter_roster_mods
+RawModItem = Tuple[Dict[str, Any], str, str]
+# (dots, tier, workflow verdicts, encoded compact mod), or None for a mod that failed to process
+Evaluation = Optional[Tuple[int, int, Optional[tuple], bytes]]
+
+def build_minimal_mod(mod, efficiency_data: dict, verdicts: Optional[tuple] = None,
+                      projection: Optional[dict] = None) -> dict:
+    """
+    Compact mod structure; verdicts are workflow codes in the order of the response's workflows,
+    projection the UpgradeProjection result ("x": {"lv": [speed, efficiency], "sl": [...]})
+    """
+    minimal_mod = {
+        "id": mod.id,
+        "d": mod.definitionId,
+        "l": mod.level,
+        "t": mod.tier,
+        "k": mod.locked,
+        "c": mod.characterId.split(':')[0],
+        "cn": mod.characterDisplayName,
+        "p": {
+            "i": mod.primaryStat.unitStatId,
+            "v": round(mod.primaryStat.value, 4)
+        },
+        "s": [],
+        "e": round(efficiency_data["overall"], 1)
+    }
+
+    # Build secondary stats (this part stays the same)
+    for i, stat in enumerate(mod.secondaryStats):
+        stat_key = f"stat_{i}"
+        stat_efficiency_data = efficiency_data["individual"].get(stat_key, {})
+
+        minimal_mod["s"].append({
+            "i": stat.unitStatId,
+            "v": round(stat.value, 4),
+            "r": stat.rolls,
+            "e": round(stat_efficiency_data.get("efficiency", 0), 1),
+            "re": [round(e, 1) for e in stat_efficiency_data.get("rollEfficiencies", [])]
+        })
+
+    if projection is not None:
+        minimal_mod["x"] = projection
+
+    if verdicts is not None:
+        minimal_mod["w"] = verdicts
+
+    return minimal_mod
+
+class RosterEvaluator:
+    """
+    The CPU-bound part of a player response: raw changed mods in, encoded mods out
+
+    Self-contained (no database, no event loop), so it runs the same inline,
+    on a thread pool or inside a process pool worker.
+    """
+
+    def __init__(self, processor: ModProcessor, engine: EvaluationEngine, workflow_engine: Optional[WorkflowEngine],
+                 simulator: Optional[UpgradeSimulator] = None):
+        self.processor = processor
+        self.engine = engine
+        self.workflow_engine = workflow_engine
+        self.simulator = simulator
+
+    def evaluate(self, items: Sequence[RawModItem]) -> List[Evaluation]:
+        evaluations, timings = self.evaluate_timed(items)
+        for stage, seconds in timings.items():
+            metrics.observe_stage(stage, seconds)
+        return evaluations
+
+    def evaluate_timed(self, items: Sequence[RawModItem]) -> Tuple[List[Evaluation], Dict[str, float]]:
+        """
+        evaluate, returning the seconds spent per stage instead of recording them
+
+        A process pool worker's metrics never reach the parent, so
+        evaluate_packed sends these back with the result.
+        """
+        timings: Dict[str, float] = {}
+        records = [self.processor.process_single_mod(*item) for item in items]
+        valid = [record for record in records if record is not None]
+
+        started = time.perf_counter()
+        batch = self.engine.calculate_roll_efficiency_batch(valid)
+        efficiency_results = batch.to_mod_results()
+        timings["efficiency"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if self.simulator is not None:
+            projections = self.simulator.project(valid, batch).to_mod_results()
+        else:
+            projections = [None] * len(valid)
+        timings["upgrade_projection"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if self.workflow_engine is not None:
+            verdicts = [self.workflow_engine.evaluate(record) for record in valid]
+        else:
+            verdicts = [None] * len(valid)
+        timings["workflow_verdicts"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        evaluations: List[Evaluation] = []
+        evaluated = iter(zip(valid, efficiency_results, verdicts, projections))
+        for record in records:
+            if record is None:
+                evaluations.append(None)
+                continue
+            record, efficiency_data, mod_verdicts, projection = next(evaluated)
+            encoded = orjson.dumps(build_minimal_mod(record, efficiency_data, mod_verdicts, projection))
+            evaluations.append((record.dots, record.tier, mod_verdicts, encoded))
+        timings["serialization"] = time.perf_counter() - started
+        return evaluations, timings
+
+# Evaluator of a process pool worker, built once by init_worker
+_worker_evaluator: Optional[RosterEvaluator] = None
+
+def init_worker(workflows_config_path: str, project_upgrades: bool = True) -> None:
+    """Process pool initializer: build this worker's own engines"""
+    global _worker_evaluator
+    # The name index is never queried here; display names come with the items
+    _worker_evaluator = RosterEvaluator(
+        ModProcessor(name_index=CharacterNameIndex()),
+        EvaluationEngine(),
+        load_workflow_engine(workflows_config_path),
+        UpgradeSimulator() if project_upgrades else None
+    )
+
+def pack_items(items: Sequence[RawModItem]) -> bytes:
+    """Raw mods as one orjson blob: much cheaper to send to a worker than pickled dicts"""
+    return orjson.dumps(items)
+
+def evaluate_packed(packed: bytes) -> Tuple[List[Evaluation], Dict[str, float]]:
+    """Process pool entry point: RosterEvaluator.evaluate_timed, the parent records the timings"""
+    return _worker_evaluator.evaluate_timed(orjson.loads(packed))
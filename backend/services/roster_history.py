@@ -0,0 +1,334 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+import orjson
+from services.metrics import metrics
+from services.roster_stats import SPEED_STAT_ID, SPEED_THRESHOLDS
+
+logger = logging.getLogger(__name__)
+
+# (mod id, ModProcessor.mod_signature, encoded compact mod) for each mod of a roster
+HistoryMod = Tuple[str, tuple, bytes]
+
+SNAPSHOT_COLUMNS = ("id", "taken_at", "confirmed_at", "version", "player_name", "total_mods", "six_dot_mods",
+                    "average_efficiency", "max_speed", "speed_secondaries")
+
+# Compact mod fields in build_minimal_mod order; the wearer, the lock and the lock-dependent
+# verdicts (SPAN_FIELDS) are stored per span, everything else once per mod version
+MOD_FIELDS = ("id", "d", "l", "t", "k", "c", "cn", "p", "s", "e", "x", "w")
+SPAN_FIELDS = ("k", "c", "cn", "w")
+
+def roll_content_hash(signature: tuple) -> str:
+    """Hash of what a mod is (definition, level, tier, stats, rolls); who wears it and the lock don't count"""
+    definition_id, level, tier, _locked, _character_id, _display_name, *stats = signature
+    return hashlib.blake2b(repr((definition_id, level, tier, *stats)).encode(), digest_size=12).hexdigest()
+
+def span_state_hash(signature: tuple) -> str:
+    """Hash of who wears a mod and whether it is locked; a change closes the mod's span"""
+    _definition_id, _level, _tier, locked, character_id, display_name, *_stats = signature
+    return hashlib.blake2b(repr((locked, character_id, display_name)).encode(), digest_size=8).hexdigest()
+
+def split_mod(encoded: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """(roll content without SPAN_FIELDS, SPAN_FIELDS as JSON) of an encoded compact mod"""
+    mod = orjson.loads(encoded)
+    state = {field: mod.pop(field) for field in SPAN_FIELDS if field in mod}
+    return mod, orjson.dumps(state)
+
+def join_mod(content: bytes, state: Optional[bytes]) -> bytes:
+    """The encoded mod again, fields in build_minimal_mod order"""
+    if state is None:
+        # Recorded before spans carried state: the version payload is the whole mod
+        return content
+    parts = orjson.loads(content)
+    for field in SPAN_FIELDS:
+        parts.pop(field, None)
+    parts.update(orjson.loads(state))
+    mod = {field: parts.pop(field) for field in MOD_FIELDS if field in parts}
+    mod.update(parts)
+    return orjson.dumps(mod)
+
+class RosterHistory:
+    """
+    Every evaluated roster over time, in a local SQLite file
+
+    Mods are stored once per (mod id, roll content) in mod_versions. A
+    snapshot only records which versions appeared or disappeared since the
+    previous one, as mod_spans rows [from_snapshot, to_snapshot); a span also
+    holds the wearer, lock and verdicts, so moving or (un)locking a mod
+    opens a new span on the same version. Storage grows with real changes; a refresh that changed nothing just confirms
+    the latest snapshot. Each snapshot row carries its roster aggregates, so
+    a trend is an index range scan over (ally_code, taken_at).
+
+    record() only queues the roster: a single writer thread does the SQLite
+    work, off the request path. When the queue is full the roster is
+    dropped (and counted); the next refresh records it.
+    """
+
+    def __init__(self, path: str, max_pending: int = 100, compression_level: int = 6):
+        self.path = path
+        self.compression_level = compression_level
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._writer_conn = self._connect()
+        self._create_schema()
+        # Queries come from request threads on their own connection; WAL lets them read while the writer writes
+        self._reader_conn = self._connect()
+        self._reader_lock = threading.Lock()
+
+        self.recorded = 0
+        self.unchanged = 0
+        self.dropped = 0
+        self.failed = 0
+        self.mod_versions_written = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_loop, name="roster-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._writer_conn
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY,
+                ally_code TEXT NOT NULL,
+                taken_at REAL NOT NULL,
+                confirmed_at REAL NOT NULL,
+                version TEXT NOT NULL,
+                player_name TEXT,
+                total_mods INTEGER NOT NULL DEFAULT 0,
+                six_dot_mods INTEGER NOT NULL DEFAULT 0,
+                average_efficiency REAL NOT NULL DEFAULT 0,
+                max_speed REAL NOT NULL DEFAULT 0,
+                speed_secondaries TEXT NOT NULL DEFAULT '{}'
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_player_time ON snapshots (ally_code, taken_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS mod_versions (
+                id INTEGER PRIMARY KEY,
+                mod_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dots INTEGER NOT NULL,
+                efficiency REAL NOT NULL,
+                speed REAL,
+                payload BLOB NOT NULL,
+                UNIQUE (mod_id, content_hash)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS mod_spans (
+                ally_code TEXT NOT NULL,
+                version_id INTEGER NOT NULL,
+                from_snapshot INTEGER NOT NULL,
+                to_snapshot INTEGER,
+                state_hash TEXT,
+                state BLOB
+            )
+        """)
+        span_columns = {row[1] for row in conn.execute("PRAGMA table_info(mod_spans)")}
+        for column, column_type in (("state_hash", "TEXT"), ("state", "BLOB")):
+            if column not in span_columns:
+                conn.execute(f"ALTER TABLE mod_spans ADD COLUMN {column} {column_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_open ON mod_spans (ally_code, to_snapshot)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_spans_from ON mod_spans (ally_code, from_snapshot)")
+
+    def record(self, ally_code: str, version: str, player_name: str, mods: Sequence[HistoryMod]) -> bool:
+        """Queue a freshly evaluated roster; never blocks. False if dropped"""
+        try:
+            self._queue.put_nowait((ally_code, time.time(), version, player_name, mods))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"History queue full, not recording roster of {ally_code}")
+            return False
+
+    def flush(self) -> None:
+        """Wait until every queued roster is written"""
+        self._queue.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                with metrics.span("history_write"):
+                    self._write(*item)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to record roster history for {item[0]}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, ally_code: str, taken_at: float, version: str, player_name: str,
+               mods: Sequence[HistoryMod]) -> None:
+        conn = self._writer_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            latest = conn.execute(
+                "SELECT id, version FROM snapshots WHERE ally_code = ? ORDER BY taken_at DESC LIMIT 1", (ally_code,)
+            ).fetchone()
+            if latest is not None and latest[1] == version:
+                conn.execute("UPDATE snapshots SET confirmed_at = ? WHERE id = ?", (taken_at, latest[0]))
+                conn.execute("COMMIT")
+                self.unchanged += 1
+                return
+
+            snapshot_id = conn.execute(
+                "INSERT INTO snapshots (ally_code, taken_at, confirmed_at, version, player_name) VALUES (?, ?, ?, ?, ?)",
+                (ally_code, taken_at, taken_at, version, player_name)
+            ).lastrowid
+
+            # Open spans: what the previous snapshot held. A span is one roll content on one wearer with
+            # one lock state, so a mod that moves or gets (un)locked closes its span too
+            open_spans = {
+                mod_id: (rowid, (content_hash, state_hash))
+                for rowid, mod_id, content_hash, state_hash in conn.execute(
+                    "SELECT s.rowid, v.mod_id, v.content_hash, s.state_hash FROM mod_spans s "
+                    "JOIN mod_versions v ON v.id = s.version_id WHERE s.ally_code = ? AND s.to_snapshot IS NULL",
+                    (ally_code,)
+                )
+            }
+            current = {mod_id: ((roll_content_hash(signature), span_state_hash(signature)), encoded)
+                       for mod_id, signature, encoded in mods}
+
+            closed = [(snapshot_id, rowid) for mod_id, (rowid, identity) in open_spans.items()
+                      if current.get(mod_id, (None,))[0] != identity]
+            conn.executemany("UPDATE mod_spans SET to_snapshot = ? WHERE rowid = ?", closed)
+
+            opened = []
+            for mod_id, ((content_hash, state_hash), encoded) in current.items():
+                previous = open_spans.get(mod_id)
+                if previous is not None and previous[1] == (content_hash, state_hash):
+                    continue
+                content, state = split_mod(encoded)
+                opened.append((ally_code, self._version_id(mod_id, content_hash, content), snapshot_id,
+                               state_hash, state))
+            conn.executemany(
+                "INSERT INTO mod_spans (ally_code, version_id, from_snapshot, to_snapshot, state_hash, state) "
+                "VALUES (?, ?, ?, NULL, ?, ?)", opened
+            )
+
+            self._store_aggregates(ally_code, snapshot_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.recorded += 1
+        logger.info(f"Recorded roster history for {ally_code}: {len(opened)} mods changed, {len(closed)} replaced or removed")
+
+    def _version_id(self, mod_id: str, content_hash: str, mod: Dict[str, Any]) -> int:
+        """mod_versions row of this roll content (a mod without SPAN_FIELDS), stored the first time it is seen"""
+        conn = self._writer_conn
+        row = conn.execute(
+            "SELECT id FROM mod_versions WHERE mod_id = ? AND content_hash = ?", (mod_id, content_hash)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        speed = next((stat["v"] for stat in mod.get("s", []) if stat.get("i") == SPEED_STAT_ID), None)
+        self.mod_versions_written += 1
+        return conn.execute(
+            "INSERT INTO mod_versions (mod_id, content_hash, dots, efficiency, speed, payload) VALUES (?, ?, ?, ?, ?, ?)",
+            (mod_id, content_hash, int(mod.get("d", "00")[1:2] or 0), mod.get("e", 0.0), speed,
+             zlib.compress(orjson.dumps(mod), self.compression_level))
+        ).lastrowid
+
+    def _store_aggregates(self, ally_code: str, snapshot_id: int) -> None:
+        """The roster_stats.summarize_player figures of the roster now held in open spans"""
+        speed_sums = ", ".join(f"COALESCE(SUM(v.speed >= {threshold}), 0)" for threshold in SPEED_THRESHOLDS)
+        row = self._writer_conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(v.dots = 6), 0), COALESCE(AVG(v.efficiency), 0), COALESCE(MAX(v.speed), 0), "
+            f"{speed_sums} FROM mod_spans s JOIN mod_versions v ON v.id = s.version_id "
+            f"WHERE s.ally_code = ? AND s.to_snapshot IS NULL", (ally_code,)
+        ).fetchone()
+        total, six_dot, average, max_speed, *speed_counts = row
+        speed_secondaries = {f"{threshold}+": count for threshold, count in zip(SPEED_THRESHOLDS, speed_counts)}
+        self._writer_conn.execute(
+            "UPDATE snapshots SET total_mods = ?, six_dot_mods = ?, average_efficiency = ?, max_speed = ?, "
+            "speed_secondaries = ? WHERE id = ?",
+            (total, six_dot, round(average, 1), max_speed, orjson.dumps(speed_secondaries).decode(), snapshot_id)
+        )
+
+    @staticmethod
+    def _snapshot_dict(row: tuple) -> Dict[str, Any]:
+        snapshot = dict(zip(SNAPSHOT_COLUMNS, row))
+        return {
+            "snapshot": snapshot["version"],
+            "takenAt": snapshot["taken_at"],
+            "confirmedAt": snapshot["confirmed_at"],
+            "playerName": snapshot["player_name"],
+            "totalMods": snapshot["total_mods"],
+            "sixDotMods": snapshot["six_dot_mods"],
+            "averageEfficiency": snapshot["average_efficiency"],
+            "speedSecondaries": orjson.loads(snapshot["speed_secondaries"]),
+            "maxSpeedSecondary": snapshot["max_speed"]
+        }
+
+    def trend(self, ally_code: str, since: float, until: float) -> List[Dict[str, Any]]:
+        """
+        Roster aggregates of every snapshot taken between since and until
+
+        The last snapshot before since comes first, since it describes the
+        roster at the start of the range.
+        """
+        columns = ", ".join(SNAPSHOT_COLUMNS)
+        with self._reader_lock:
+            before = self._reader_conn.execute(
+                f"SELECT {columns} FROM snapshots WHERE ally_code = ? AND taken_at < ? ORDER BY taken_at DESC LIMIT 1",
+                (ally_code, since)
+            ).fetchall()
+            rows = self._reader_conn.execute(
+                f"SELECT {columns} FROM snapshots WHERE ally_code = ? AND taken_at BETWEEN ? AND ? ORDER BY taken_at",
+                (ally_code, since, until)
+            ).fetchall()
+        return [self._snapshot_dict(row) for row in before + rows]
+
+    def roster_at(self, ally_code: str, at: float) -> Optional[Tuple[Dict[str, Any], List[bytes]]]:
+        """The snapshot current at time at, and its encoded mods; None if there was none yet"""
+        with self._reader_lock:
+            row = self._reader_conn.execute(
+                f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM snapshots WHERE ally_code = ? AND taken_at <= ? "
+                f"ORDER BY taken_at DESC LIMIT 1", (ally_code, at)
+            ).fetchone()
+            if row is None:
+                return None
+            snapshot_id = row[0]
+            payloads = self._reader_conn.execute(
+                "SELECT v.payload, s.state FROM mod_spans s JOIN mod_versions v ON v.id = s.version_id "
+                "WHERE s.ally_code = ? AND s.from_snapshot <= ? AND (s.to_snapshot IS NULL OR s.to_snapshot > ?) "
+                "ORDER BY v.id", (ally_code, snapshot_id, snapshot_id)
+            ).fetchall()
+        return self._snapshot_dict(row), [join_mod(zlib.decompress(payload), state) for payload, state in payloads]
+
+    def close(self) -> None:
+        """Write what is queued, then stop the writer"""
+        self._queue.put(None)
+        self._writer.join()
+        self._writer_conn.close()
+        with self._reader_lock:
+            self._reader_conn.close()
+        logger.info("Roster history closed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'pending': self._queue.qsize(),
+            'recorded': self.recorded,
+            'unchanged': self.unchanged,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'mod_versions_written': self.mod_versions_written
+        }
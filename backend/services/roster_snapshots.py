@@ -0,0 +1,190 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import copy
+import logging
+from services.mod_processor import ModProcessor
+
+logger = logging.getLogger(__name__)
+
+class ModEntry:
+    """One evaluated mod of a snapshot: its raw-data signature and encoded output"""
+    __slots__ = ('signature', 'encoded', 'dots', 'tier', 'verdicts')
+
+    def __init__(self, signature: tuple, encoded: Optional[bytes], dots: int, tier: int,
+                 verdicts: Optional[tuple]):
+        self.signature = signature
+        self.encoded = encoded
+        self.dots = dots
+        self.tier = tier
+        self.verdicts = verdicts
+
+class RosterSnapshot:
+    """
+    Last evaluated roster of one player
+
+    mods is keyed by mod id in roster order. changed_ids / removed_ids describe
+    how this snapshot differs from previous_version, which is what a delta
+    response sends to a client still holding previous_version.
+    """
+    __slots__ = ('version', 'previous_version', 'player_name', 'last_updated', 'mods', 'collection_stats',
+                 'changed_ids', 'removed_ids')
+
+    def __init__(self, version: str, previous_version: Optional[str], player_name: str, last_updated: str,
+                 mods: "OrderedDict[str, ModEntry]", collection_stats: Dict[str, Any],
+                 changed_ids: List[str], removed_ids: List[str]):
+        self.version = version
+        self.previous_version = previous_version
+        self.player_name = player_name
+        self.last_updated = last_updated
+        self.mods = mods
+        self.collection_stats = collection_stats
+        self.changed_ids = changed_ids
+        self.removed_ids = removed_ids
+
+def empty_collection_stats(workflow_keys: Sequence[str], result_codes: Sequence[str]) -> Dict[str, Any]:
+    return {
+        "totalMods": 0,
+        "byDots": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0, "6": 0},
+        "byTier": {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0},
+        "byRecommendation": {key: {code: 0 for code in result_codes} for key in workflow_keys}
+    }
+
+def patch_collection_stats(stats: Dict[str, Any], entry: ModEntry, workflow_keys: Sequence[str], delta: int) -> None:
+    """Add (delta=1) or remove (delta=-1) one mod's contribution to collectionStats"""
+    stats["totalMods"] += delta
+    dots = str(entry.dots)
+    if dots in stats["byDots"]:
+        stats["byDots"][dots] += delta
+    tier = str(entry.tier)
+    if tier in stats["byTier"]:
+        stats["byTier"][tier] += delta
+    if entry.verdicts:
+        by_recommendation = stats["byRecommendation"]
+        for key, code in zip(workflow_keys, entry.verdicts):
+            # "LV:15" counts as LV
+            by_recommendation[key][code.split(":", 1)[0]] += delta
+
+class RosterDiff:
+    """
+    A refreshed roster compared with the previous snapshot
+
+    mods holds an entry per current mod in roster order: unchanged mods reuse
+    the previous ModEntry (already encoded), new or changed ones get a
+    placeholder entry, and their ids / raw (mod_data, character_id,
+    display_name) items are listed in changed_ids / changed_items for
+    evaluation. apply_evaluations() fills the placeholders in.
+    """
+
+    def __init__(self, previous: Optional[RosterSnapshot]):
+        self.previous = previous
+        self.mods: "OrderedDict[str, ModEntry]" = OrderedDict()
+        self.changed_ids: List[str] = []
+        self.changed_items: List[Tuple[Dict[str, Any], str, str]] = []
+        self.removed_ids: List[str] = []
+
+def diff_roster(processor: ModProcessor, raw_data: Dict[str, Any], previous: Optional[RosterSnapshot]) -> RosterDiff:
+    """Find the mods that are new or changed since the previous snapshot; only those need evaluating"""
+    diff = RosterDiff(previous)
+    previous_mods = previous.mods if previous is not None else {}
+
+    for mod_data, character_id, character_display_name in processor.iter_roster_mods(raw_data):
+        mod_id = mod_data.get('id', '')
+        if mod_id in diff.mods:
+            logger.warning(f"Duplicate mod id in roster: {mod_id}")
+            continue
+        signature = processor.mod_signature(mod_data, character_id, character_display_name)
+        old_entry = previous_mods.get(mod_id)
+        if old_entry is not None and old_entry.signature == signature:
+            diff.mods[mod_id] = old_entry
+            continue
+
+        diff.mods[mod_id] = ModEntry(signature, None, 0, 0, None)
+        diff.changed_ids.append(mod_id)
+        diff.changed_items.append((mod_data, character_id, character_display_name))
+
+    diff.removed_ids = [mod_id for mod_id in previous_mods if mod_id not in diff.mods]
+    return diff
+
+def apply_evaluations(diff: RosterDiff, evaluations: Sequence[Optional[tuple]]) -> None:
+    """
+    Fill the changed entries from RosterEvaluator results (dots, tier, verdicts, encoded)
+
+    Mods that failed to process (None) are dropped from the roster, and count
+    as removed if the previous snapshot had them.
+    """
+    changed_ids = []
+    previous_mods = diff.previous.mods if diff.previous is not None else {}
+    for mod_id, evaluation in zip(diff.changed_ids, evaluations):
+        if evaluation is None:
+            del diff.mods[mod_id]
+            if mod_id in previous_mods:
+                diff.removed_ids.append(mod_id)
+            continue
+        entry = diff.mods[mod_id]
+        entry.dots, entry.tier, entry.verdicts, entry.encoded = evaluation
+        changed_ids.append(mod_id)
+    diff.changed_ids = changed_ids
+    diff.changed_items = []
+
+def patched_collection_stats(diff: RosterDiff, workflow_keys: Sequence[str],
+                             result_codes: Sequence[str]) -> Dict[str, Any]:
+    """collectionStats of the refreshed roster, patched from the previous totals"""
+    if diff.previous is None:
+        stats = empty_collection_stats(workflow_keys, result_codes)
+    else:
+        stats = copy.deepcopy(diff.previous.collection_stats)
+        previous_mods = diff.previous.mods
+        for mod_id in diff.removed_ids:
+            patch_collection_stats(stats, previous_mods[mod_id], workflow_keys, -1)
+        for mod_id in diff.changed_ids:
+            if mod_id in previous_mods:
+                patch_collection_stats(stats, previous_mods[mod_id], workflow_keys, -1)
+
+    for mod_id in diff.changed_ids:
+        patch_collection_stats(stats, diff.mods[mod_id], workflow_keys, 1)
+    return stats
+
+class RosterSnapshotStore:
+    """Per-process LRU of the last RosterSnapshot for each ally code"""
+
+    def __init__(self, max_players: int = 500):
+        self.max_players = max_players
+        self.snapshots: "OrderedDict[str, RosterSnapshot]" = OrderedDict()
+        self.reused_mods = 0
+        self.evaluated_mods = 0
+        self.removed_mods = 0
+
+    def get(self, ally_code: str) -> Optional[RosterSnapshot]:
+        snapshot = self.snapshots.get(ally_code)
+        if snapshot is not None:
+            self.snapshots.move_to_end(ally_code)
+        return snapshot
+
+    def put(self, ally_code: str, snapshot: RosterSnapshot) -> None:
+        self.snapshots[ally_code] = snapshot
+        self.snapshots.move_to_end(ally_code)
+        while len(self.snapshots) > self.max_players:
+            oldest, _ = self.snapshots.popitem(last=False)
+            logger.info(f"Dropped roster snapshot for {oldest}")
+
+    def record_diff(self, reused: int, evaluated: int, removed: int) -> None:
+        self.reused_mods += reused
+        self.evaluated_mods += evaluated
+        self.removed_mods += removed
+
+    def delete(self, ally_code: str) -> None:
+        self.snapshots.pop(ally_code, None)
+
+    def clear(self) -> None:
+        self.snapshots.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.reused_mods + self.evaluated_mods
+        return {
+            'players': len(self.snapshots),
+            'max_players': self.max_players,
+            'reused_mods': self.reused_mods,
+            'evaluated_mods': self.evaluated_mods,
+            'removed_mods': self.removed_mods,
+            'reuse_rate': round(self.reused_mods / total * 100, 2) if total > 0 else 0
+        }
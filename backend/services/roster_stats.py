@@ -0,0 +1,68 @@
+from typing import Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+SPEED_STAT_ID = 5
+SPEED_THRESHOLDS = (10, 15, 20)
+
+def summarize_player(player: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-player mod summary from a /api/player response body"""
+    mods = player.get("mods", [])
+    total_efficiency = 0.0
+    six_dot_mods = 0
+    speed_counts = {threshold: 0 for threshold in SPEED_THRESHOLDS}
+    max_speed = 0.0
+
+    for mod in mods:
+        total_efficiency += mod.get("e", 0.0)
+        if mod.get("d", "")[1:2] == "6":
+            six_dot_mods += 1
+        for stat in mod.get("s", []):
+            if stat.get("i") == SPEED_STAT_ID:
+                speed = stat.get("v", 0.0)
+                max_speed = max(max_speed, speed)
+                for threshold in SPEED_THRESHOLDS:
+                    if speed >= threshold:
+                        speed_counts[threshold] += 1
+
+    return {
+        "allyCode": player.get("allyCode"),
+        "playerName": player.get("playerName"),
+        "lastUpdated": player.get("lastUpdated"),
+        "dataSource": player.get("dataSource"),
+        "totalMods": len(mods),
+        "sixDotMods": six_dot_mods,
+        "averageEfficiency": round(total_efficiency / len(mods), 1) if mods else 0.0,
+        "speedSecondaries": {f"{threshold}+": count for threshold, count in speed_counts.items()},
+        "maxSpeedSecondary": max_speed
+    }
+
+def aggregate_guild(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Guild-level totals over player summaries (efficiency is mod-weighted)"""
+    total_mods = sum(s["totalMods"] for s in summaries)
+    weighted_efficiency = sum(s["averageEfficiency"] * s["totalMods"] for s in summaries)
+    speed_totals = {f"{threshold}+": 0 for threshold in SPEED_THRESHOLDS}
+    for summary in summaries:
+        for bucket, count in summary["speedSecondaries"].items():
+            speed_totals[bucket] += count
+
+    top_speed = sorted(
+        summaries,
+        key=lambda s: s["speedSecondaries"][f"{SPEED_THRESHOLDS[-1]}+"],
+        reverse=True
+    )[:5]
+
+    return {
+        "players": len(summaries),
+        "totalMods": total_mods,
+        "sixDotMods": sum(s["sixDotMods"] for s in summaries),
+        "averageEfficiency": round(weighted_efficiency / total_mods, 1) if total_mods else 0.0,
+        "speedSecondaries": speed_totals,
+        "maxSpeedSecondary": max((s["maxSpeedSecondary"] for s in summaries), default=0.0),
+        "topSpeedPlayers": [
+            {"allyCode": s["allyCode"], "playerName": s["playerName"],
+             f"{SPEED_THRESHOLDS[-1]}+": s["speedSecondaries"][f"{SPEED_THRESHOLDS[-1]}+"]}
+            for s in top_speed
+        ]
+    }
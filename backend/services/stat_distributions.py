@@ -0,0 +1,266 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict, defaultdict
+import os
+import sqlite3
+import threading
+import time
+import logging
+import orjson
+from services.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+# "mod": one value per mod; "player": one value per roster, the mean over its mods
+SCOPES = ("mod", "player")
+EFFICIENCY = "efficiency"
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+# (scope, metric, slot, dots); metric is a secondary stat id or EFFICIENCY
+SketchKey = Tuple[str, Union[int, str], int, int]
+
+def key_to_text(key: SketchKey) -> str:
+    return ":".join(str(part) for part in key)
+
+def key_from_text(text: str) -> SketchKey:
+    scope, metric, slot, dots = text.split(":")
+    return scope, int(metric) if metric.isdigit() else metric, int(slot), int(dots)
+
+def parse_metric(metric: str) -> Union[int, str]:
+    """A secondary stat id ("5") or "efficiency" """
+    if metric.isdigit():
+        return int(metric)
+    if metric.lower() == EFFICIENCY:
+        return EFFICIENCY
+    raise ValueError(f"Unknown metric: {metric}")
+
+def roster_samples(mods: List[Dict[str, Any]]) -> Dict[SketchKey, List[float]]:
+    """Values one roster adds to the distributions: each mod's secondaries and efficiency, and their per-roster means"""
+    values: Dict[Tuple[Union[int, str], int, int], List[float]] = defaultdict(list)
+    for mod in mods:
+        definition = mod["d"]
+        slot, dots = int(definition[2]), int(definition[1])
+        values[(EFFICIENCY, slot, dots)].append(mod["e"])
+        for stat in mod["s"]:
+            values[(stat["i"], slot, dots)].append(stat["v"])
+
+    samples: Dict[SketchKey, List[float]] = {}
+    for (metric, slot, dots), metric_values in values.items():
+        samples[("mod", metric, slot, dots)] = metric_values
+        samples[("player", metric, slot, dots)] = [sum(metric_values) / len(metric_values)]
+    return samples
+
+def samples_from_encoded(encoded: List[bytes]) -> Dict[SketchKey, List[float]]:
+    """roster_samples of a snapshot's encoded mods"""
+    return roster_samples(orjson.loads(b"[" + b",".join(encoded) + b"]"))
+
+def samples_from_body(body: bytes) -> Dict[SketchKey, List[float]]:
+    """roster_samples of a complete /api/player body"""
+    return roster_samples(orjson.loads(body).get("mods", []))
+
+class StatDistributions:
+    """
+    Cross-player distributions of mod secondaries and efficiencies
+
+    One QuantileSketch per (scope, metric, slot, dots), so memory is bounded
+    by the number of keys (a few hundred) whatever the number of players,
+    and a query over several slots or dot levels merges their sketches.
+    Each roster is sampled at most once per resample_seconds per ally code,
+    so players who refresh often don't outweigh the rest.
+
+    Rosters are sketched into a pending set. persist() folds it, inside one
+    SQLite transaction, into the sketches the shared file holds (written by
+    every worker) and reloads the result, so each worker serves the merged
+    distribution as of its last persist plus its own pending values.
+    Without a path the merge happens in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None, k: int = 200, resample_seconds: float = 7 * 86400,
+                 max_players: int = 100000):
+        self.path = path
+        self.k = k
+        self.resample_seconds = resample_seconds
+        self.max_players = max_players
+        self._lock = threading.Lock()
+        # Persisted (or, without a file, folded) sketches, and what was added since
+        self._merged: Dict[SketchKey, QuantileSketch] = {}
+        self._pending: Dict[SketchKey, QuantileSketch] = {}
+        self._persisting: Dict[SketchKey, QuantileSketch] = {}
+        # Ally code -> when it was last sampled; pending ones are written on persist
+        self._sampled: "OrderedDict[str, float]" = OrderedDict()
+        self._pending_players: Dict[str, float] = {}
+
+        self.rosters = 0
+        self.skipped = 0
+        self.persists = 0
+        self.persist_failures = 0
+
+        self._conn = None
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS sketches (key TEXT PRIMARY KEY, sketch BLOB NOT NULL)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS sampled_players (ally_code TEXT PRIMARY KEY, sampled_at REAL NOT NULL)")
+            except (OSError, sqlite3.Error) as e:
+                # A path was asked for: without it sketches are neither persisted nor merged across workers
+                logger.error(f"Stat distributions kept in memory only, per process: {path} unavailable: {str(e)}")
+                self._conn = None
+
+    def should_sample(self, ally_code: str) -> bool:
+        """Whether this roster is due to be sampled (checked before doing the work)"""
+        with self._lock:
+            sampled_at = self._sampled.get(ally_code)
+        return sampled_at is None or time.time() - sampled_at >= self.resample_seconds
+
+    def add(self, ally_code: str, samples: Dict[SketchKey, List[float]]) -> bool:
+        """Sketch one roster's samples, unless the ally code was sampled recently"""
+        now = time.time()
+        with self._lock:
+            sampled_at = self._sampled.get(ally_code)
+            if sampled_at is not None and now - sampled_at < self.resample_seconds:
+                self.skipped += 1
+                return False
+            for key, values in samples.items():
+                sketch = self._pending.get(key)
+                if sketch is None:
+                    sketch = self._pending[key] = QuantileSketch(self.k)
+                sketch.update(values)
+            self._mark_sampled(ally_code, now)
+            self._pending_players[ally_code] = now
+            self.rosters += 1
+        return True
+
+    def _mark_sampled(self, ally_code: str, sampled_at: float) -> None:
+        self._sampled[ally_code] = sampled_at
+        self._sampled.move_to_end(ally_code)
+        while len(self._sampled) > self.max_players:
+            self._sampled.popitem(last=False)
+
+    def persist(self) -> None:
+        """Fold pending sketches into the shared ones and reload what every worker has written"""
+        with self._lock:
+            if self._conn is None:
+                for key, sketch in self._pending.items():
+                    self._merged.setdefault(key, QuantileSketch(self.k)).merge(sketch)
+                self._pending, self._pending_players = {}, {}
+                self.persists += 1
+                return
+            # Still served from _persisting until the merged sketches replace it
+            self._persisting, self._pending = self._pending, {}
+            players, self._pending_players = self._pending_players, {}
+
+        try:
+            merged, sampled = self._fold_into_file(self._persisting, players)
+        except sqlite3.Error as e:
+            # Keep the values for the next attempt
+            with self._lock:
+                for key, sketch in self._persisting.items():
+                    self._pending[key] = sketch.merge(self._pending[key]) if key in self._pending else sketch
+                self._persisting = {}
+                self._pending_players.update(players)
+                self.persist_failures += 1
+            logger.warning(f"Persisting stat distributions failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._merged, self._persisting = merged, {}
+            for ally_code, sampled_at in sampled:
+                if self._sampled.get(ally_code, 0.0) < sampled_at:
+                    self._mark_sampled(ally_code, sampled_at)
+            self.persists += 1
+
+    def _fold_into_file(self, pending: Dict[SketchKey, QuantileSketch],
+                        players: Dict[str, float]) -> Tuple[Dict[SketchKey, QuantileSketch], List[Tuple[str, float]]]:
+        conn = self._conn
+        # IMMEDIATE: two workers persisting at once take turns instead of losing each other's values
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            merged = {key_from_text(text): QuantileSketch.from_bytes(blob)
+                      for text, blob in conn.execute("SELECT key, sketch FROM sketches")}
+            for key, sketch in pending.items():
+                if key in merged:
+                    merged[key].merge(sketch)
+                else:
+                    merged[key] = sketch.copy()
+                conn.execute("INSERT OR REPLACE INTO sketches (key, sketch) VALUES (?, ?)",
+                             (key_to_text(key), merged[key].to_bytes()))
+            conn.executemany("INSERT OR REPLACE INTO sampled_players (ally_code, sampled_at) VALUES (?, ?)",
+                             players.items())
+            cutoff = time.time() - self.resample_seconds
+            conn.execute("DELETE FROM sampled_players WHERE sampled_at < ?", (cutoff,))
+            sampled = conn.execute("SELECT ally_code, sampled_at FROM sampled_players").fetchall()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return merged, sampled
+
+    def sketch(self, scope: str, metric: Union[int, str], slots: Optional[Iterable[int]] = None,
+               dots: Optional[Iterable[int]] = None) -> QuantileSketch:
+        """Merged sketch of every key matching the filters (None matches any slot / dots)"""
+        slots = set(slots) if slots else None
+        dots = set(dots) if dots else None
+        with self._lock:
+            keys = [key for key in set(self._merged) | set(self._persisting) | set(self._pending)
+                    if key[0] == scope and key[1] == metric and (slots is None or key[2] in slots)
+                    and (dots is None or key[3] in dots)]
+        return self._combined(keys)
+
+    def _combined(self, keys: Iterable[SketchKey]) -> QuantileSketch:
+        combined = QuantileSketch(self.k)
+        with self._lock:
+            for key in keys:
+                for sketches in (self._merged, self._persisting, self._pending):
+                    if key in sketches:
+                        combined.merge(sketches[key])
+        return combined
+
+    def percentiles(self, scope: str, metric: Union[int, str], slots: Optional[Iterable[int]] = None,
+                    dots: Optional[Iterable[int]] = None, quantiles: Iterable[float] = DEFAULT_QUANTILES,
+                    value: Optional[float] = None) -> Dict[str, Any]:
+        sketch = self.sketch(scope, metric, slots, dots)
+        quantiles = list(quantiles)
+        result: Dict[str, Any] = {
+            "count": sketch.count,
+            "quantiles": {f"p{q * 100:g}": v for q, v in zip(quantiles, sketch.quantiles(quantiles))}
+        }
+        if value is not None:
+            result["percentile"] = round(sketch.rank(value) * 100, 2) if sketch.count else None
+        return result
+
+    def rank_roster(self, samples: Dict[SketchKey, List[float]]) -> List[Dict[str, Any]]:
+        """Where each of a roster's per-slot means falls among the players sampled so far"""
+        ranked = []
+        for (scope, metric, slot, dots), values in samples.items():
+            if scope != "player":
+                continue
+            sketch = self._combined([(scope, metric, slot, dots)])
+            ranked.append({
+                "metric": metric, "slot": slot, "dots": dots, "value": round(values[0], 2), "players": sketch.count,
+                "percentile": round(sketch.rank(values[0]) * 100, 2) if sketch.count else None
+            })
+        ranked.sort(key=lambda entry: (entry["slot"], entry["dots"], str(entry["metric"])))
+        return ranked
+
+    def close(self) -> None:
+        self.persist()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = set(self._merged) | set(self._pending)
+            retained = sum(s.retained for s in self._merged.values()) + sum(s.retained for s in self._pending.values())
+            return {
+                "rosters": self.rosters,
+                "skipped": self.skipped,
+                "persists": self.persists,
+                "persist_failures": self.persist_failures,
+                "sketches": len(keys),
+                "retained_values": retained,
+                "persistent": self._conn is not None
+            }
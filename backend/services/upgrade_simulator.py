@@ -0,0 +1,206 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import defaultdict
+from functools import lru_cache
+from models.mod import ModRecord
+from services.evaluation_engine import BatchEfficiency
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_SECONDARIES = 4
+# One roll when the stat appears plus at most 4 increases
+MAX_STAT_ROLLS = 5
+# A secondary is added or increased when the mod reaches these levels
+ROLL_LEVELS = (3, 6, 9, 12)
+MAX_LEVEL = 15
+MAX_TIER = 5
+SPEED_STAT_ID = 5
+SECONDARY_STAT_IDS = (1, 5, 17, 18, 28, 41, 42, 48, 49, 53, 55, 56)
+# Unscaled speed rolls are in 1/100000 of a point
+SPEED_ROLL_SCALE = 1e-5
+# Mean speed roll by dots, for a speed secondary that hasn't appeared yet
+NEW_SPEED_ROLL = {1: 1.5, 2: 2.0, 3: 3.0, 4: 3.5, 5: 4.5, 6: 4.5}
+# Roll ranges span hundreds to hundreds of thousands of unscaled steps, so a new
+# stat's rolls average 50% whichever stat it turns out to be
+NEW_ROLL_EFFICIENCY = 50.0
+
+@lru_cache(maxsize=4096)
+def final_roll_distribution(counts: Tuple[int, ...], events: int) -> np.ndarray:
+    """
+    P(slot ends with c rolls), shape (MAX_SECONDARIES, MAX_STAT_ROLLS + 1)
+
+    counts are the roll counts of the secondaries already on the mod, in
+    order; each event adds a new secondary (one roll, next free slot) while
+    the mod has fewer than MAX_SECONDARIES, else increases one of the stats
+    still below MAX_STAT_ROLLS, chosen uniformly. Exact: the outcome
+    distribution is carried forward event by event.
+    """
+    outcomes: Dict[Tuple[int, ...], float] = {counts: 1.0}
+    for _ in range(events):
+        following: Dict[Tuple[int, ...], float] = defaultdict(float)
+        for state, probability in outcomes.items():
+            if len(state) < MAX_SECONDARIES:
+                following[state + (1,)] += probability
+                continue
+            eligible = [slot for slot, rolls in enumerate(state) if rolls < MAX_STAT_ROLLS]
+            if not eligible:
+                following[state] += probability
+                continue
+            share = probability / len(eligible)
+            for slot in eligible:
+                following[state[:slot] + (state[slot] + 1,) + state[slot + 1:]] += share
+        outcomes = following
+
+    distribution = np.zeros((MAX_SECONDARIES, MAX_STAT_ROLLS + 1))
+    for state, probability in outcomes.items():
+        for slot, rolls in enumerate(state):
+            distribution[slot, rolls] += probability
+    distribution.setflags(write=False)
+    return distribution
+
+class UpgradeProjection:
+    """
+    Expected secondary speed and efficiency of each mod after levelling to 15
+    ("lv") and after levelling and slicing to tier A ("sl"); NaN where the
+    plan doesn't apply (already level 15 / not sliceable)
+    """
+
+    def __init__(self, level_speed: np.ndarray, level_efficiency: np.ndarray,
+                 slice_speed: np.ndarray, slice_efficiency: np.ndarray):
+        self.level_speed = level_speed
+        self.level_efficiency = level_efficiency
+        self.slice_speed = slice_speed
+        self.slice_efficiency = slice_efficiency
+
+    def to_mod_results(self) -> List[Optional[Dict[str, List[float]]]]:
+        """Per mod {"lv": [speed, efficiency], "sl": [...]} (plans that apply only), or None"""
+        results = []
+        plans = zip(self.level_speed.tolist(), self.level_efficiency.tolist(),
+                    self.slice_speed.tolist(), self.slice_efficiency.tolist())
+        for level_speed, level_efficiency, slice_speed, slice_efficiency in plans:
+            result = {}
+            if level_efficiency == level_efficiency:
+                result["lv"] = [round(level_speed, 2), round(level_efficiency, 1)]
+            if slice_efficiency == slice_efficiency:
+                result["sl"] = [round(slice_speed, 2), round(slice_efficiency, 1)]
+            results.append(result or None)
+        return results
+
+class UpgradeSimulator:
+    """
+    Expected-value outcome of levelling and slicing, for a whole roster at once
+
+    The verdicts say whether to level (LV) or slice (SL); this says what the
+    mod is likely to become. Future rolls follow the game rules: levels 3, 6,
+    9 and 12 add a secondary while the mod has fewer than four, else increase
+    a random one; every tier sliced (5 and 6 dots, up to A) increases a random
+    secondary; no stat goes past five rolls. Each roll is uniform within the
+    stat's roller bounds, as the efficiency formula assumes.
+
+    Which slots end with how many rolls is solved exactly per distinct (roll
+    counts, events) shape - a roster has a few dozen - and everything per stat
+    is then one NumPy pass over the ModColumns batch. Slicing 5A to 6E (which
+    rescales every stat) is not projected.
+    """
+
+    def project(self, mods: Sequence[ModRecord], efficiency: BatchEfficiency) -> UpgradeProjection:
+        columns = efficiency.columns
+        mod_count = columns.mod_count
+        stat_count = len(columns.stat_mod)
+
+        stat_rolls = np.fromiter((stat.rolls for mod in mods for stat in mod.secondaryStats),
+                                 dtype=np.int64, count=stat_count)
+        stat_rolls = np.clip(stat_rolls, 0, MAX_STAT_ROLLS)
+        stat_values = np.fromiter((stat.value for mod in mods for stat in mod.secondaryStats),
+                                  dtype=np.float64, count=stat_count)
+        stat_slot = np.arange(stat_count) - columns.mod_stat_offsets[columns.stat_mod]
+
+        # Per mod: events of each plan, the shape of the roll distribution and the speed pool
+        level_events = np.zeros(mod_count, dtype=np.int64)
+        slice_events = np.zeros(mod_count, dtype=np.int64)
+        projectable = np.zeros(mod_count, dtype=bool)
+        new_speed_roll = np.zeros(mod_count)
+        counts_per_mod: List[Tuple[int, ...]] = []
+        offsets = columns.mod_stat_offsets.tolist()
+        rolls_list = stat_rolls.tolist()
+        for index, mod in enumerate(mods):
+            counts = tuple(rolls_list[offsets[index]:offsets[index + 1]])
+            counts_per_mod.append(counts)
+            if len(counts) > MAX_SECONDARIES:
+                continue
+            projectable[index] = True
+            level_events[index] = sum(mod.level < level for level in ROLL_LEVELS)
+            if mod.dots >= 5 and mod.tier < MAX_TIER:
+                slice_events[index] = MAX_TIER - mod.tier
+            # A speed secondary can still appear: each new stat is drawn from the ones the mod doesn't have
+            present = {stat.unitStatId for stat in mod.secondaryStats} | {mod.primaryStat.unitStatId}
+            if SPEED_STAT_ID not in present:
+                pool = sum(stat_id not in present for stat_id in SECONDARY_STAT_IDS)
+                new_speed_roll[index] = NEW_SPEED_ROLL.get(mod.dots, 0.0) / pool
+
+        levels = np.fromiter((mod.level for mod in mods), dtype=np.int64, count=mod_count)
+        can_level = projectable & (levels < MAX_LEVEL)
+        can_slice = projectable & (slice_events > 0)
+
+        # Stat efficiency pieces: sum and count of the known roll efficiencies, mean of a future roll
+        roll_totals = np.bincount(columns.roll_stat, weights=efficiency.roll_efficiency, minlength=stat_count)
+        known_rolls = np.bincount(columns.roll_stat, minlength=stat_count)
+        range_size = columns.stat_max - columns.stat_min
+        future_roll = np.divide((range_size + 2) * 100, 2 * (range_size + 1), out=np.zeros(stat_count),
+                                where=range_size >= 0)
+        grows = columns.stat_valid & (known_rolls > 0) & (range_size >= 0)
+        is_speed = columns.stat_ids == SPEED_STAT_ID
+        speed_roll = (columns.stat_min + columns.stat_max) / 2 * SPEED_ROLL_SCALE
+
+        rolls = np.arange(MAX_STAT_ROLLS + 1)
+        added = np.maximum(rolls[None, :] - stat_rolls[:, None], 0)
+        denominator = known_rolls[:, None] + added
+        # Efficiency of each existing stat for every roll count it could end with
+        outcome = np.divide(roll_totals[:, None] + added * future_roll[:, None], denominator,
+                            out=np.zeros(added.shape), where=denominator > 0)
+        existing = np.diff(columns.mod_stat_offsets)
+        new_slot = np.arange(MAX_SECONDARIES)[None, :] >= existing[:, None]
+        current_speed = np.bincount(columns.stat_mod, weights=np.where(is_speed, stat_values, 0.0), minlength=mod_count)
+        stat_slot = np.minimum(stat_slot, MAX_SECONDARIES - 1)
+
+        projections = []
+        for events, applies in ((level_events, can_level), (level_events + slice_events, can_slice)):
+            distributions = self._distributions(counts_per_mod, events, applies)
+            stat_distribution = distributions[columns.stat_mod, stat_slot]
+            stat_efficiency = np.where(grows, (stat_distribution * outcome).sum(axis=1), efficiency.stat_efficiency)
+            expected_added = (stat_distribution * added).sum(axis=1)
+
+            # New stats fill the slots after the existing ones; whether they appear is certain, not their rolls
+            slot_rolls = (distributions * rolls).sum(axis=2)
+            new_stats = (new_slot & (slot_rolls > 0)).sum(axis=1)
+            new_rolls = np.where(new_slot, slot_rolls, 0.0).sum(axis=1)
+
+            final_stats = np.minimum(existing, MAX_SECONDARIES) + new_stats
+            # Not +=: bincount of no stats at all comes back as int64 even with weights
+            efficiency_total = (np.bincount(columns.stat_mod, weights=stat_efficiency, minlength=mod_count)
+                                + new_stats * NEW_ROLL_EFFICIENCY)
+            mod_efficiency = np.divide(efficiency_total, final_stats, out=np.zeros(mod_count), where=final_stats > 0)
+
+            speed_gain = np.bincount(columns.stat_mod, minlength=mod_count,
+                                     weights=np.where(is_speed & grows, expected_added * speed_roll, 0.0))
+            speed = current_speed + speed_gain + new_rolls * new_speed_roll
+            projections.append(np.where(applies, speed, np.nan))
+            projections.append(np.where(applies, mod_efficiency, np.nan))
+        return UpgradeProjection(*projections)
+
+    @staticmethod
+    def _distributions(counts_per_mod: List[Tuple[int, ...]], events: np.ndarray, applies: np.ndarray) -> np.ndarray:
+        """final_roll_distribution of every mod, shape (mods, MAX_SECONDARIES, MAX_STAT_ROLLS + 1)"""
+        shapes: Dict[Tuple[Tuple[int, ...], int], int] = {}
+        tables = [final_roll_distribution((), 0)]
+        shape_index = np.zeros(len(counts_per_mod), dtype=np.int64)
+        for index, (counts, mod_events, mod_applies) in enumerate(zip(counts_per_mod, events.tolist(), applies.tolist())):
+            if not mod_applies:
+                continue
+            key = (counts, mod_events)
+            if key not in shapes:
+                shapes[key] = len(tables)
+                tables.append(final_roll_distribution(*key))
+            shape_index[index] = shapes[key]
+        return np.stack(tables)[shape_index]
@@ -0,0 +1,61 @@
+"""
+WorkflowEngine against verdicts recorded from src/utils/workflowEvaluator.js
+
+The fixture holds synthetic Comlink mods (every dot/tier/level, speeds on
+and just below each threshold) and what the JS evaluator said about each
+one per workflow. Re-record it with node after changing either side:
+    python -m benchmarks.check_workflow_parity --mods 600 --record tests/fixtures/workflow_parity.json
+"""
+import json
+import os
+
+import pytest
+
+from benchmarks.check_workflow_parity import source_digest
+from config import settings
+from services.character_names import CharacterNameIndex
+from services.evaluation_engine import WorkflowEngine, load_workflow_engine
+from services.mod_processor import ModProcessor
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "workflow_parity.json")
+
+@pytest.fixture(scope="module")
+def recorded():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture(scope="module")
+def engine():
+    return WorkflowEngine.from_js_config(settings.WORKFLOWS_CONFIG_PATH)
+
+@pytest.fixture(scope="module")
+def records(recorded):
+    # Names are passed in, so the index never queries the database
+    processor = ModProcessor(name_index=CharacterNameIndex())
+    return [processor.process_single_mod(mod, "HERMITYODA:SEVEN_STAR", "Hermit Yoda") for mod in recorded["mods"]]
+
+def test_fixture_matches_js_sources(recorded):
+    assert recorded["source_sha256"] == source_digest(settings.WORKFLOWS_CONFIG_PATH), \
+        "The JS workflow config or evaluator changed since the verdicts were recorded; re-record the fixture"
+
+def test_same_workflows(recorded, engine):
+    assert list(engine.workflow_keys) == list(recorded["verdicts"])
+
+@pytest.mark.parametrize("workflow", ["beginner", "begin_poor", "compreshensive"])
+def test_verdicts_match_js(recorded, engine, records, workflow):
+    workflow_index = engine.workflow_keys.index(workflow)
+    verdicts, _ = engine.evaluate_mods(records)
+    mismatches = []
+    for mod, record, mod_verdicts, expected in zip(recorded["mods"], records, verdicts, recorded["verdicts"][workflow]):
+        actual = engine.describe(mod_verdicts[workflow_index])
+        # Locked mods show "Locked" in the browser; the code is a plain keep
+        if actual["verdict"] != expected[0] or (not record.locked and actual["text"] != expected[1]):
+            mismatches.append((mod["id"], expected, actual))
+    assert not mismatches, f"{len(mismatches)} mismatches, first: {mismatches[:5]}"
+
+def test_missing_config_disables_verdicts(tmp_path):
+    assert load_workflow_engine(str(tmp_path / "missing.js")) is None
+
+def test_missing_config_refused_when_required(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_workflow_engine(str(tmp_path / "missing.js"), required=True)
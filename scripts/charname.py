@@ -1,9 +1,14 @@
 from dotenv import load_dotenv
 import os
+import sys
 import datetime
 import psycopg2
 import json
 
+# Share the backend's connection pool implementation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from services.db_pool import ConnectionPool, get_shared_pool
+
 load_dotenv()
 
 DB_HOST = os.getenv("DB_HOST")
@@ -11,6 +16,7 @@ DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
 
 def log_print(message):
     """
@@ -41,6 +47,19 @@ def db_connect():
     except Exception as e:
         log_print(f"Connection failed: {e}")
 
+def db_pool():
+    """
+    Shared pool of PostgreSQL connections for this script.
+    Connections are opened with db_connect and reused across queries.
+
+    Returns:
+    The process-wide ConnectionPool for the configured database
+    """
+    return get_shared_pool(
+        ("postgres", DB_HOST, DB_PORT, DB_NAME, DB_USER),
+        lambda: ConnectionPool(db_connect, min_size=1, max_size=DB_POOL_MAX_SIZE, name=f"postgres:{DB_NAME}")
+    )
+
 def execute_query(query):
     """
     Execute a single SQL query and return the results.
@@ -55,7 +74,7 @@ def execute_query(query):
     cursor=None
 
     try:
-        conn=db_connect()
+        conn=db_pool().getconn()
         cursor=conn.cursor()
 
         safe_query=query
@@ -81,7 +100,7 @@ def execute_query(query):
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
+            db_pool().putconn(conn)
 
 def get_charname_json():
     """
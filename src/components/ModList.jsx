@@ -3,7 +3,7 @@ import './ModList.css'
 import ModCard from './ModCard'
 import ModDetailModal from './ModDetailModal'
 import { decodeModData } from '../utils/modDecoder'
-import { evaluateModWithWorkflow } from '../utils/workflowEvaluator';
+import { getModVerdict } from '../utils/workflowEvaluator';
 import { EVALUATION_WORKFLOWS } from '../config/evaluationWorkflows';
 import WorkflowHelpModal from './WorkflowHelpModal';
 import charactermodsAtlas from '../assets/charactermods_datacard_atlas.png';
@@ -54,11 +54,7 @@ function calculateCollectionEfficiency(mods, evaluationMode, tempLockedMods = []
       modCount++;
 
       const isLocked = mod.locked || tempLockedMods.includes(mod.id);
-      const evaluation = isLocked 
-        ? { verdict: 'keep' } 
-        : evaluateModWithWorkflow(mod, evaluationMode);
-      
-      const verdict = evaluation.verdict;
+      const verdict = isLocked ? 'keep' : getModVerdict(mod, evaluationMode);
       
       if (breakdown[verdict]) {
         breakdown[verdict].total += modEfficiency;
@@ -264,9 +260,10 @@ function ModList({ playerData, evaluationMode, onModeChange }) {
     let extractedMods = []
 
     if (playerData?.apiResponse?.mods) {
+      const workflowKeys = (playerData.apiResponse.workflows || []).map(workflow => workflow.key);
       extractedMods = playerData.apiResponse.mods.map(mod => {
         if (mod.d !== undefined) {
-          return decodeModData(mod);
+          return decodeModData(mod, workflowKeys);
         }
         return {
           ...mod,
@@ -365,22 +362,16 @@ function ModList({ playerData, evaluationMode, onModeChange }) {
     if (activeFilters.includes('locked') && isLocked) return true;
 
     // Evaluate the mod
-    const evaluation = isLocked 
-      ? { verdict: 'keep' } 
-      : evaluateModWithWorkflow(mod, evaluationMode);
+    const verdict = isLocked ? 'keep' : getModVerdict(mod, evaluationMode);
 
     // Check if the mod's verdict matches any active filter
-    return activeFilters.includes(evaluation.verdict);
+    return activeFilters.includes(verdict);
   });
 
   // Calculate summary statistics
   const modStats = filteredMods.reduce((acc, mod) => {
     const isLocked = mod.locked || tempLockedMods.includes(mod.id);
-    const evaluation = isLocked 
-      ? { verdict: 'keep' } 
-      : evaluateModWithWorkflow(mod, evaluationMode);
-    
-    const verdict = evaluation.verdict;
+    const verdict = isLocked ? 'keep' : getModVerdict(mod, evaluationMode);
     acc[verdict] = (acc[verdict] || 0) + 1;
     return acc;
   }, {});
@@ -1,4 +1,5 @@
-export function decodeModData(compactMod) {
+// workflowKeys: apiResponse.workflows keys, in the order of each mod's "w" codes
+export function decodeModData(compactMod, workflowKeys = []) {
   return {
     id: compactMod.id,
     definitionId: compactMod.d,
@@ -22,6 +23,9 @@ export function decodeModData(compactMod) {
       efficiency: stat.e,
       rollEfficiencies: stat.re
     })),
-    efficiency: compactMod.e
+    efficiency: compactMod.e,
+    workflowVerdicts: compactMod.w
+      ? Object.fromEntries(workflowKeys.map((key, i) => [key, compactMod.w[i]]))
+      : undefined
   };
 }
\ No newline at end of file
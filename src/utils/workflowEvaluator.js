@@ -131,6 +131,20 @@ export function evaluateModWithWorkflow(mod, workflowName = 'beginner') {
   };
 }
 
+/**
+ * Verdict only ("keep" / "sell" / "slice" / "level"), for filters and counts.
+ * Uses the code the backend precomputed for built-in workflows and only
+ * evaluates in the browser for workflows the server doesn't know.
+ */
+export function getModVerdict(mod, workflowName = 'beginner') {
+  const code = mod.workflowVerdicts?.[workflowName];
+  const resultConfig = code && RESULT_CODES[code.split(':')[0]];
+  if (resultConfig) {
+    return resultConfig.verdict;
+  }
+  return evaluateModWithWorkflow(mod, workflowName).verdict;
+}
+
 /**
  * Find the closest level key that applies
  */